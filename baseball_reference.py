@@ -6,11 +6,13 @@ import datetime
 
 import bs4
 import re
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from time import sleep
 import bidict
 
 from beautiful_soup_helper import *
+from telemetry import PARSE_EVENT, timed
 from datetime import date, timedelta
 
 BASE_URL = "http://www.baseball-reference.com"
@@ -73,6 +75,44 @@ class HandedPlayerIdentifier(PlayerIdentifier):
         return self._throws
 
 
+def get_player_url(baseball_reference_id: str) -> str:
+    return BASE_URL + "/players/" + baseball_reference_id[0] + "/" + baseball_reference_id + ".shtml"
+
+
+def get_split_url(baseball_reference_id: str, year: int = None, player_type: str = "b") -> str:
+    """
+    :param baseball_reference_id: BaseballReference unique ID for the player of interest
+    :param year: year of the splits (default is the career splits)
+    :param player_type: "b" for the hitting splits, "p" for the pitching splits
+    :return: URL of the player's split page
+    """
+    year_string = "Career" if year is None else str(year)
+    return BASE_URL + "/players/split.fcgi?id=" + str(baseball_reference_id) + "&year=" + year_string + "&t=" + \
+        player_type
+
+
+def get_leaderboard_url(year: int, stat_type: str) -> str:
+    """
+    :param year: year of interest
+    :param stat_type: "batting" or "pitching"
+    :return: URL of the league's standard stats page listing every player of the year
+    """
+    return BASE_URL + "/leagues/MLB/" + str(year) + "-standard-" + stat_type + ".shtml"
+
+
+def get_team_url(team: str, year: int) -> str:
+    return BASE_URL + "/teams/" + team + "/" + str(year) + ".shtml"
+
+
+def get_game_log_url(baseball_reference_id: str, year: int, player_type: str = "b") -> str:
+    return BASE_URL + "/players/gl.fcgi?id=" + str(baseball_reference_id) + "&t=" + player_type + "&year=" + str(year)
+
+
+def get_vs_pitcher_url(batter_id: str) -> str:
+    return "https://stathead.com/baseball/batter_vs_pitcher.cgi?batter=" + str(batter_id) + \
+        "&utm_medium=br&utm_source=player-finder-links&utm_campaign=baseball"
+
+
 def get_hitter_empty_stats() -> dict:
     return {key: 0.0 for key in HITTER_RELEVANT_STAT_KEYS}
 
@@ -162,6 +202,62 @@ def get_hitter_id(full_name, team, year=None, soup=None):
     raise PlayerNameNotFound(full_name)
 
 
+def get_player_id_index(soup: BeautifulSoup, table_id: str) -> dict:
+    """ Index every player of a season leaderboard in one pass, so looking up a whole lineup does not scan the
+    table once per player
+    :param soup: BeautifulSoup object of the leaderboard with its tables uncommented
+    :param table_id: "players_standard_batting" or "players_standard_pitching"
+    :return: dictionary of the player's full name and BaseballReference team abbreviation to the player's ID
+    """
+    player_id_index = dict()
+    player_table = None if soup is None else soup.find("table", {"id": table_id})
+    if player_table is None or player_table.find("tbody") is None:
+        return player_id_index
+
+    for player_table_row in player_table.find("tbody").find_all("tr"):
+        if "thead" in (player_table_row.get("class") or list()):
+            continue
+        player_entries = player_table_row.find_all("td")
+        if len(player_entries) < 3 or player_entries[0].find("a") is None:
+            continue
+        player_name_entry = player_entries[0].find("a")
+        player_id = player_name_entry.get("href").split("/")[-1].replace(".shtml", "")
+        player_id_index.setdefault((player_name_entry.text.replace(u'\xa0', ' '), player_entries[2].text), player_id)
+
+    return player_id_index
+
+
+def get_hitter_id_index(year: int = None, soup: BeautifulSoup = None) -> dict:
+    """
+    :param year: season of the leaderboard (default is the current year)
+    :param soup: BeautifulSoup object of the season's batting leaderboard (default is to request it)
+    :return: dictionary of the hitter's full name and team to the hitter's BaseballReference ID
+    """
+    if soup is None:
+        soup = get_uncommented_soup_from_url(get_leaderboard_url(year or date.today().year, "batting"))
+    return get_player_id_index(soup, "players_standard_batting")
+
+
+def get_pitcher_hand_index(soup: BeautifulSoup) -> dict:
+    """ Get the throwing hand of every pitcher of a season leaderboard, which marks left-handed pitchers with "*"
+    :param soup: BeautifulSoup object of the pitching leaderboard with its tables uncommented
+    :return: dictionary of the pitcher's BaseballReference ID to "L" or "R"
+    """
+    pitcher_hand_index = dict()
+    pitcher_table = None if soup is None else soup.find("table", {"id": "players_standard_pitching"})
+    if pitcher_table is None or pitcher_table.find("tbody") is None:
+        return pitcher_hand_index
+
+    for pitcher_table_row in pitcher_table.find("tbody").find_all("tr"):
+        pitcher_entries = pitcher_table_row.find_all("td")
+        if len(pitcher_entries) == 0 or pitcher_entries[0].find("a") is None:
+            continue
+        pitcher_id = pitcher_entries[0].find("a").get("href").split("/")[-1].replace(".shtml", "")
+        pitcher_hand_index[pitcher_id] = "L" if "*" in pitcher_entries[0].text else "R"
+
+    return pitcher_hand_index
+
+
 def get_season_pitcher_identifiers(year: int, sleep_length: float = 10.0) -> [HandedPlayerIdentifier]:
     soup = get_pitcher_soup(year)
 
@@ -246,7 +342,7 @@ def get_hitter_soup(year: int = None) -> bs4.BeautifulSoup:
     if year is None:
         year = date.today().year
 
-    hitter_year_url = BASE_URL + "/leagues/MLB/" + str(year) + "-standard-batting.shtml"
+    hitter_year_url = get_leaderboard_url(year, "batting")
     return get_soup_from_url(hitter_year_url)
 
 
@@ -258,7 +354,7 @@ def get_pitcher_soup(year: int = None) -> bs4.BeautifulSoup:
     if year is None:
         year = date.today().year
 
-    pitcher_year_url = BASE_URL + "/leagues/MLB/" + str(year) + "-standard-pitching.shtml"
+    pitcher_year_url = get_leaderboard_url(year, "pitching")
     return get_comment_soup_from_url(pitcher_year_url)
 
 
@@ -288,36 +384,37 @@ def get_vs_table_row_dict(soup, batter_id, pitcher_id):
     :param pitcher_id: the Baseball Reference ID of the relevant pitcher
     :return: a dictionary representing the stats
     """
-    # Note: we seem to need BASE_URL as a prefix during unit tests
-    batter_vs_pitcher_base = "/baseball/batter_vs_pitcher.cgi?batter="
+    with timed(PARSE_EVENT, table="result_table"):
+        # Note: we seem to need BASE_URL as a prefix during unit tests
+        batter_vs_pitcher_base = "/baseball/batter_vs_pitcher.cgi?batter="
 
-    try:
-        results_table = soup.find("table", {"id": "result_table"})
-        table_header_list = results_table.find("thead").findAll("th")
-        table_header_list = [x.text for x in table_header_list]
-        table_body = results_table.find("tbody")
-    except AttributeError:
-        raise TableNotFound("ajax_result_table")
+        try:
+            results_table = soup.find("table", {"id": "result_table"})
+            table_header_list = results_table.find("thead").findAll("th")
+            table_header_list = [x.text for x in table_header_list]
+            table_body = results_table.find("tbody")
+        except AttributeError:
+            raise TableNotFound("ajax_result_table")
 
-    matching_url = batter_vs_pitcher_base + batter_id + "&pitcher=" + pitcher_id + "&post=0"
-    try:
-        stat_row = table_body.find("a", {"href": matching_url}).parent.parent
-    except AttributeError:
-        raise TableRowNotFound(matching_url, "NULL", "ajax_result_table")
+        matching_url = batter_vs_pitcher_base + batter_id + "&pitcher=" + pitcher_id + "&post=0"
+        try:
+            stat_row = table_body.find("a", {"href": matching_url}).parent.parent
+        except AttributeError:
+            raise TableRowNotFound(matching_url, "NULL", "ajax_result_table")
 
-    # Create a dictionary of the stat attributes
-    stat_dict = dict()
-    stat_entries = stat_row.findAll("td")
-    # The names are now labeled as "th"
-    if len(stat_entries)+1 != len(table_header_list):
-        raise TableRowNotFound(matching_url, "NULL", "ajax_result_table")
-    for i in range(0, len(stat_entries)):
-        if stat_entries[i].text == "":
-            stat_dict[table_header_list[i+1]] = 0
-        else:
-            stat_dict[table_header_list[i+1]] = stat_entries[i].text.replace(u"\xa0", " ")
+        # Create a dictionary of the stat attributes
+        stat_dict = dict()
+        stat_entries = stat_row.findAll("td")
+        # The names are now labeled as "th"
+        if len(stat_entries)+1 != len(table_header_list):
+            raise TableRowNotFound(matching_url, "NULL", "ajax_result_table")
+        for i in range(0, len(stat_entries)):
+            if stat_entries[i].text == "":
+                stat_dict[table_header_list[i+1]] = 0
+            else:
+                stat_dict[table_header_list[i+1]] = stat_entries[i].text.replace(u"\xa0", " ")
 
-    return stat_dict
+        return stat_dict
 
 
 def get_all_table_row_dicts(soup: bs4.BeautifulSoup, table_name: str) -> (list, [dict]):
@@ -330,30 +427,31 @@ def get_all_table_row_dicts(soup: bs4.BeautifulSoup, table_name: str) -> (list,
     :return: list of dictionaries of all rows in a given table
     :rtype: [dict]
     """
-    results_table = soup.find("table", {"id": table_name})
-    if results_table is None:
-        raise TableNotFound(table_name)
-
-    table_header_list = results_table.find("thead").findAll("th")
-    table_header_list = [x.text for x in table_header_list]
-    stat_rows = results_table.findAll("tr")
+    with timed(PARSE_EVENT, table=table_name):
+        results_table = soup.find("table", {"id": table_name})
+        if results_table is None:
+            raise TableNotFound(table_name)
 
-    stat_dict_list = list()
-    for stat_row in stat_rows:
-        # Create a dictionary of the stat attributes
-        stat_dict = dict()
-        stat_entries = stat_row.findAll(["th", "td"])
-        # The dictionary does not have valid entries, move on to the next row
-        if len(stat_entries) != len(table_header_list):
-            continue
-        for i in range(1, len(stat_entries)):
-            if stat_entries[i].text == "" or stat_entries[i].name != "td":
-                stat_dict[table_header_list[i]] = 0
-            else:
-                stat_dict[table_header_list[i]] = stat_entries[i].text.replace(u"\xa0", " ")
-        stat_dict_list.append(stat_dict)
+        table_header_list = results_table.find("thead").findAll("th")
+        table_header_list = [x.text for x in table_header_list]
+        stat_rows = results_table.findAll("tr")
+
+        stat_dict_list = list()
+        for stat_row in stat_rows:
+            # Create a dictionary of the stat attributes
+            stat_dict = dict()
+            stat_entries = stat_row.findAll(["th", "td"])
+            # The dictionary does not have valid entries, move on to the next row
+            if len(stat_entries) != len(table_header_list):
+                continue
+            for i in range(1, len(stat_entries)):
+                if stat_entries[i].text == "" or stat_entries[i].name != "td":
+                    stat_dict[table_header_list[i]] = 0
+                else:
+                    stat_dict[table_header_list[i]] = stat_entries[i].text.replace(u"\xa0", " ")
+            stat_dict_list.append(stat_dict)
 
-    return table_header_list, stat_dict_list
+        return table_header_list, stat_dict_list
 
 
 def get_table_row_dict(soup, table_name, table_row_label, table_column_label):
@@ -388,80 +486,82 @@ def get_table_body_row_dict(soup, table_name, table_row_label, table_column_labe
     :param table_column_label: bare text label for the column of interest
     :return: a dictionary representing the stats
     """
-    results_table = soup.find("table", {"id": table_name})
-    if results_table is None:
-        raise TableNotFound(table_name)
-
-    try:
-        table_header_list = results_table.find("thead").findAll("th")
-    except AttributeError:
-        raise TableRowNotFound(table_row_label, table_column_label, table_name)
-    table_header_list = [x.text for x in table_header_list]
-    stat_rows = results_table.findAll("tr")
+    with timed(PARSE_EVENT, table=table_name):
+        results_table = soup.find("table", {"id": table_name})
+        if results_table is None:
+            raise TableNotFound(table_name)
 
-    for stat_row in stat_rows:
-        # Create a dictionary of the stat attributes
-        stat_dict = dict()
-        stat_entries = stat_row.findAll(["th", "td"])
-        # The dictionary does not have valid entries, move on to the next row
-        if len(stat_entries) != len(table_header_list):
-            continue
-        for i in range(0, len(stat_entries)):
-            if stat_entries[i].text == "":
-                stat_dict[table_header_list[i]] = 0
-            else:
-                stat_dict[table_header_list[i]] = stat_entries[i].text.replace(u"\xa0", " ")
         try:
-            if stat_dict[table_column_label] == table_row_label:
-                return stat_dict
-        except KeyError:
+            table_header_list = results_table.find("thead").findAll("th")
+        except AttributeError:
             raise TableRowNotFound(table_row_label, table_column_label, table_name)
+        table_header_list = [x.text for x in table_header_list]
+        stat_rows = results_table.findAll("tr")
+
+        for stat_row in stat_rows:
+            # Create a dictionary of the stat attributes
+            stat_dict = dict()
+            stat_entries = stat_row.findAll(["th", "td"])
+            # The dictionary does not have valid entries, move on to the next row
+            if len(stat_entries) != len(table_header_list):
+                continue
+            for i in range(0, len(stat_entries)):
+                if stat_entries[i].text == "":
+                    stat_dict[table_header_list[i]] = 0
+                else:
+                    stat_dict[table_header_list[i]] = stat_entries[i].text.replace(u"\xa0", " ")
+            try:
+                if stat_dict[table_column_label] == table_row_label:
+                    return stat_dict
+            except KeyError:
+                raise TableRowNotFound(table_row_label, table_column_label, table_name)
 
-    raise TableRowNotFound(table_row_label, table_column_label, table_name)
+        raise TableRowNotFound(table_row_label, table_column_label, table_name)
 
 
 def get_career_regular_season_hitting_soup(hitter_id: str) -> BeautifulSoup:
-    url = BASE_URL + "/players/" + hitter_id[0] + "/" + str(hitter_id) + ".shtml"
+    url = get_player_url(hitter_id)
     return get_soup_from_url(url)
 
 
 def get_career_postseason_hitting_soup(hitter_id: str) -> BeautifulSoup:
-    url = BASE_URL + "/players/" + hitter_id[0] + "/" + str(hitter_id) + ".shtml"
+    url = get_player_url(hitter_id)
     return get_comment_soup_from_url(url)
 
 
 def get_hitting_stats_table(soup: BeautifulSoup, table_id: str) -> dict:
-    results_table = soup.find("table", {"id": table_id})
-    if results_table is None:
-        raise TableNotFound(table_id)
+    with timed(PARSE_EVENT, table=table_id):
+        results_table = soup.find("table", {"id": table_id})
+        if results_table is None:
+            raise TableNotFound(table_id)
 
-    table_footer = results_table.find("tfoot")
-    if table_footer is None:
-        raise TableNotFound(table_id)
+        table_footer = results_table.find("tfoot")
+        if table_footer is None:
+            raise TableNotFound(table_id)
 
-    table_header = results_table.find("thead")
-    if table_header is None:
-        raise TableNotFound(table_id)
+        table_header = results_table.find("thead")
+        if table_header is None:
+            raise TableNotFound(table_id)
 
-    career_row_header = table_footer.find("th", {"data-stat": "player_stats_summary_explain"})
+        career_row_header = table_footer.find("th", {"data-stat": "player_stats_summary_explain"})
 
-    # If there is no data, then return zeros for all categories
-    if career_row_header is None:
-        return get_hitter_empty_stats()
+        # If there is no data, then return zeros for all categories
+        if career_row_header is None:
+            return get_hitter_empty_stats()
 
-    career_row = career_row_header.parent
-    column_span = int(career_row_header["colspan"])
-    stat_labels = [x.text for x in table_header.findAll("th")[column_span:-2]]
-    stat_values = [x.text for x in career_row.findAll("td")[:-2]]
+        career_row = career_row_header.parent
+        column_span = int(career_row_header["colspan"])
+        stat_labels = [x.text for x in table_header.findAll("th")[column_span:-2]]
+        stat_values = [x.text for x in career_row.findAll("td")[:-2]]
 
-    stat_dict = dict()
-    for idx in range(0, len(stat_labels)):
-        if stat_values[idx] == "":
-            stat_dict[stat_labels[idx]] = 0
-        else:
-            stat_dict[stat_labels[idx]] = stat_values[idx]
+        stat_dict = dict()
+        for idx in range(0, len(stat_labels)):
+            if stat_values[idx] == "":
+                stat_dict[stat_labels[idx]] = 0
+            else:
+                stat_dict[stat_labels[idx]] = stat_values[idx]
 
-    return stat_dict
+        return stat_dict
 
 
 def get_career_regular_season_hitting_stats(baseball_reference_id, soup=None):
@@ -484,8 +584,14 @@ def get_career_postseason_hitting_stats(hitter_id: str, soup=None):
 
 
 def get_career_hitting_stats(baseball_reference_id: str, soup: BeautifulSoup = None) -> dict:
-    reg_season_stat_dict = get_career_regular_season_hitting_stats(baseball_reference_id)
-    playoff_stat_dict = get_career_postseason_hitting_stats(baseball_reference_id)
+    """ Get the hitter's career regular season and postseason stats combined
+    :param baseball_reference_id: BaseballReference unique ID for this hitter
+    :param soup: BeautifulSoup object of the hitter's player page with the commented tables restored, e.g. from
+    get_uncommented_soup_from_url (default is to request the page twice, once per table)
+    :return: dictionary of the summed stats
+    """
+    reg_season_stat_dict = get_career_regular_season_hitting_stats(baseball_reference_id, soup)
+    playoff_stat_dict = get_career_postseason_hitting_stats(baseball_reference_id, soup)
 
     return {label: int(reg_season_stat_dict[label]) + int(playoff_stat_dict[label]) for label in HITTER_RELEVANT_STAT_KEYS}
 
@@ -498,7 +604,7 @@ def get_vs_hand_hitting_stats(baseball_reference_id, hand_value, soup=None):
     :return: dictionary representation of the hitter's stat home page
     """
     if soup is None:
-        url = BASE_URL + "/players/split.fcgi?id=" + str(baseball_reference_id) + "&year=Career&t=b"
+        url = get_split_url(baseball_reference_id)
         soup = get_comment_soup_from_url(url)
 
     if hand_value == "L":
@@ -519,7 +625,7 @@ def get_recent_hitting_stats(baseball_reference_id, soup=None):
     :return: dictionary representation of the hitter's stats
     """
     if soup is None:
-        url = BASE_URL + "/players/split.fcgi?id=" + str(baseball_reference_id) + "&year=Career&t=b"
+        url = get_split_url(baseball_reference_id)
         soup = get_comment_soup_from_url(url)
 
     return get_table_row_dict(soup, "total", "Last 7 days", "Split")
@@ -535,8 +641,7 @@ def get_season_hitting_stats(baseball_reference_id, year=None, soup=None):
     if year is None:
         year = date.today().year
     if soup is None:
-        url = BASE_URL + "/players/split.fcgi?id=" + str(baseball_reference_id) + "&year=" + str(year) + "&t=b"
-        print(url)
+        url = get_split_url(baseball_reference_id, year)
         soup = get_comment_soup_from_url(url)
 
     return get_table_body_row_dict(soup, "total", str(year) + " Totals", "Split")
@@ -550,20 +655,38 @@ def get_vs_pitcher_stats(batter_id, pitcher_id, soup=None):
     :return: dictionary representation of the hitter's stats
     """
     if soup is None:
-        url = "https://stathead.com/baseball/batter_vs_pitcher.cgi?batter=" + str(batter_id) + "&utm_medium=br&utm_source=player-finder-links&utm_campaign=baseball"
-        print(url)
+        url = get_vs_pitcher_url(batter_id)
         soup = get_soup_from_url(url)
 
     return get_vs_table_row_dict(soup, batter_id, pitcher_id)
 
 
+def get_lineup_vs_pitcher_stats(batter_ids: [str], pitcher_id: str, max_workers: int = 3) -> dict:
+    """ Get the stats of every hitter in a lineup against the given pitcher, fetching the hitters' vs. pitcher
+    pages concurrently
+    :param batter_ids: BaseballReference unique IDs for the hitters in the lineup
+    :param pitcher_id: BaseballReference unique ID for the pitcher of interest
+    :param max_workers: number of pages fetched at once
+    :return: dictionary of hitter ID to the hitter's stats (None if the hitter has never faced the pitcher)
+    """
+    unique_batter_ids = list(dict.fromkeys(batter_ids))
+
+    def fetch_batter(batter_id):
+        try:
+            return get_vs_pitcher_stats(batter_id, pitcher_id)
+        except (TableNotFound, TableRowNotFound):
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(unique_batter_ids, executor.map(fetch_batter, unique_batter_ids)))
+
+
 def get_hitter_page_career_soup(baseball_reference_id):
     """ Get the BeautifulSoup object for the hitter stat home page
     :param baseball_reference_id: BaseballReference unique ID for the hitter of interest
     :return: BeautifulSoup for the hitter stat home page
     """
-    return get_comment_soup_from_url(BASE_URL + "/players/split.fcgi?id=" +
-                                                 str(baseball_reference_id) + "&year=Career&t=b")
+    return get_comment_soup_from_url(get_split_url(baseball_reference_id))
 
 
 def get_career_pitching_stats(baseball_reference_id, soup=None):
@@ -573,7 +696,7 @@ def get_career_pitching_stats(baseball_reference_id, soup=None):
     :return: dictionary representation of the career stats
     """
     if soup is None:
-        url = BASE_URL + "/players/split.fcgi?id=" + str(baseball_reference_id) + "&year=Career&t=p"
+        url = get_split_url(baseball_reference_id, player_type="p")
         soup = get_comment_soup_from_url(url)
 
     return get_table_row_dict(soup, "total_extra", "Career Totals", "Split")
@@ -584,8 +707,7 @@ def get_pitcher_page_career_soup(baseball_reference_id):
     :param baseball_reference_id: BaseballReference ID of the pitcher of interest
     :return: BeautifulSoup object of the pitcher's stat home page
     """
-    url = BASE_URL + "/players/split.fcgi?id=" + str(baseball_reference_id) + "&year=Career&t=p"
-    print(url)
+    url = get_split_url(baseball_reference_id, player_type="p")
     return get_comment_soup_from_url(url)
 
 
@@ -599,8 +721,7 @@ def get_season_pitcher_stats(baseball_reference_id, year=None, soup=None):
     if year is None:
         year = date.today().year
     if soup is None:
-        url = BASE_URL + "/players/split.fcgi?id=" + str(baseball_reference_id) + "&year=" + str(year) + "&t=p"
-        print(url)
+        url = get_split_url(baseball_reference_id, year, "p")
         soup = get_comment_soup_from_url(url)
 
     return get_table_body_row_dict(soup, "total_extra", str(year) + " Totals", "Split")
@@ -613,13 +734,13 @@ def get_recent_pitcher_stats(baseball_reference_id, soup=None):
     :return: dictionary representation of the pitcher stats
     """
     if soup is None:
-        url = BASE_URL + "/players/split.fcgi?id=" + str(baseball_reference_id) + "&year=Career&t=p"
+        url = get_split_url(baseball_reference_id, player_type="p")
         soup = get_comment_soup_from_url(url)
 
     try:
         table_row_dict = get_table_row_dict(soup, "total_extra", "Last 14 days", "Split")
     except TableRowNotFound:
-        url = BASE_URL + "/players/split.fcgi?id=" + str(baseball_reference_id) + "&year=Career&t=p"
+        url = get_split_url(baseball_reference_id, player_type="p")
         table_row_dict = get_table_row_dict(get_comment_soup_from_url(url), "total_extra", "Last 14 days", "Split")
 
     return table_row_dict
@@ -635,8 +756,7 @@ def get_season_hitting_game_logs(baseball_reference_id: str, year: int) -> (dict
     :return: column header labels as well as all rows in the hitting game log table
     :rtype: (dict, [dict])
     """
-    url = BASE_URL + "/players/gl.fcgi?id=" + str(baseball_reference_id) + "&t=b&year=" + str(year)
-    soup = get_soup_from_url(url)
+    soup = get_soup_from_url(get_game_log_url(baseball_reference_id, year, "b"))
     return get_all_table_row_dicts(soup, "batting_gamelogs")
 
 
@@ -650,8 +770,7 @@ def get_hitting_game_log(baseball_reference_id, soup=None, game_date=None):
     if game_date is None:
         game_date = date.today()
     if soup is None:
-        url = BASE_URL + "/players/gl.fcgi?id=" + str(baseball_reference_id) + "&t=b&year=" + str(game_date.year)
-        soup = get_soup_from_url(url)
+        soup = get_soup_from_url(get_game_log_url(baseball_reference_id, game_date.year, "b"))
     try:
         return get_table_row_dict(soup, "batting_gamelogs", date_abbreviations[game_date.month] + " " +
                                   str(game_date.day), "Date")
@@ -664,8 +783,7 @@ def get_hitting_game_log(baseball_reference_id, soup=None, game_date=None):
 
 
 def get_season_pitching_game_logs(baseball_reference_id: str, year: int) -> (dict, [dict]):
-    url = BASE_URL + "/players/gl.fcgi?id=" + str(baseball_reference_id) + "&t=p&year=" + str(year)
-    soup = get_soup_from_url(url)
+    soup = get_soup_from_url(get_game_log_url(baseball_reference_id, year, "p"))
     return get_all_table_row_dicts(soup, "pitching_gamelogs")
 
 
@@ -679,8 +797,7 @@ def get_pitching_game_log(baseball_reference_id, soup=None, game_date=None):
     if game_date is None:
         game_date = date.today()
     if soup is None:
-        url = BASE_URL + "/players/gl.fcgi?id=" + str(baseball_reference_id) + "&t=p&year=" + str(game_date.year)
-        soup = get_soup_from_url(url)
+        soup = get_soup_from_url(get_game_log_url(baseball_reference_id, game_date.year, "p"))
     try:
         return get_table_row_dict(soup, "pitching_gamelogs", date_abbreviations[game_date.month] + " " +
                                   str(game_date.day), "Date")
@@ -692,6 +809,15 @@ def get_pitching_game_log(baseball_reference_id, soup=None, game_date=None):
         return None
 
 
+def innings_to_outs(innings_text) -> int:
+    """
+    :param innings_text: innings pitched, e.g. "6.2" for six innings and two outs
+    :return: number of outs recorded
+    """
+    innings, _, outs = str(innings_text).partition(".")
+    return int(innings or 0) * 3 + int(outs or 0)
+
+
 def get_team_info(team_name, year_of_interest=None, team_soup=None):
     """ Get the BaseballReference hitter/pitcher factors for the given team
     :param team_name: name of the team of interest
@@ -707,8 +833,7 @@ def get_team_info(team_name, year_of_interest=None, team_soup=None):
         year_of_interest = date.today().year
 
     if team_soup is None:
-        url = BASE_URL + "/teams/" + team_abbreviation + "/" + str(year_of_interest) + ".shtml"
-        team_soup = get_soup_from_url(url)
+        team_soup = get_soup_from_url(get_team_url(team_abbreviation, year_of_interest))
 
     try:
         sub_nodes = team_soup.find("a", {"href": url}).parent.parent.findAll("strong")
@@ -732,7 +857,7 @@ def get_team_info(team_name, year_of_interest=None, team_soup=None):
 
 
 def get_bats_throws(baseball_reference_id: str) -> PlayerHandInformation:
-    url = BASE_URL + "/players/" + baseball_reference_id[0] + "/" + baseball_reference_id + ".shtml"
+    url = get_player_url(baseball_reference_id)
     player_soup = get_soup_from_url(url)
     player_info = player_soup.find("div", {"id": "info"}).find("div", {"id": "meta"}).findAll("div")[-1]
     strong_entries = player_info.findAll("strong")
@@ -752,7 +877,7 @@ def get_bats_throws(baseball_reference_id: str) -> PlayerHandInformation:
 
 
 def get_ballpack_factors(team: str, year: int) -> BallparkFactors:
-    url = BASE_URL + "/teams/" + team + "/" + str(year) + ".shtml"
+    url = get_team_url(team, year)
     team_soup = get_soup_from_url(url)
     try:
         team_metadata = team_soup.find("div", {"data-template": "Partials/Teams/Summary"}).findAll("strong")
@@ -769,7 +894,7 @@ def get_ballpack_factors(team: str, year: int) -> BallparkFactors:
 
 
 def get_stathead_id(baseball_reference_id: str) -> str:
-    url = BASE_URL + "/players/" + baseball_reference_id[0] + "/" + baseball_reference_id + ".shtml"
+    url = get_player_url(baseball_reference_id)
     player_soup = get_soup_from_url(url)
     span_list = player_soup.find("div", {"id": "inner_nav"}).findAll("span")
     for span in span_list:
@@ -4,9 +4,29 @@ Module used for implementing some wrapper functions for BeautifulSoup
 """
 
 from bs4 import BeautifulSoup, Comment
+import os
 import requests
+from requests.adapters import HTTPAdapter
+import threading
+import time
 from datetime import date
 from time import sleep
+from telemetry import CACHE_LOOKUP_EVENT, PARSE_EVENT, RATE_LIMITED_EVENT, REQUEST_END_EVENT, \
+    REQUEST_START_EVENT, emit, has_telemetry_sinks, timed
+
+# Number of HTTP requests made by this process, used to report request throughput
+_request_count = 0
+_request_count_lock = threading.Lock()
+
+# Connections kept open per host by the shared session, sized for the threads that mine a slate at once
+SESSION_POOL_SIZE = 16
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+# PageCache shared by the threads of this process, None when responses are not cached
+_page_cache = None
 
 
 class Http404Exception(Exception):
@@ -33,6 +53,132 @@ class Http522Exception(Exception):
         super(Http522Exception, self).__init__("Could not establish TCP connection for URL %s" % url)
 
 
+class RetriesExhausted(Exception):
+
+    def __init__(self, url):
+        super(RetriesExhausted, self).__init__("Exhausted all attempts to request URL %s" % url)
+
+
+# Errors of a page that could not be fetched, which a later request may not run into
+FETCH_EXCEPTIONS = (RetriesExhausted, Http429Exception, Http522Exception, HttpGeneralException)
+
+
+class PageCache(object):
+    """
+    Successful responses of this process keyed by URL. Threads asking for a page that is already being requested
+    wait for that request instead of sending their own, so games sharing a player or a park share the response.
+    """
+
+    def __init__(self):
+        self._responses = dict()
+        self._url_locks = dict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._responses)
+
+    def get_response(self, url, send_request):
+        """
+        :param url: the absolute URL string
+        :param send_request: function of the URL that requests the page when it is not cached
+        :return: the requests Response object
+        """
+        with self._lock:
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+
+        with url_lock:
+            with self._lock:
+                response = self._responses.get(url)
+                if response is not None:
+                    self.hits += 1
+                    emit(CACHE_LOOKUP_EVENT, cache="page", hit=True, url=url)
+                    return response
+                self.misses += 1
+            emit(CACHE_LOOKUP_EVENT, cache="page", hit=False, url=url)
+
+            response = send_request(url)
+            if response.status_code == 200:
+                with self._lock:
+                    self._responses[url] = response
+
+        return response
+
+
+def get_session():
+    """ Get the session of this process. A new session is created after a fork so that worker processes do not
+    share the connections of their parent.
+    :return: the requests Session object
+    """
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=SESSION_POOL_SIZE, pool_maxsize=SESSION_POOL_SIZE)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+            _session_pid = os.getpid()
+        return _session
+
+
+def set_page_cache(page_cache):
+    """ Cache the responses of this process, e.g. for the length of a slate
+    :param page_cache: PageCache shared by every thread, None to stop caching
+    :return: the previous PageCache (or None)
+    """
+    global _page_cache
+    previous_page_cache = _page_cache
+    _page_cache = page_cache
+    return previous_page_cache
+
+
+def send_request(url):
+    global _request_count
+    with _request_count_lock:
+        _request_count += 1
+    emit(REQUEST_START_EVENT, url=url)
+    start_time = time.perf_counter()
+    try:
+        response = get_session().get(url)
+    except Exception as e:
+        emit(REQUEST_END_EVENT, url=url, status_code=None, bytes=0, seconds=time.perf_counter() - start_time,
+             error=type(e).__name__)
+        raise
+    emit(REQUEST_END_EVENT, url=url, status_code=response.status_code, bytes=len(response.content),
+         seconds=time.perf_counter() - start_time)
+    return response
+
+
+def request_url(url):
+    """ Send a GET request to the URL through the shared session, counting it towards get_request_count. The
+    response comes from the page cache when one is set and already holds the page.
+    :param url: the absolute URL string
+    :return: the requests Response object
+    """
+    page_cache = _page_cache
+    if page_cache is None:
+        return send_request(url)
+    return page_cache.get_response(url, send_request)
+
+
+def get_request_count():
+    """
+    :return: number of HTTP requests made by this process so far
+    """
+    return _request_count
+
+
+def report_rate_limit(url):
+    """ Emit a rate-limited event, or print a warning when the events of this process go nowhere
+    :param url: URL of the rate-limited request
+    """
+    if has_telemetry_sinks():
+        emit(RATE_LIMITED_EVENT, url=url)
+    else:
+        print("Rate limit reached for %s" % url)
+
+
 def str_to_date(date_string):
     """ Convert a PitchFx date string to a Date object
     :param date_string: a PitchFx date string
@@ -49,24 +195,40 @@ def url_to_comment_soup(url):
     :return: the BeautifulSoup object containing the comments, return None if the object was not
     successfully created
     """
-    response = requests.get(url)
+    response = request_url(url)
 
     if response.status_code == 404:
         print("Attempt to access invalid URL: " + response.url)
         raise Http404Exception(url)
     elif response.status_code == 429:
-        print("Rate limit reached!")
+        report_rate_limit(url)
         raise Http429Exception(url)
     elif response.status_code != 200:
         raise HttpGeneralException(response.status_code, url)
 
-    soup_initial = BeautifulSoup(response.text, "lxml")
-    soup_comments = soup_initial.findAll(text=lambda text: isinstance(text, Comment))
-    soup = str()
-    for soup_comment in soup_comments:
-        soup += soup_comment
+    with timed(PARSE_EVENT, table="page", url=url):
+        soup_initial = BeautifulSoup(response.text, "lxml")
+        soup_comments = soup_initial.findAll(text=lambda text: isinstance(text, Comment))
+        soup = str()
+        for soup_comment in soup_comments:
+            soup += soup_comment
 
-    return BeautifulSoup(soup, "lxml")
+        return BeautifulSoup(soup, "lxml")
+
+
+def html_to_uncommented_soup(html):
+    """ Sports Reference pages ship their secondary tables inside HTML comments, so parse the page and
+    replace each of those comments with the markup it contains
+    :param html: HTML string of the page
+    :return: the BeautifulSoup object of the page with the commented tables restored in place
+    """
+    with timed(PARSE_EVENT, table="page"):
+        soup = BeautifulSoup(html, "lxml")
+        for comment in soup.findAll(text=lambda text: isinstance(text, Comment)):
+            if "<table" in comment:
+                comment.replace_with(BeautifulSoup(comment, "html.parser"))
+
+    return soup
 
 
 def url_to_soup(url):
@@ -74,13 +236,13 @@ def url_to_soup(url):
     :param url: the absolute URL string
     :return the BeautifulSoup object returned, return None if the object was not successfully created
     """
-    response = requests.get(url)
+    response = request_url(url)
 
     if response.status_code == 404:
         print("Attempt to access invalid URL: " + response.url)
         raise Http404Exception(url)
     elif response.status_code == 429:
-        print("Rate limit reached!")
+        report_rate_limit(url)
         raise Http429Exception(url)
     elif response.status_code == 522:
         print("Could not establish TCP comms")
@@ -88,7 +250,59 @@ def url_to_soup(url):
     elif response.status_code != 200:
         raise HttpGeneralException(response.status_code, url)
 
-    return BeautifulSoup(response.text, "lxml")
+    with timed(PARSE_EVENT, table="page", url=url):
+        return BeautifulSoup(response.text, "lxml")
+
+
+def url_to_content(url):
+    """ Take a URL and get the raw bytes of the response, e.g. for XML that is parsed without BeautifulSoup
+    :param url: the absolute URL string
+    :return: the bytes of the response body
+    """
+    response = request_url(url)
+
+    if response.status_code == 404:
+        print("Attempt to access invalid URL: " + response.url)
+        raise Http404Exception(url)
+    elif response.status_code == 429:
+        report_rate_limit(url)
+        raise Http429Exception(url)
+    elif response.status_code == 522:
+        print("Could not establish TCP comms")
+        raise Http522Exception(url)
+    elif response.status_code != 200:
+        raise HttpGeneralException(response.status_code, url)
+
+    return response.content
+
+
+def get_content_from_url(url):
+    for i in range(5):
+        try:
+            content = url_to_content(url)
+        except IOError:
+            print("Socket error. Trying to obtain content again.")
+            continue
+        except Http404Exception:
+            return None
+
+        return content
+
+    print("Exhausted all attempts to get the content. Check your internet connection.")
+    raise RetriesExhausted(url)
+
+
+def get_uncommented_soup_from_url(url):
+    """ Get the soup of a page with its commented tables restored, so one request serves both the visible and
+    the commented tables
+    :param url: the absolute URL string
+    :return: the BeautifulSoup object, None if the page does not exist
+    """
+    content = get_content_from_url(url)
+    if content is None:
+        return None
+
+    return html_to_uncommented_soup(content)
 
 
 def get_soup_from_url(url):
@@ -104,7 +318,7 @@ def get_soup_from_url(url):
         return soup
 
     print("Exhausted all attempts to get the soup. Check your internet connection.")
-    assert 0
+    raise RetriesExhausted(url)
 
 
 def get_comment_soup_from_url(url):
@@ -120,5 +334,5 @@ def get_comment_soup_from_url(url):
         return soup
 
     print("Exhausted all attempts to get the soup. Check your internet connection.")
-    assert 0
+    raise RetriesExhausted(url)
 
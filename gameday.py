@@ -1,214 +1,680 @@
 
 from beautiful_soup_helper import *
-from datetime import timedelta
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from lxml import etree
+from urllib.parse import urlparse
+import io
+import json
+import os
+import threading
 import time
 
+import numpy as np
+import pandas as pd
+
 BASE_URL = 'http://gd2.mlb.com/components/game/mlb/'
 
+# Pitch type abbreviation and the premium XML file holding its season stats
+PITCH_TYPE_FILES = [('ch', 'pch.xml'),  # Changeup
+                    ('cu', 'pcu.xml'),  # Curveball
+                    ('fa', 'pfa.xml'),  # Fastball
+                    ('fc', 'pfc.xml'),  # Cutter
+                    ('ff', 'pff.xml'),  # Four-seam fastball
+                    ('fs', 'pfs.xml'),  # Splitter
+                    ('ft', 'pft.xml'),  # Two-seam fastball
+                    ('kn', 'pkn.xml'),  # Knuckleball
+                    ('si', 'psi.xml'),  # Sinker
+                    ('sl', 'psl.xml')]  # Slider
+
+HITTER_PLAYER_TYPE = 'batters'
+PITCHER_PLAYER_TYPE = 'pitchers'
+
+# Number of days searched backward for a player's most recent game
+PREVIOUS_GAME_SEARCH_DAYS = 25
+
+# Number of seconds the current day's directory listings are reused before being requested again
+CURRENT_DAY_LISTING_TTL = 300
+
+# Number of games mined at once by mine_games
+GAME_WORKERS = 8
+
+# Number of pitch type files requested at once by mine_games, shared by all of its games
+PITCH_FILE_WORKERS = 16
+
+# Errors of a game whose files are missing or malformed, which mining the game again would not fix
+GAME_FILE_EXCEPTIONS = (etree.XMLSyntaxError, AttributeError, TypeError, KeyError, IndexError, ValueError)
+
+# Number of pitcher tendency files requested at once by get_date_pitcher_tendencies
+PITCHER_TENDENCY_WORKERS = 16
+
+# Columns identifying a row of the table returned by get_date_pitcher_tendencies
+PITCHER_TENDENCY_KEY_COLUMNS = ['pitcher_id', 'game_id', 'pitch_type']
+
+# Maximum number of requests in flight to a single host
+MAX_REQUESTS_PER_HOST = 10
+_host_semaphores = dict()
+_host_semaphores_lock = threading.Lock()
+
+# lxml parsers serialize concurrent use, so every thread gets its own
+_xml_parsers = threading.local()
+
+# Child tag of a player file and the PregameStats attribute it is stored in
+PREGAME_STAT_TAGS = [('season', 'season_stats_dict'),
+                     ('career', 'career_stats_dict'),
+                     ('month', 'month_stats_dict'),
+                     ('team', 'team_stats_dict'),
+                     ('empty', 'bases_empty_stats_dict'),
+                     ('men_on', 'men_on_stats_dict'),
+                     ('risp', 'risp_stats_dict'),
+                     ('loaded', 'bases_loaded_stats_dict'),
+                     ('vs_lhp', 'vs_lhp_stats_dict'),
+                     ('vs_rhp', 'vs_rhp_stats_dict')]
+
 
 def int_to_two_digits(int_value):
     return "%02d" % (int_value,)
 
 
+def get_day_path(game_date):
+    """
+    :return: path of the Gameday day directory of the given date, relative to the root of a GamedaySource
+    """
+    return 'year_' + str(game_date.year) + '/' + 'month_' + int_to_two_digits(game_date.month) + '/' + 'day_' + \
+        int_to_two_digits(game_date.day)
+
+
+def get_game_path(game_info):
+    """
+    :return: path of the Gameday directory of the given game, relative to the root of a GamedaySource
+    """
+    return get_day_path(game_info.game_date) + '/' + game_info.game_id
+
+
+class GamesNotMinedException(Exception):
+    """
+    Raised by mine_games when the files of some games could not be fetched, e.g. after a rate limit or server error
+    """
+
+    def __init__(self, game_date, failed_games):
+        """
+        :param game_date: date of the games
+        :param failed_games: dictionary of the Gameday game IDs that failed to their error
+        """
+        super(GamesNotMinedException, self).__init__(game_date, failed_games)
+        self.game_date = game_date
+        self.failed_games = failed_games
+
+    def __str__(self):
+        return "Failed to mine %i games of %s: %s" % (len(self.failed_games), self.game_date,
+                                                      ", ".join(sorted(self.failed_games)))
+
+
+class HttpGamedaySource(object):
+    """
+    Gameday files served over HTTP, either by the live host or by a local stand-in serving a mirror (see
+    gameday_mirror.start_mirror_server)
+    """
+
+    def __init__(self, base_url=BASE_URL):
+        """
+        :param base_url: URL of the root of the Gameday tree (default is the live host)
+        """
+        if not base_url.endswith('/'):
+            base_url += '/'
+        self.base_url = base_url
+
+    def get_content(self, path):
+        """
+        :param path: path of a file relative to the root of the tree
+        :return: bytes of the file, None if it does not exist
+        """
+        return get_limited_content_from_url(self.base_url + path)
+
+    def list_directory(self, path):
+        """
+        :param path: path of a directory relative to the root of the tree
+        :return: names of the entries of the directory, empty if it does not exist
+        """
+        soup = get_limited_soup_from_url(self.base_url + path + '/')
+        if soup is None:
+            return list()
+        return [link.text.strip().strip('/') for link in soup.select('a[href]')]
+
+
+class LocalGamedaySource(object):
+    """
+    Gameday files read from a local mirror of the tree, e.g. one written by gameday_mirror.mirror_dates
+    """
+
+    def __init__(self, root_dir):
+        """
+        :param root_dir: directory holding the year_yyyy directories
+        """
+        self.root_dir = root_dir
+
+    def get_content(self, path):
+        file_path = os.path.join(self.root_dir, *path.split('/'))
+        if not os.path.isfile(file_path):
+            return None
+        with open(file_path, 'rb') as gameday_file:
+            return gameday_file.read()
+
+    def list_directory(self, path):
+        dir_path = os.path.join(self.root_dir, *path.split('/'))
+        if not os.path.isdir(dir_path):
+            return list()
+        return sorted(os.listdir(dir_path))
+
+
+GAMEDAY_SOURCE = HttpGamedaySource()
+
+
+def set_gameday_source(source):
+    """
+    Change where every Gameday file is read from
+    :param source: HttpGamedaySource or LocalGamedaySource
+    """
+    global GAMEDAY_SOURCE
+    GAMEDAY_SOURCE = source
+
+
 class GameInfo(object):
     def __init__(self, game_date, game_id):
         self.game_date = game_date
         self.game_id = game_id
 
 
+class DayListingCache(object):
+    """
+    Memoized listings of the gameday day directories (game IDs) and game directories (batter and pitcher files).
+    Listings requested after their date ended never change, so they are kept for good and persisted to cache_dir
+    when it is given. Listings requested during their date are requested again once they are older than the TTL,
+    and once more after the date has ended.
+    """
+
+    def __init__(self, cache_dir=None, ttl=CURRENT_DAY_LISTING_TTL):
+        """
+        :param cache_dir: directory the past dates' listings are saved in (default is to only keep them in memory)
+        :param ttl: number of seconds the current day's listings are reused
+        """
+        self._cache_dir = cache_dir
+        self._ttl = ttl
+        self._listings = dict()
+        self._lock = threading.Lock()
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _get_cache_path(self, game_date):
+        return os.path.join(self._cache_dir, game_date.isoformat() + '.json')
+
+    def _load_date(self, game_date):
+        """
+        Get the listings of a date, reading them from disk the first time the date is used
+        """
+        day_listings = self._listings.get(game_date)
+        if day_listings is None:
+            day_listings = dict()
+            if self._cache_dir is not None and os.path.exists(self._get_cache_path(game_date)):
+                with open(self._get_cache_path(game_date)) as cache_file:
+                    day_listings = {name: (listing, None) for name, listing in json.load(cache_file).items()}
+            self._listings[game_date] = day_listings
+
+        return day_listings
+
+    def _save_date(self, game_date, day_listings):
+        temporary_path = self._get_cache_path(game_date) + '.tmp'
+        with open(temporary_path, 'w') as cache_file:
+            json.dump({name: listing for name, (listing, fetch_time) in day_listings.items() if fetch_time is None},
+                      cache_file)
+        os.replace(temporary_path, self._get_cache_path(game_date))
+
+    def get_listing(self, game_date, listing_name, fetch_listing):
+        """
+        Get a directory listing, only requesting it if it is not cached or has expired
+        :param game_date: date the directory belongs to
+        :param listing_name: name of the directory within the date (e.g. 'games' or '<game ID>/batters')
+        :param fetch_listing: function requesting the listing, returning a list of strings
+        :return: list of strings in the listing
+        """
+        is_past_date = game_date < date.today()
+        with self._lock:
+            day_listings = self._load_date(game_date)
+            if listing_name in day_listings:
+                listing, fetch_time = day_listings[listing_name]
+                # Listings without a fetch time were requested after their date ended and are final
+                if fetch_time is None or (not is_past_date and time.monotonic() - fetch_time < self._ttl):
+                    return list(listing)
+
+        listing = fetch_listing()
+
+        with self._lock:
+            day_listings = self._load_date(game_date)
+            day_listings[listing_name] = (listing, None if is_past_date else time.monotonic())
+            if is_past_date and self._cache_dir is not None:
+                self._save_date(game_date, day_listings)
+
+        return list(listing)
+
+    def clear(self):
+        with self._lock:
+            self._listings = dict()
+
+
+DAY_LISTING_CACHE = DayListingCache()
+
+
 def get_game_ids(game_date):
     """
-    Get a list of game IDs from the input soup
-    :param soup: BeautifulSoup object
+    Get the games played on the given date
+    :param game_date: date of interest
+    :return: list of GameInfo objects
+    """
+    game_ids = DAY_LISTING_CACHE.get_listing(game_date, 'games', lambda: fetch_game_ids(game_date))
+    return [GameInfo(game_id=game_id, game_date=game_date) for game_id in game_ids]
+
+
+def fetch_game_ids(game_date):
+    """
+    Request the game ID strings from the day directory of the given date
+    :param game_date: date of interest
     :return: list of game ID strings
     """
-    url = BASE_URL + 'year_' + str(game_date.year) + '/' + 'month_' + int_to_two_digits(
-        game_date.month) + '/' + 'day_' + \
-          int_to_two_digits(game_date.day)
-    # Get all the game IDs from the soup and find the matching team
-    soup = get_soup_from_url(url)
-    game_ids = soup.select("a[href*=gid]")
-    return [GameInfo(game_id=game_id.text.strip().replace('/', ''), game_date=game_date) for game_id in game_ids]
+    # Days without any games do not have a directory, which is listed as empty
+    return [name for name in GAMEDAY_SOURCE.list_directory(get_day_path(game_date)) if name.startswith('gid_')]
 
 
-def get_previous_hitter_pitch_stats(player_id, team_abbrev, game_date):
+class PlayerGameIndex(object):
     """
-    Search backward from the given game date to find the hitter pitch tendencies by out
+    Index of the games each player appeared in, built from the day directories listed by get_game_ids and the
+    batters/pitchers directories of each game. Once a date is indexed, a player's most recent game before any
+    date is a single lookup instead of a day-by-day search.
+    """
+
+    def __init__(self):
+        self._indexed_game_ids = set()
+        self._player_games = {HITTER_PLAYER_TYPE: dict(), PITCHER_PLAYER_TYPE: dict()}
+        self._lock = threading.Lock()
+
+    def index_date(self, game_date, team_abbrev=None):
+        """
+        Add the players of the games on the given date to the index
+        :param game_date: date of interest
+        :param team_abbrev: Gameday team abbreviation to restrict the indexed games to (default is all games)
+        """
+        for game_info in get_game_ids(game_date):
+            if team_abbrev is not None and team_abbrev not in game_info.game_id:
+                continue
+            with self._lock:
+                if game_info.game_id in self._indexed_game_ids:
+                    continue
+            hitter_ids = [file_name.split('.')[0] for file_name in get_hitter_ids(game_info)]
+            pitcher_ids = [file_name.split('.')[0] for file_name in get_pitcher_ids(game_info)]
+            with self._lock:
+                # Another thread may have indexed the game while its directories were being listed
+                if game_info.game_id in self._indexed_game_ids:
+                    continue
+                for player_type, player_ids in [(HITTER_PLAYER_TYPE, hitter_ids), (PITCHER_PLAYER_TYPE, pitcher_ids)]:
+                    for player_id in player_ids:
+                        self._player_games[player_type].setdefault(player_id, list()).append(game_info)
+                self._indexed_game_ids.add(game_info.game_id)
+
+    def get_previous_games(self, player_id, player_type, game_date, team_abbrev=None,
+                           max_days=PREVIOUS_GAME_SEARCH_DAYS):
+        """
+        Get the games the player appeared in during the days before the given date, most recent first
+        :param player_id: Gameday player ID
+        :param player_type: HITTER_PLAYER_TYPE or PITCHER_PLAYER_TYPE
+        :param game_date: date of interest (games on this date are not included)
+        :param team_abbrev: Gameday team abbreviation of the player, used to limit the games that are indexed
+        :param max_days: number of days before the given date to search
+        :return: list of GameInfo objects
+        """
+        earliest_date = game_date - timedelta(days=max_days - 1)
+        for day_offset in range(1, max_days):
+            self.index_date(game_date - timedelta(days=day_offset), team_abbrev)
+
+        with self._lock:
+            player_games = list(self._player_games[player_type].get(player_id, list()))
+
+        previous_games = [game_info for game_info in player_games if earliest_date <= game_info.game_date < game_date]
+        previous_games.sort(key=lambda game_info: (game_info.game_date, game_info.game_id), reverse=True)
+        return previous_games
+
+
+PLAYER_GAME_INDEX = PlayerGameIndex()
+
+
+def get_previous_hitter_pitch_stats(player_id, team_abbrev, game_date, player_game_index=None):
+    """
+    Find the hitter pitch tendencies by out from the most recent game before the given game date
     :param player_id: Gameday player ID of hitter of interest
     :param team_abbrev: Gameday team abbreviation
     :param game_date: game date
-    :return: dictionary of the season hitter tendencies represented by outs recorded
-    """
-    current_time_delta = timedelta(days=1)
-    while current_time_delta.days < 25:
-        current_game_date = game_date - current_time_delta
-        hitter_stats = get_season_hitter_pitch_stats(player_id, team_abbrev, current_game_date)
-        if hitter_stats is None:
-            current_time_delta += timedelta(days=1)
-        else:
+    :param player_game_index: PlayerGameIndex used to find the previous games (default is PLAYER_GAME_INDEX)
+    :return: PitchStats of the season hitter tendencies represented by outs recorded
+    """
+    if player_game_index is None:
+        player_game_index = PLAYER_GAME_INDEX
+
+    for game_info in player_game_index.get_previous_games(player_id, HITTER_PLAYER_TYPE, game_date, team_abbrev):
+        hitter_stats = get_season_hitter_pitch_stats(player_id, game_info)
+        if hitter_stats is not None:
             return hitter_stats
 
     return None
 
 
-def get_previous_pitcher_pitch_stats(player_id, team_abbrev, game_date):
+def get_previous_pitcher_pitch_stats(player_id, team_abbrev, game_date, player_game_index=None):
     """
-    Search backward from the given game date to find the pitcher pitch tendencies by out
+    Find the pitcher pitch tendencies by out from the most recent game before the given game date
     :param player_id: Gameday player ID of pitcher of interest
     :param team_abbrev: Gameday team abbreviation
     :param game_date: game date
-    :return: dictionary of the season pitcher tendencies represented by outs recorded
-    """
-    current_time_delta = timedelta(days=1)
-    while current_time_delta.days < 25:
-        current_game_date = game_date - current_time_delta
-        pitcher_stats = get_season_pitcher_pitch_stats(player_id, team_abbrev, current_game_date)
-        if pitcher_stats is None:
-            current_time_delta += timedelta(days=1)
-        else:
+    :param player_game_index: PlayerGameIndex used to find the previous games (default is PLAYER_GAME_INDEX)
+    :return: PitchStats of the season pitcher tendencies represented by outs recorded
+    """
+    if player_game_index is None:
+        player_game_index = PLAYER_GAME_INDEX
+
+    for game_info in player_game_index.get_previous_games(player_id, PITCHER_PLAYER_TYPE, game_date, team_abbrev):
+        pitcher_stats = get_season_pitcher_pitch_stats(player_id, game_info)
+        if pitcher_stats is not None:
             return pitcher_stats
 
     return None
 
 
-def get_season_hitter_pitch_stats(player_id, game_info):
+def get_season_hitter_pitch_stats(player_id, game_info, executor=None):
     """
-    Get a dictionary of the season hitter tendencies represented by outs recorded
+    Get the season hitter tendencies represented by outs recorded for each pitch type
     :param player_id: Gameday player ID of hitter of interest
-    :param team_abbrev: Gameday team abbreviation
-    :param game_date: game date
-    :return: dictionary of the season hitter tendencies represented by outs recorded
+    :param game_info: GameInfo of a game the hitter played in
+    :param executor: executor the pitch type files are fetched with (default is one after the other)
+    :return: PitchStats of the season hitter tendencies, None if no pitch type is available
     """
+    return get_season_pitch_stats(get_game_path(game_info) + '/premium/batters/' + player_id + '/', executor)
 
-    try:
-        url = BASE_URL + 'year_' + str(game_info.game_date.year) + '/' + 'month_' + int_to_two_digits(game_info.game_date.month) + '/' + 'day_' + \
-              int_to_two_digits(game_info.game_date.day)
-
-        # Get the batters URL
-        season_dict = dict()
-        batters_url = url + '/' + game_info.game_id + '/premium/batters/' + player_id + '/'
-        # Changeups
-        soup = get_soup_from_url(batters_url + 'pch.xml')
-        season_dict['ch'] = soup.find('std').find('sit').attrs
-        # Curveball
-        soup = get_soup_from_url(batters_url + 'pcu.xml')
-        season_dict['cu'] = soup.find('std').find('sit').attrs
-        #
-        soup = get_soup_from_url(batters_url + 'pfa.xml')
-        season_dict['fa'] = soup.find('std').find('sit').attrs
-        # Cutter
-        soup = get_soup_from_url(batters_url + 'pfc.xml')
-        season_dict['fc'] = soup.find('std').find('sit').attrs
-        # Four-seam fastball
-        soup = get_soup_from_url(batters_url + 'pff.xml')
-        season_dict['ff'] = soup.find('std').find('sit').attrs
-        #
-        soup = get_soup_from_url(batters_url + 'pfs.xml')
-        season_dict['fs'] = soup.find('std').find('sit').attrs
-        # Two-seam fastball?
-        soup = get_soup_from_url(batters_url + 'pft.xml')
-        season_dict['ft'] = soup.find('std').find('sit').attrs
-        # Knuckleball
-        soup = get_soup_from_url(batters_url + 'pkn.xml')
-        season_dict['kn'] = soup.find('std').find('sit').attrs
-        # Sinker
-        soup = get_soup_from_url(batters_url + 'psi.xml')
-        season_dict['si'] = soup.find('std').find('sit').attrs
-        # Slider
-        soup = get_soup_from_url(batters_url + 'psl.xml')
-        season_dict['sl'] = soup.find('std').find('sit').attrs
-
-        return season_dict
-    except (AttributeError, KeyError):
+
+def get_season_pitcher_pitch_stats(player_id, game_info, executor=None):
+    """
+    Get the season pitcher tendencies represented by outs recorded for each pitch type
+    :param player_id: Gameday player ID of pitcher of interest
+    :param game_info: GameInfo of a game the pitcher played in
+    :param executor: executor the pitch type files are fetched with (default is one after the other)
+    :return: PitchStats of the season pitcher tendencies, None if no pitch type is available
+    """
+    return get_season_pitch_stats(get_game_path(game_info) + '/premium/pitchers/' + player_id + '/', executor)
+
+
+def get_season_pitch_stats(player_path, executor=None):
+    """
+    Fetch the season stats of every pitch type for a player
+    :param player_path: path of the player's premium directory, with a trailing slash
+    :param executor: executor the pitch type files are fetched with, shared by every player of the caller so the
+    number of requests in flight stays bounded (default is one after the other)
+    :return: PitchStats with the stats of each available pitch type, None if no pitch type is available
+    """
+    paths = [player_path + file_name for _, file_name in PITCH_TYPE_FILES]
+    if executor is None:
+        pitch_type_stats = map(get_pitch_type_stats, paths)
+    else:
+        pitch_type_stats = executor.map(get_pitch_type_stats, paths)
+
+    pitch_stats = PitchStats()
+    for (pitch_type, _), stats in zip(PITCH_TYPE_FILES, pitch_type_stats):
+        pitch_stats.is_available[pitch_type] = stats is not None
+        if stats is not None:
+            pitch_stats.pitch_dict[pitch_type] = stats
+
+    if len(pitch_stats.pitch_dict) == 0:
         return None
 
+    return pitch_stats
 
-def get_season_pitcher_pitch_stats(player_id, game_info):
+
+def get_pitch_type_stats(path):
     """
-    Get a dictionary of the season pitcher tendencies represented by outs recorded
-    :param player_id: Gameday player ID of pitcher of interest
-    :param team_abbrev: Gameday team abbreviation
-    :param game_info: game date
-    :return: dictionary of the season pitcher tendencies represented by outs recorded
+    :param path: path of a single pitch type XML file
+    :return: StatSplit of the season stats for the pitch type, None if the file is missing or malformed
     """
-    try:
-        url = BASE_URL + 'year_' + str(game_info.game_date.year) + '/' + 'month_' + int_to_two_digits(game_info.game_date.month) + '/' + 'day_' + \
-              int_to_two_digits(game_info.game_date.day)
-
-        # Get the batters URL
-        season_dict = dict()
-        pitchers_url = url + '/' + game_info.game_id + 'premium/pitchers/' + player_id + '/'
-        # Changeups
-        soup = get_soup_from_url(pitchers_url + 'pch.xml')
-        season_dict['ch'] = soup.find('std').find('sit').attrs
-        # Curveball
-        soup = get_soup_from_url(pitchers_url + 'pcu.xml')
-        season_dict['cu'] = soup.find('std').find('sit').attrs
-        #
-        soup = get_soup_from_url(pitchers_url + 'pfa.xml')
-        season_dict['fa'] = soup.find('std').find('sit').attrs
-        # Cutter
-        soup = get_soup_from_url(pitchers_url + 'pfc.xml')
-        season_dict['fc'] = soup.find('std').find('sit').attrs
-        # Four-seam fastball
-        soup = get_soup_from_url(pitchers_url + 'pff.xml')
-        season_dict['ff'] = soup.find('std').find('sit').attrs
-        #
-        soup = get_soup_from_url(pitchers_url + 'pfs.xml')
-        season_dict['fs'] = soup.find('std').find('sit').attrs
-        # Two-seam fastball?
-        soup = get_soup_from_url(pitchers_url + 'pft.xml')
-        season_dict['ft'] = soup.find('std').find('sit').attrs
-        # Knuckleball
-        soup = get_soup_from_url(pitchers_url + 'pkn.xml')
-        season_dict['kn'] = soup.find('std').find('sit').attrs
-        # Sinker
-        soup = get_soup_from_url(pitchers_url + 'psi.xml')
-        season_dict['si'] = soup.find('std').find('sit').attrs
-        # Slider
-        soup = get_soup_from_url(pitchers_url + 'psl.xml')
-        season_dict['sl'] = soup.find('std').find('sit').attrs
-
-        return season_dict
-    except (KeyError, AttributeError):
+    sit_xml = find_xml_element(find_xml_element(parse_xml(GAMEDAY_SOURCE.get_content(path)), 'std'), 'sit')
+    if sit_xml is None:
+        return None
+
+    return StatSplit.from_attrs(get_xml_attrs(sit_xml))
+
+
+def get_host_semaphore(url):
+    host = urlparse(url).netloc
+    with _host_semaphores_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(MAX_REQUESTS_PER_HOST)
+        return _host_semaphores[host]
+
+
+def get_limited_soup_from_url(url):
+    """
+    Get the soup from the URL without exceeding MAX_REQUESTS_PER_HOST concurrent requests to its host
+    """
+    with get_host_semaphore(url):
+        return get_soup_from_url(url)
+
+
+def get_limited_content_from_url(url):
+    """
+    Get the raw content of the URL without exceeding MAX_REQUESTS_PER_HOST concurrent requests to its host
+    """
+    with get_host_semaphore(url):
+        return get_content_from_url(url)
+
+
+def get_xml_parser():
+    parser = getattr(_xml_parsers, 'parser', None)
+    if parser is None:
+        parser = etree.XMLParser(recover=True, remove_comments=True)
+        _xml_parsers.parser = parser
+    return parser
+
+
+def parse_xml(content):
+    """
+    Parse a Gameday XML file with lxml.etree rather than building a BeautifulSoup tree
+    :param content: bytes of the XML file
+    :return: root element of the file, None if there is no content or nothing could be recovered
+    """
+    if not content:
         return None
 
+    return etree.fromstring(content, get_xml_parser())
+
+
+def iter_xml_elements(element, tag):
+    """
+    Iterate over the elements at or below the element whose tag matches the lowercase tag. Gameday files mix
+    tag cases (e.g. 'Team', 'vs_LHP'), which the BeautifulSoup lxml parser lowercased.
+    """
+    if element is None:
+        return
+
+    for child in element.iter():
+        if isinstance(child.tag, str) and child.tag.lower() == tag:
+            yield child
+
+
+def find_xml_element(element, tag):
+    """
+    Find the first element with the given tag at or below the element, the same as BeautifulSoup's find
+    :return: the matching element, None if the element is None or has no match
+    """
+    return next(iter_xml_elements(element, tag), None)
+
+
+def get_xml_attrs(element):
+    """
+    :return: dictionary of the element's attributes, keyed by lowercase name like the BeautifulSoup attrs
+    """
+    return {name.lower(): value for name, value in element.attrib.items()}
+
 
 def get_game_pitcher_tendencies(player_id, team_abbrev, game_date):
     """
-    Get a dictionary of the pitcher pitch type tendencies during the given game date
+    Get a dictionary of the pitcher pitch type tendencies during the given game date. Use
+    get_date_pitcher_tendencies to get every pitcher of the date.
     :param player_id: Gameday ID of the pitcher of interest
     :param team_abbrev: Gameday team abbreviation
     :param game_date: game date
     :return: dictionary of pitch type abbreviations to tendency stats
     """
-    url = BASE_URL + 'year_' + str(game_date.year) + '/' + 'month_' + int_to_two_digits(game_date.month) + '/' + 'day_' + \
-          int_to_two_digits(game_date.day)
     # Get all the game IDs from the soup and find the matching team
     game_ids = get_game_ids(game_date)
     # Find the relevant team in list of URLS
-    matching_game_id = [game_id for game_id in game_ids if team_abbrev in game_id]
+    matching_game_id = [game_info for game_info in game_ids if team_abbrev in game_info.game_id]
+
+    # Get the pitcher's tendencies file
+    content = get_game_file_content(matching_game_id[0], 'premium/pitchers/' + player_id + '/pitchtendencies_game.xml')
+
+    return parse_pitcher_tendencies_xml(content)
 
-    # Get the pitcher's URL
+
+def get_date_pitcher_tendencies(game_date, max_workers=PITCHER_TENDENCY_WORKERS):
+    """
+    Get the pitch type tendencies of every pitcher in every game of the date. The games and their pitchers are
+    listed once for the whole date, so each pitcher costs a single request for its tendencies file.
+    :param game_date: date of interest
+    :param max_workers: number of files requested at once
+    :return: DataFrame indexed by pitcher ID, game ID and pitch type with a column per tendency stat
+    """
+    game_infos = get_game_ids(game_date)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        game_pitcher_files = executor.map(get_pitcher_ids, game_infos)
+        pitcher_games = [(file_name.split('.')[0], game_info)
+                         for game_info, file_names in zip(game_infos, game_pitcher_files)
+                         for file_name in file_names]
+        tendency_contents = executor.map(
+            lambda pitcher_game: get_game_file_content(pitcher_game[1], 'premium/pitchers/' + pitcher_game[0] +
+                                                       '/pitchtendencies_game.xml'), pitcher_games)
+
+        rows = list()
+        for (pitcher_id, game_info), content in zip(pitcher_games, tendency_contents):
+            for pitch_type, pitch_type_attrs in parse_pitcher_tendencies_xml(content).items():
+                row = {'pitcher_id': pitcher_id, 'game_id': game_info.game_id, 'pitch_type': pitch_type}
+                row.update((stat_name, value) for stat_name, value in StatSplit.from_attrs(pitch_type_attrs).items()
+                           if stat_name != 'id')
+                rows.append(row)
+
+    return pd.DataFrame(rows, columns=None if rows else PITCHER_TENDENCY_KEY_COLUMNS).set_index(
+        PITCHER_TENDENCY_KEY_COLUMNS).sort_index()
+
+
+def parse_pitcher_tendencies_xml(content):
+    """
+    :param content: bytes of a pitcher's pitchtendencies_game.xml
+    :return: dictionary of pitch type abbreviations to tendency stats
+    """
     game_dict = dict()
-    batters_url = url + '/' + matching_game_id[0] + 'premium/pitchers/' + player_id + '/'
-    #
-    soup = get_soup_from_url(batters_url + 'pitchtendencies_game.xml')
+    types_xml = find_xml_element(find_xml_element(parse_xml(content), 'std'), 'types')
+    if types_xml is None:
+        return game_dict
 
-    game_pitch_types = soup.find('std').find('types').findAll('type')
-    for game_pitch_type in game_pitch_types:
-        game_dict[game_pitch_type.attrs['id']] = game_pitch_type.attrs
+    for game_pitch_type in iter_xml_elements(types_xml, 'type'):
+        pitch_type_attrs = get_xml_attrs(game_pitch_type)
+        game_dict[pitch_type_attrs['id']] = pitch_type_attrs
 
     return game_dict
 
 
 def get_all_game_urls(game_date):
-    url = BASE_URL + 'year_' + str(game_date.year) + '/' + 'month_' + int_to_two_digits(
-        game_date.month) + '/' + 'day_' + \
-          int_to_two_digits(game_date.day)
+    url = get_day_path(game_date)
+
+
+# Shared name -> position indexes of the StatSplit objects, keyed by the tuple of stat names
+_stat_indexes = dict()
+
+
+class StatSplit(Mapping):
+    """
+    Read-only, dict-like stats of a single split (e.g. a player's season or vs. LHP stats). Numeric stats are
+    stored in one float64 array and every split with the same stat names shares a single name index, so a season
+    of players does not hold thousands of small dictionaries of strings. Stats that are not numbers (e.g. a
+    pitch type ID or '.---') are kept as strings.
+    """
+    __slots__ = ('_index', '_values', '_text')
+
+    def __init__(self, index, values, text=None):
+        """
+        :param index: dictionary of stat name to position in values, shared between splits
+        :param values: float64 array of the stats, NaN where the stat is a string
+        :param text: dictionary of the stats that are not numbers (default is none)
+        """
+        self._index = index
+        self._values = values
+        self._text = text
+
+    @staticmethod
+    def from_attrs(attrs):
+        """
+        :param attrs: dictionary of stat names to the string values read from a Gameday XML tag
+        :return: StatSplit of the stats
+        """
+        names = tuple(attrs)
+        index = _stat_indexes.get(names)
+        if index is None:
+            index = _stat_indexes.setdefault(names, {name: i for i, name in enumerate(names)})
+
+        values = np.empty(len(names), dtype=np.float64)
+        text = None
+        for i, value in enumerate(attrs.values()):
+            try:
+                values[i] = float(value)
+            except ValueError:
+                values[i] = np.nan
+                if text is None:
+                    text = dict()
+                text[names[i]] = value
+
+        return StatSplit(index, values, text)
+
+    def __getitem__(self, stat_name):
+        if self._text is not None and stat_name in self._text:
+            return self._text[stat_name]
+        return float(self._values[self._index[stat_name]])
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __repr__(self):
+        return 'StatSplit(%r)' % dict(self.items())
+
+
+def stack_stat_splits(stat_splits, stat_names):
+    """
+    Gather the same stats of many splits (e.g. every hitter's season split) into one array for aggregation
+    :param stat_splits: list of StatSplit objects, None for a missing split
+    :param stat_names: names of the stats of interest
+    :return: float64 array with a row per split and a column per stat, NaN where a stat is missing or not a number
+    """
+    stacked = np.full((len(stat_splits), len(stat_names)), np.nan)
+    for row, stat_split in enumerate(stat_splits):
+        if stat_split is None:
+            continue
+        for column, stat_name in enumerate(stat_names):
+            position = stat_split._index.get(stat_name)
+            if position is not None:
+                stacked[row, column] = stat_split._values[position]
+
+    return stacked
 
 
 class PregameStats(object):
+    __slots__ = ('team', 'season_stats_dict', 'career_stats_dict', 'month_stats_dict', 'team_stats_dict',
+                 'bases_empty_stats_dict', 'men_on_stats_dict', 'risp_stats_dict', 'bases_loaded_stats_dict',
+                 'vs_lhp_stats_dict', 'vs_rhp_stats_dict')
+
     def __init__(self):
         self.team = None
         self.season_stats_dict = None
@@ -224,11 +690,16 @@ class PregameStats(object):
 
 
 class PitchStats(object):
+    __slots__ = ('pitch_dict', 'is_available')
+
     def __init__(self):
         self.pitch_dict = dict()
+        self.is_available = dict()
 
 
 class PitcherGameStats(object):
+    __slots__ = ('id', 'pregame_stats', 'pitch_stats')
+
     def __init__(self):
         self.id = None
         self.pregame_stats = PregameStats()
@@ -236,6 +707,8 @@ class PitcherGameStats(object):
 
 
 class HitterGameStats(object):
+    __slots__ = ('id', 'batting_order_position', 'pregame_stats', 'pitch_stats')
+
     def __init__(self):
         self.id = None
         self.batting_order_position = None
@@ -262,128 +735,212 @@ class GameAttributes(object):
         self.weather_condition = None
 
 
-def get_game_hitter_stats(soup):
+def get_hitter_ids(game_id_info):
+    return get_player_file_names(game_id_info, HITTER_PLAYER_TYPE)
+
+
+def parse_pregame_stats_xml(player_xml):
     """
-    Get all stats for a particular hitter before the game
-    :param soup:
-    :return:
+    Read the pregame stat splits of a batters/ or pitchers/ player file
+    :param player_xml: root element of the player file
+    :return: PregameStats of the player
     """
-    root_xml = soup.find('player')
-
-    hitter_game_stats = None
-    if len(root_xml.find('atbats').findAll('ab')) > 0:
-        hitter_game_stats = PregameStats()
-        hitter_game_stats.team = root_xml.attrs['team']
-        hitter_game_stats.season_stats_dict = root_xml.find('season').attrs
-        hitter_game_stats.career_stats_dict = root_xml.find('career').attrs
-        hitter_game_stats.month_stats_dict = root_xml.find('month').attrs
-        hitter_game_stats.team_stats_dict = root_xml.find('team').attrs
-        hitter_game_stats.bases_empty_stats_dict = root_xml.find('empty').attrs
-        hitter_game_stats.men_on_stats_dict = root_xml.find('men_on').attrs
-        hitter_game_stats.risp_stats_dict = root_xml.find('risp').attrs
-        hitter_game_stats.bases_loaded_stats_dict = root_xml.find('loaded').attrs
-        hitter_game_stats.vs_lhp_stats_dict = root_xml.find('vs_lhp').attrs
-        hitter_game_stats.vs_rhp_stats_dict = root_xml.find('vs_rhp').attrs
+    pregame_stats = PregameStats()
+    pregame_stats.team = get_xml_attrs(player_xml).get('team')
+    for tag, stats_attribute in PREGAME_STAT_TAGS:
+        split_xml = find_xml_element(player_xml, tag)
+        setattr(pregame_stats, stats_attribute,
+                None if split_xml is None else StatSplit.from_attrs(get_xml_attrs(split_xml)))
 
-    # TODO: figure out how to get stats versus this pitcher. may need to just look at all games
+    return pregame_stats
 
-    return hitter_game_stats
 
+def get_game_hitter_stats_xml(content):
+    """
+    Get all stats for a particular hitter before the game, parsing the file with lxml.etree
+    :param content: bytes of the hitter's batters/ file
+    :return: PregameStats of the hitter, None if the hitter has no at bats in the game
+    """
+    root_xml = find_xml_element(parse_xml(content), 'player')
+    if root_xml is None or find_xml_element(find_xml_element(root_xml, 'atbats'), 'ab') is None:
+        return None
 
-def get_hitter_ids(game_id_info):
-    url = BASE_URL + 'year_' + str(game_id_info.game_date.year) + '/' + 'month_' + int_to_two_digits(
-            game_id_info.game_date.month) + '/' + 'day_' + \
-            int_to_two_digits(game_id_info.game_date.day) + '/' + game_id_info.game_id + '/batters/'
-    soup = get_soup_from_url(url)
-    batter_ids = soup.select("a[href*=.xml]")
-    return [batter_id.text.strip() for batter_id in batter_ids]
+    return parse_pregame_stats_xml(root_xml)
 
 
-def get_game_pitcher_stats(soup):
+def get_game_pitcher_stats_xml(content):
     """
-    Get all stats for a particular hitter before the game
-    :param soup:
-    :return:
+    Get all stats for a particular pitcher before the game, parsing the file with lxml.etree
+    :param content: bytes of the pitcher's pitchers/ file
+    :return: PregameStats of the pitcher, None if the file is missing
     """
-    root_xml = soup.find('player')
-
-    pitcher_game_stats = PregameStats()
-    pitcher_game_stats.team = root_xml.attrs['team']
-    pitcher_game_stats.season_stats_dict = root_xml.find('season').attrs
-    pitcher_game_stats.career_stats_dict = root_xml.find('career').attrs
-    pitcher_game_stats.month_stats_dict = root_xml.find('month').attrs
-    pitcher_game_stats.team_stats_dict = root_xml.find('team').attrs
-    pitcher_game_stats.bases_empty_stats_dict = root_xml.find('empty').attrs
-    pitcher_game_stats.men_on_stats_dict = root_xml.find('men_on').attrs
-    pitcher_game_stats.risp_stats_dict = root_xml.find('risp').attrs
-    pitcher_game_stats.bases_loaded_stats_dict = root_xml.find('loaded').attrs
-    pitcher_game_stats.vs_lhp_stats_dict = root_xml.find('vs_lhp').attrs
-    pitcher_game_stats.vs_rhp_stats_dict = root_xml.find('vs_rhp').attrs
+    root_xml = find_xml_element(parse_xml(content), 'player')
+    if root_xml is None:
+        return None
 
-    return pitcher_game_stats
+    return parse_pregame_stats_xml(root_xml)
 
 
 def get_pitcher_ids(game_id_info):
-    url = BASE_URL + 'year_' + str(game_id_info.game_date.year) + '/' + 'month_' + int_to_two_digits(
-            game_id_info.game_date.month) + '/' + 'day_' + \
-            int_to_two_digits(game_id_info.game_date.day) + '/' + game_id_info.game_id + '/pitchers/'
-    soup = get_soup_from_url(url)
-    pitcher_ids = soup.select("a[href*=.xml]")
-    return [pitcher_id.text.strip() for pitcher_id in pitcher_ids]
+    return get_player_file_names(game_id_info, PITCHER_PLAYER_TYPE)
 
 
-def get_game_batting_orders(game_id_info):
-    # TODO: make sure this is correct and this is not the state of the lineup at the END of the game
+def get_player_file_names(game_id_info, player_type):
+    """
+    Get the names of the player XML files in a game's batters or pitchers directory
+    :param game_id_info: GameInfo of the game of interest
+    :param player_type: HITTER_PLAYER_TYPE or PITCHER_PLAYER_TYPE
+    :return: list of file names (e.g. '120074.xml')
+    """
+    return DAY_LISTING_CACHE.get_listing(game_id_info.game_date, game_id_info.game_id + '/' + player_type,
+                                         lambda: fetch_player_file_names(game_id_info, player_type))
+
+
+def fetch_player_file_names(game_id_info, player_type):
+    return [name for name in GAMEDAY_SOURCE.list_directory(get_game_path(game_id_info) + '/' + player_type)
+            if name.endswith('.xml')]
+
 
-    url = BASE_URL + 'year_' + str(game_id_info.game_date.year) + '/' + 'month_' + int_to_two_digits(
-        game_id_info.game_date.month) + '/' + 'day_' + \
-          int_to_two_digits(game_id_info.game_date.day) + '/' + game_id_info.game_id + '/plays.xml'
-    soup = get_soup_from_url(url)
-    teams_xml = soup.find('game').find('lineup').findAll('team')
+def get_game_file_content(game_id_info, file_name):
+    """
+    Get the raw content of a file in the game's directory
+    :param game_id_info: GameInfo of the game of interest
+    :param file_name: path of the file relative to the game directory (e.g. 'plays.xml')
+    :return: bytes of the file, None if it does not exist
+    """
+    return GAMEDAY_SOURCE.get_content(get_game_path(game_id_info) + '/' + file_name)
+
+
+def parse_plays_xml(plays_content):
+    """
+    Stream through the game's plays.xml, stopping as soon as the lineup and weather have been read
+    :param plays_content: bytes of the game's plays.xml
+    :return: lists of the home and away Gameday player IDs in batting order and the weather attributes
+    """
     home_team_order = list()
     away_team_order = list()
-    for team_xml in teams_xml:
-        if team_xml.attrs['type'] == 'home':
-            team = team_xml.findAll('man')
-            for player in team:
-                home_team_order.append(player.attrs['pid'])
-        else:
-            team = team_xml.findAll('man')
-            for player in team:
-                away_team_order.append(player.attrs['pid'])
+    weather_attrs = None
+    has_lineup = False
+
+    for _, element in etree.iterparse(io.BytesIO(plays_content), events=('end',), recover=True):
+        if not isinstance(element.tag, str):
+            continue
+        tag = element.tag.lower()
+        if tag == 'weather' and weather_attrs is None:
+            weather_attrs = get_xml_attrs(element)
+        elif tag == 'lineup' and not has_lineup:
+            has_lineup = True
+            for team_xml in iter_xml_elements(element, 'team'):
+                player_ids = [get_xml_attrs(man_xml)['pid'] for man_xml in iter_xml_elements(team_xml, 'man')]
+                if get_xml_attrs(team_xml)['type'] == 'home':
+                    home_team_order += player_ids
+                else:
+                    away_team_order += player_ids
+        if has_lineup and weather_attrs is not None:
+            break
+
+    return home_team_order, away_team_order, weather_attrs
 
-    return home_team_order, away_team_order
+
+def get_game_batting_orders(game_id_info):
+    home_batting_order, away_batting_order, _ = parse_plays_xml(get_game_file_content(game_id_info, 'plays.xml'))
+    return home_batting_order, away_batting_order
 
 
 def mine_hitter_stats(game_id_info):
 
     hitter_stat_list = list()
-    for info in game_id_info:
-        hitter_ids = get_hitter_ids(info)
-        home_batting_order, away_batting_order = get_game_batting_orders(info)
-        for hitter_id in hitter_ids:
-            hitter_url = BASE_URL + 'year_' + str(info.game_date.year) + '/' + 'month_' + int_to_two_digits(
-            info.game_date.month) + '/' + 'day_' + \
-            int_to_two_digits(info.game_date.day) + '/' + info.game_id + '/batters/' + hitter_id
-
-            hitter_soup = get_soup_from_url(hitter_url)
-
-            hitter_id_str = hitter_id.split('.')[0]
-            hitter_stats = HitterGameStats()
-            hitter_stats.pregame_stats = get_game_hitter_stats(hitter_soup)
-            if hitter_stats.pregame_stats is not None:
-                hitter_stats.pitch_stats = get_season_hitter_pitch_stats(hitter_id_str, info)
-                for i in range(0, len(home_batting_order)):
-                    if home_batting_order[i] == hitter_id_str:
-                        hitter_stats.batting_order_position = i
-                        break
-                for i in range(0, len(away_batting_order)):
-                    if away_batting_order[i] == hitter_id_str:
-                        hitter_stats.batting_order_position = i
-                        break
-                if hitter_stats.batting_order_position is not None:
-                    hitter_stats.id = hitter_id_str
-                    hitter_stat_list.append(hitter_stats)
+    with ThreadPoolExecutor(max_workers=PITCH_FILE_WORKERS) as pitch_file_executor:
+        for info in game_id_info:
+            home_batting_order, away_batting_order = get_game_batting_orders(info)
+            hitter_stat_list += mine_game_hitter_stats(info, home_batting_order, away_batting_order,
+                                                       pitch_file_executor)
+
+    return hitter_stat_list
+
+
+def get_batting_order_positions(home_batting_order, away_batting_order):
+    """
+    Index both batting orders by player so a hitter's slot is a single lookup
+    :param home_batting_order: home Gameday player IDs in batting order
+    :param away_batting_order: away Gameday player IDs in batting order
+    :return: dictionary of Gameday player ID to a tuple of the team type ('home' or 'away') and the
+    zero-based batting order position
+    """
+    batting_order_positions = dict()
+    for team_type, batting_order in [('away', away_batting_order), ('home', home_batting_order)]:
+        for i, player_id in enumerate(batting_order):
+            batting_order_positions.setdefault(player_id, (team_type, i))
+
+    return batting_order_positions
+
+
+def make_hitter_game_stats(hitter_id, pregame_stats, pitch_stats, batting_order_positions):
+    """
+    Combine the preloaded data of a hitter into its HitterGameStats. Does no I/O.
+    :param hitter_id: Gameday player ID of the hitter
+    :param pregame_stats: PregameStats parsed from the hitter's batters/ file, None if the hitter did not bat
+    :param pitch_stats: PitchStats of the hitter's season tendencies
+    :param batting_order_positions: dictionary returned by get_batting_order_positions
+    :return: HitterGameStats, None if the hitter did not bat or is not in either batting order
+    """
+    if pregame_stats is None or hitter_id not in batting_order_positions:
+        return None
+
+    hitter_stats = HitterGameStats()
+    hitter_stats.id = hitter_id
+    hitter_stats.batting_order_position = batting_order_positions[hitter_id][1]
+    hitter_stats.pregame_stats = pregame_stats
+    hitter_stats.pitch_stats = pitch_stats
+
+    return hitter_stats
+
+
+def make_pitcher_game_stats(pitcher_id, pregame_stats, pitch_stats):
+    """
+    Combine the preloaded data of a pitcher into its PitcherGameStats. Does no I/O.
+    :return: PitcherGameStats, None if the pitcher's file could not be read
+    """
+    if pregame_stats is None:
+        return None
+
+    pitcher_stats = PitcherGameStats()
+    pitcher_stats.id = pitcher_id
+    pitcher_stats.pregame_stats = pregame_stats
+    pitcher_stats.pitch_stats = pitch_stats
+
+    return pitcher_stats
+
+
+def mine_game_hitter_stats(info, home_batting_order, away_batting_order, pitch_file_executor=None):
+    """
+    Get the pregame and pitch stats of every hitter in the game's batting orders
+    :param info: GameInfo of the game of interest
+    :param home_batting_order: home Gameday player IDs in batting order
+    :param away_batting_order: away Gameday player IDs in batting order
+    :param pitch_file_executor: executor the pitch type files are fetched with (see get_season_pitch_stats)
+    :return: list of HitterGameStats
+    """
+    batting_order_positions = get_batting_order_positions(home_batting_order, away_batting_order)
+    game_path = get_game_path(info)
+    batters_path = game_path + '/batters/'
+    premium_batters_path = game_path + '/premium/batters/'
+
+    # Only hitters in a batting order are kept, so the files of the bench are never requested
+    hitter_ids = [file_name.split('.')[0] for file_name in get_hitter_ids(info)]
+    hitter_ids = [hitter_id for hitter_id in hitter_ids if hitter_id in batting_order_positions]
+
+    pregame_stats = {hitter_id: get_game_hitter_stats_xml(GAMEDAY_SOURCE.get_content(batters_path + hitter_id + '.xml'))
+                     for hitter_id in hitter_ids}
+    pitch_stats = {hitter_id: get_season_pitch_stats(premium_batters_path + hitter_id + '/', pitch_file_executor)
+                   for hitter_id in hitter_ids if pregame_stats[hitter_id] is not None}
+
+    hitter_stat_list = list()
+    for hitter_id in hitter_ids:
+        hitter_stats = make_hitter_game_stats(hitter_id, pregame_stats[hitter_id], pitch_stats.get(hitter_id),
+                                              batting_order_positions)
+        if hitter_stats is not None:
+            hitter_stat_list.append(hitter_stats)
 
     return hitter_stat_list
 
@@ -392,79 +949,164 @@ def mine_game_attributes(game_id_info):
     game_attribute_list = list()
 
     for info in game_id_info:
-        game_attributes = GameAttributes()
-
-        # Get the game time
-        url = BASE_URL + 'year_' + str(info.game_date.year) + '/' + 'month_' + int_to_two_digits(
-            info.game_date.month) + '/' + 'day_' + \
-              int_to_two_digits(info.game_date.day) + '/' + info.game_id + '/game.xml'
-        soup = get_soup_from_url(url)
-        game_attributes.game_time = soup.find('game').attrs['local_game_time']
-        teams_xml = soup.find('game').findAll('team')
-        for team_xml in teams_xml:
-            if team_xml.attrs['type'] == 'home':
-                game_attributes.home_team = team_xml.attrs['abbrev']
-            else:
-                game_attributes.away_team = team_xml.attrs['abbrev']
-
-        # Get information about the umpire
-        url = BASE_URL + 'year_' + str(info.game_date.year) + '/' + 'month_' + int_to_two_digits(
-            info.game_date.month) + '/' + 'day_' + \
-              int_to_two_digits(info.game_date.day) + '/' + info.game_id + '/players.xml'
-        soup = get_soup_from_url(url)
-
-        umpires_xml = soup.find('game').find('umpires').findAll('umpire')
-        for umpire_xml in umpires_xml:
-            if umpire_xml.attrs['position'] == 'home':
-                game_attributes.umpire = Umpire()
-                game_attributes.umpire.id = umpire_xml.attrs['id']
-                game_attributes.umpire.name = umpire_xml.attrs['name']
-
-        # Get the weather characteristics
-        # TODO: how do we know if we're in a dome?
-        url = BASE_URL + 'year_' + str(info.game_date.year) + '/' + 'month_' + int_to_two_digits(
-            info.game_date.month) + '/' + 'day_' + \
-              int_to_two_digits(info.game_date.day) + '/' + info.game_id + '/plays.xml'
-        soup = get_soup_from_url(url)
-        weather_xml = soup.find('game').find('weather')
-        game_attributes.temperature = int(weather_xml.attrs['temp'].strip())
-        game_attributes.weather_condition = weather_xml.attrs['condition']
-        game_attributes.wind_speed = int(weather_xml.attrs['wind'].split('mph')[0].strip())
-        game_attributes.wind_description = weather_xml.attrs['wind'].split('mph')[1].strip()
-
-        game_attributes.id_info = info
-        game_attribute_list.append(game_attributes)
+        _, _, weather_attrs = parse_plays_xml(get_game_file_content(info, 'plays.xml'))
+        game_attribute_list.append(parse_game_attributes_xml(info, get_game_file_content(info, 'game.xml'),
+                                                             get_game_file_content(info, 'players.xml'),
+                                                             weather_attrs))
 
     return game_attribute_list
 
 
+def parse_game_attributes_xml(info, game_content, players_content, weather_attrs):
+    """
+    Get the time, teams, home plate umpire and weather of a game, parsing the files with lxml.etree
+    :param info: GameInfo of the game of interest
+    :param game_content: bytes of the game's game.xml
+    :param players_content: bytes of the game's players.xml
+    :param weather_attrs: weather attributes read from the game's plays.xml by parse_plays_xml
+    :return: GameAttributes of the game
+    """
+    game_attributes = GameAttributes()
+
+    # Get the game time
+    game_xml = find_xml_element(parse_xml(game_content), 'game')
+    game_attributes.game_time = get_xml_attrs(game_xml)['local_game_time']
+    for team_xml in iter_xml_elements(game_xml, 'team'):
+        team_attrs = get_xml_attrs(team_xml)
+        if team_attrs['type'] == 'home':
+            game_attributes.home_team = team_attrs['abbrev']
+        else:
+            game_attributes.away_team = team_attrs['abbrev']
+
+    # Get information about the umpire
+    umpires_xml = find_xml_element(find_xml_element(parse_xml(players_content), 'game'), 'umpires')
+    for umpire_xml in iter_xml_elements(umpires_xml, 'umpire'):
+        umpire_attrs = get_xml_attrs(umpire_xml)
+        if umpire_attrs['position'] == 'home':
+            game_attributes.umpire = Umpire()
+            game_attributes.umpire.id = umpire_attrs['id']
+            game_attributes.umpire.name = umpire_attrs['name']
+
+    set_game_weather(game_attributes, weather_attrs)
+
+    game_attributes.id_info = info
+
+    return game_attributes
+
+
+def set_game_weather(game_attributes, weather_attrs):
+    """
+    Get the weather characteristics from the attributes of the weather tag in plays.xml
+    """
+    # TODO: how do we know if we're in a dome?
+    game_attributes.temperature = int(weather_attrs['temp'].strip())
+    game_attributes.weather_condition = weather_attrs['condition']
+    game_attributes.wind_speed = int(weather_attrs['wind'].split('mph')[0].strip())
+    game_attributes.wind_description = weather_attrs['wind'].split('mph')[1].strip()
+
+
 def mine_pitcher_stats(game_id_info):
 
     pitcher_stat_list = list()
-    for info in game_id_info:
-        pitcher_ids = get_pitcher_ids(info)
-        for pitcher_id in pitcher_ids:
-            pitcher_url = BASE_URL + 'year_' + str(info.game_date.year) + '/' + 'month_' + int_to_two_digits(
-            info.game_date.month) + '/' + 'day_' + \
-            int_to_two_digits(info.game_date.day) + '/' + info.game_id + '/pitchers/' + pitcher_id
-
-            pitcher_soup = get_soup_from_url(pitcher_url)
-
-            pitcher_id_str = pitcher_id.split('.')[0]
-            pitcher_stats = PitcherGameStats()
-            pitcher_stats.pregame_stats = get_game_pitcher_stats(pitcher_soup)
-            if pitcher_stats.pregame_stats is not None:
-                pitcher_stats.pitch_stats = get_season_pitcher_pitch_stats(pitcher_id_str, info)
-                pitcher_stats.id = pitcher_id_str
-                pitcher_stat_list.append(pitcher_stats)
+    with ThreadPoolExecutor(max_workers=PITCH_FILE_WORKERS) as pitch_file_executor:
+        for info in game_id_info:
+            pitcher_stat_list += mine_game_pitcher_stats(info, pitch_file_executor)
+
+    return pitcher_stat_list
+
+
+def mine_game_pitcher_stats(info, pitch_file_executor=None):
+    """
+    Get the pregame and pitch stats of every pitcher in the game
+    :param info: GameInfo of the game of interest
+    :param pitch_file_executor: executor the pitch type files are fetched with (see get_season_pitch_stats)
+    :return: list of PitcherGameStats
+    """
+    game_path = get_game_path(info)
+    pitchers_path = game_path + '/pitchers/'
+    premium_pitchers_path = game_path + '/premium/pitchers/'
+
+    pitcher_ids = [file_name.split('.')[0] for file_name in get_pitcher_ids(info)]
+    pregame_stats = {pitcher_id: get_game_pitcher_stats_xml(GAMEDAY_SOURCE.get_content(pitchers_path + pitcher_id +
+                                                                                       '.xml'))
+                     for pitcher_id in pitcher_ids}
+    pitch_stats = {pitcher_id: get_season_pitch_stats(premium_pitchers_path + pitcher_id + '/', pitch_file_executor)
+                   for pitcher_id in pitcher_ids if pregame_stats[pitcher_id] is not None}
+
+    pitcher_stat_list = list()
+    for pitcher_id in pitcher_ids:
+        pitcher_stats = make_pitcher_game_stats(pitcher_id, pregame_stats[pitcher_id], pitch_stats.get(pitcher_id))
+        if pitcher_stats is not None:
+            pitcher_stat_list.append(pitcher_stats)
 
     return pitcher_stat_list
 
 
-def mine_games(game_date):
+def mine_game(info, pitch_file_executor=None):
+    """
+    Mine the attributes, hitter stats and pitcher stats of a single game, fetching each game file once
+    :param info: GameInfo of the game of interest
+    :param pitch_file_executor: executor the pitch type files are fetched with (see get_season_pitch_stats)
+    :return: GameAttributes, list of HitterGameStats and list of PitcherGameStats of the game
+    """
+    home_batting_order, away_batting_order, weather_attrs = \
+        parse_plays_xml(get_game_file_content(info, 'plays.xml'))
+    game_attributes = parse_game_attributes_xml(info, get_game_file_content(info, 'game.xml'),
+                                                get_game_file_content(info, 'players.xml'), weather_attrs)
+    hitter_stat_list = mine_game_hitter_stats(info, home_batting_order, away_batting_order, pitch_file_executor)
+    pitcher_stat_list = mine_game_pitcher_stats(info, pitch_file_executor)
+
+    return game_attributes, hitter_stat_list, pitcher_stat_list
+
+
+def try_mine_game(info, pitch_file_executor=None):
+    """
+    Mine a single game, so that a game with missing or broken files does not fail the rest of its date. Errors
+    fetching the files (e.g. a rate limit or a server error) are raised, since the game may be mined on a later try.
+    :param info: GameInfo of the game of interest
+    :param pitch_file_executor: executor the pitch type files are fetched with (see get_season_pitch_stats)
+    :return: the result of mine_game, None if the game's files are missing or malformed
+    """
+    try:
+        return mine_game(info, pitch_file_executor)
+    except GAME_FILE_EXCEPTIONS as e:
+        print("Failed to mine %s (%s: %s)" % (info.game_id, type(e).__name__, e))
+        return None
+
+
+def mine_games(game_date, max_workers=GAME_WORKERS):
+    """
+    Mine every game on the given date, processing the games in parallel. Games with missing or malformed files are
+    skipped. The games that could not be fetched are raised together once every game of the date has finished.
+    :param game_date: date of interest
+    :param max_workers: number of games mined at once
+    :return: lists of the GameAttributes, HitterGameStats and PitcherGameStats of all games
+    """
     game_id_info = get_game_ids(game_date)
-    game_list = mine_game_attributes(game_id_info)
-    hitter_stat_list = mine_hitter_stats(game_id_info)
-    pitcher_stat_list = mine_pitcher_stats(game_id_info)
+    game_results = list()
+    failed_games = dict()
+    # The pitch type files of every player of every game go through one pool, rather than a pool per player
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            ThreadPoolExecutor(max_workers=PITCH_FILE_WORKERS) as pitch_file_executor:
+        futures = [(info.game_id, executor.submit(try_mine_game, info, pitch_file_executor)) for info in game_id_info]
+        for game_id, future in futures:
+            try:
+                game_result = future.result()
+            except Exception as e:
+                failed_games[game_id] = "%s: %s" % (type(e).__name__, e)
+                continue
+            if game_result is not None:
+                game_results.append(game_result)
+
+    if len(failed_games) > 0:
+        raise GamesNotMinedException(game_date, failed_games)
+
+    game_list = list()
+    hitter_stat_list = list()
+    pitcher_stat_list = list()
+    for game_attributes, game_hitter_stats, game_pitcher_stats in game_results:
+        game_list.append(game_attributes)
+        hitter_stat_list += game_hitter_stats
+        pitcher_stat_list += game_pitcher_stats
 
     return game_list, hitter_stat_list, pitcher_stat_list
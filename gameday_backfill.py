@@ -0,0 +1,339 @@
+"""
+gameday_backfill.py
+Module used for backfilling Gameday data over a range of dates, one date per worker process at a time
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+import gameday
+from beautiful_soup_helper import get_request_count
+
+# Number of dates mined at once by run_backfill
+BACKFILL_WORKERS = 4
+
+GAMES_FILE_NAME = 'games.parquet'
+HITTERS_FILE_NAME = 'hitters.parquet'
+PITCHERS_FILE_NAME = 'pitchers.parquet'
+
+# Suffix of the column holding the text of a stat that is not a number
+TEXT_COLUMN_SUFFIX = '_text'
+
+
+def get_backfill_dates(start_date, end_date, shard_index=0, num_shards=1):
+    """
+    Get the dates of the range that belong to a shard. Dates are assigned to shards by their ordinal, so every
+    machine running a different shard of the same range gets a disjoint set of dates.
+    :param start_date: first date of the range
+    :param end_date: last date of the range (inclusive)
+    :param shard_index: index of the shard of interest, from 0 to num_shards - 1
+    :param num_shards: number of shards the range is split into
+    :return: list of dates in chronological order
+    """
+    if not 0 <= shard_index < num_shards:
+        raise ValueError("Shard index %i is not in the range of %i shards" % (shard_index, num_shards))
+
+    dates = list()
+    game_date = start_date
+    while game_date <= end_date:
+        if game_date.toordinal() % num_shards == shard_index:
+            dates.append(game_date)
+        game_date += timedelta(days=1)
+
+    return dates
+
+
+def get_partition_dir(output_dir, game_date):
+    return os.path.join(output_dir, 'game_date=' + game_date.isoformat())
+
+
+class BackfillManifest(object):
+    """
+    Checkpoint of the dates that have been completely mined and written. The manifest is rewritten after every
+    date, so a backfill that crashes resumes from the first date that was not finished. Dates that failed are
+    recorded with their errors and mined again by the next run.
+    """
+
+    def __init__(self, manifest_path):
+        """
+        :param manifest_path: path of the JSON manifest file, created if it does not exist
+        """
+        self._manifest_path = manifest_path
+        self._completed_dates = dict()
+        self._failed_dates = dict()
+        self._lock = threading.Lock()
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as manifest_file:
+                manifest = json.load(manifest_file)
+            self._completed_dates = manifest['completed_dates']
+            self._failed_dates = manifest.get('failed_dates', dict())
+
+    def is_complete(self, game_date):
+        with self._lock:
+            return game_date.isoformat() in self._completed_dates
+
+    def get_date_result(self, game_date):
+        """
+        :return: dictionary of the number of games, requests and seconds taken for the date, None if incomplete
+        """
+        with self._lock:
+            return self._completed_dates.get(game_date.isoformat())
+
+    def get_date_failure(self, game_date):
+        """
+        :return: errors of the last failed attempt at the date, None if it has not failed since it was completed
+        """
+        with self._lock:
+            return self._failed_dates.get(game_date.isoformat())
+
+    def mark_complete(self, game_date, date_result):
+        """
+        Record the date as complete and save the manifest
+        :param game_date: date that was mined
+        :param date_result: dictionary of the number of games, requests and seconds taken for the date
+        """
+        with self._lock:
+            self._completed_dates[game_date.isoformat()] = date_result
+            self._failed_dates.pop(game_date.isoformat(), None)
+            self._save()
+
+    def record_failure(self, game_date, failure):
+        """
+        Record the errors of a date that could not be completed and save the manifest. The date stays incomplete.
+        :param game_date: date that was mined
+        :param failure: dictionary of the Gameday game IDs that failed to their error, or the error of the whole date
+        """
+        with self._lock:
+            self._failed_dates[game_date.isoformat()] = failure
+            self._save()
+
+    def _save(self):
+        temporary_path = self._manifest_path + '.tmp'
+        with open(temporary_path, 'w') as manifest_file:
+            json.dump({'completed_dates': self._completed_dates, 'failed_dates': self._failed_dates}, manifest_file,
+                      indent=1, sort_keys=True)
+        os.replace(temporary_path, self._manifest_path)
+
+
+class BackfillThroughput(object):
+    """
+    Running totals of a backfill used to report games and requests per minute
+    """
+
+    def __init__(self):
+        self.start_time = time.monotonic()
+        self.num_dates = 0
+        self.num_games = 0
+        self.num_requests = 0
+        self.failed_dates = list()
+
+    def add_date(self, date_result):
+        self.num_dates += 1
+        self.num_games += date_result['games']
+        self.num_requests += date_result['requests']
+
+    def get_elapsed_minutes(self):
+        return (time.monotonic() - self.start_time) / 60.
+
+    def get_games_per_minute(self):
+        return self.num_games / max(self.get_elapsed_minutes(), 1e-9)
+
+    def get_requests_per_minute(self):
+        return self.num_requests / max(self.get_elapsed_minutes(), 1e-9)
+
+    def __str__(self):
+        return "%i dates, %i games, %i requests in %.1f min (%.1f games/min, %.1f requests/min)" % \
+               (self.num_dates, self.num_games, self.num_requests, self.get_elapsed_minutes(),
+                self.get_games_per_minute(), self.get_requests_per_minute())
+
+
+def add_prefixed_stats(row, prefix, stats_dict):
+    """
+    Add the stats of a split to a row. A stat that is not a number (e.g. '.---' before a player's first at bat) is
+    NaN in its float column, so the column keeps one type across players, and its text goes to a '_text' column.
+    :param row: dictionary of columns
+    :param prefix: prefix of the stats' column names
+    :param stats_dict: StatSplit of the stats, None if the split is missing
+    """
+    if stats_dict is None:
+        return
+    for stat_name, value in stats_dict.items():
+        column_name = prefix + stat_name
+        if isinstance(value, str):
+            row[column_name] = float('nan')
+            row[column_name + TEXT_COLUMN_SUFFIX] = value
+        else:
+            row[column_name] = value
+
+
+def add_player_stats(row, pregame_stats, pitch_stats):
+    if pregame_stats is not None:
+        row['team'] = pregame_stats.team
+        for tag, stats_attribute in gameday.PREGAME_STAT_TAGS:
+            add_prefixed_stats(row, tag + '_', getattr(pregame_stats, stats_attribute))
+    if pitch_stats is not None:
+        for pitch_type, stats_dict in pitch_stats.pitch_dict.items():
+            add_prefixed_stats(row, 'pitch_' + pitch_type + '_', stats_dict)
+
+
+def game_attributes_to_row(game_attributes):
+    """
+    :param game_attributes: GameAttributes of a game
+    :return: dictionary of the game's columns
+    """
+    row = {'game_id': game_attributes.id_info.game_id,
+           'game_time': game_attributes.game_time,
+           'home_team': game_attributes.home_team,
+           'away_team': game_attributes.away_team,
+           'umpire_id': None,
+           'umpire_name': None,
+           'temperature': game_attributes.temperature,
+           'wind_speed': game_attributes.wind_speed,
+           'wind_description': game_attributes.wind_description,
+           'weather_condition': game_attributes.weather_condition}
+    if isinstance(game_attributes.umpire, gameday.Umpire):
+        row['umpire_id'] = game_attributes.umpire.id
+        row['umpire_name'] = game_attributes.umpire.name
+
+    return row
+
+
+def hitter_stats_to_row(hitter_stats):
+    """
+    :param hitter_stats: HitterGameStats of a hitter
+    :return: dictionary of the hitter's columns, with each stat split prefixed by its tag (e.g. 'season_avg')
+    """
+    row = {'player_id': hitter_stats.id, 'batting_order_position': hitter_stats.batting_order_position}
+    add_player_stats(row, hitter_stats.pregame_stats, hitter_stats.pitch_stats)
+    return row
+
+
+def pitcher_stats_to_row(pitcher_stats):
+    """
+    :param pitcher_stats: PitcherGameStats of a pitcher
+    :return: dictionary of the pitcher's columns, with each stat split prefixed by its tag (e.g. 'season_era')
+    """
+    row = {'player_id': pitcher_stats.id}
+    add_player_stats(row, pitcher_stats.pregame_stats, pitcher_stats.pitch_stats)
+    return row
+
+
+def write_partition_file(partition_dir, file_name, rows):
+    temporary_path = os.path.join(partition_dir, file_name + '.tmp')
+    pd.DataFrame(rows).to_parquet(temporary_path, index=False)
+    os.replace(temporary_path, os.path.join(partition_dir, file_name))
+
+
+def write_date_partition(output_dir, game_date, game_list, hitter_stat_list, pitcher_stat_list):
+    """
+    Write the mined games and players of a date to its own partition directory of Parquet files
+    :param output_dir: root directory of the dataset
+    :param game_date: date the games were played
+    :param game_list: list of GameAttributes
+    :param hitter_stat_list: list of HitterGameStats
+    :param pitcher_stat_list: list of PitcherGameStats
+    :return: path of the partition directory
+    """
+    partition_dir = get_partition_dir(output_dir, game_date)
+    os.makedirs(partition_dir, exist_ok=True)
+    write_partition_file(partition_dir, GAMES_FILE_NAME,
+                         [game_attributes_to_row(game_attributes) for game_attributes in game_list])
+    write_partition_file(partition_dir, HITTERS_FILE_NAME,
+                         [hitter_stats_to_row(hitter_stats) for hitter_stats in hitter_stat_list])
+    write_partition_file(partition_dir, PITCHERS_FILE_NAME,
+                         [pitcher_stats_to_row(pitcher_stats) for pitcher_stats in pitcher_stat_list])
+
+    return partition_dir
+
+
+def backfill_date(game_date, output_dir, gameday_source=None):
+    """
+    Mine every game on the date and write it to the date's partition. Run in a worker process.
+    :param game_date: date of interest
+    :param output_dir: root directory of the dataset
+    :param gameday_source: source the Gameday files are read from (default is the worker's gameday.GAMEDAY_SOURCE)
+    :return: dictionary of the number of games, requests and seconds taken for the date, with a 'failed_games'
+    dictionary of the game IDs that could not be fetched to their error if the date was not written
+    """
+    if gameday_source is not None:
+        gameday.set_gameday_source(gameday_source)
+
+    start_time = time.monotonic()
+    start_request_count = get_request_count()
+
+    try:
+        game_list, hitter_stat_list, pitcher_stat_list = gameday.mine_games(game_date)
+    except gameday.GamesNotMinedException as e:
+        # Nothing is written, so the partition of the date is only ever complete
+        return {'games': 0,
+                'failed_games': e.failed_games,
+                'requests': get_request_count() - start_request_count,
+                'seconds': time.monotonic() - start_time}
+    write_date_partition(output_dir, game_date, game_list, hitter_stat_list, pitcher_stat_list)
+
+    return {'games': len(game_list),
+            'requests': get_request_count() - start_request_count,
+            'seconds': time.monotonic() - start_time}
+
+
+def run_backfill(start_date, end_date, output_dir, manifest_path=None, shard_index=0, num_shards=1,
+                 num_workers=BACKFILL_WORKERS, gameday_source=None):
+    """
+    Mine every date of the range that belongs to the shard and has not been completed yet, spreading the dates
+    across worker processes
+    :param start_date: first date of the range
+    :param end_date: last date of the range (inclusive)
+    :param output_dir: root directory of the dataset, with one game_date=yyyy-mm-dd partition per date
+    :param manifest_path: path of the BackfillManifest (default is a per-shard file in the output directory)
+    :param shard_index: index of the shard mined by this call, from 0 to num_shards - 1
+    :param num_shards: number of shards the range is split into (e.g. one per machine)
+    :param num_workers: number of worker processes
+    :param gameday_source: source the Gameday files are read from, e.g. a gameday.LocalGamedaySource of a mirror
+    (default is gameday.GAMEDAY_SOURCE)
+    :return: BackfillThroughput of the dates mined by this call
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if manifest_path is None:
+        manifest_path = os.path.join(output_dir, 'manifest_shard_%i_of_%i.json' % (shard_index, num_shards))
+    manifest = BackfillManifest(manifest_path)
+
+    remaining_dates = [game_date for game_date in get_backfill_dates(start_date, end_date, shard_index, num_shards)
+                       if not manifest.is_complete(game_date)]
+    print("Backfilling %i dates from %s to %s" % (len(remaining_dates), start_date, end_date))
+
+    throughput = BackfillThroughput()
+    if len(remaining_dates) == 0:
+        return throughput
+
+    if gameday_source is None:
+        gameday_source = gameday.GAMEDAY_SOURCE
+
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = {executor.submit(backfill_date, game_date, output_dir, gameday_source): game_date
+                   for game_date in remaining_dates}
+        for future in as_completed(futures):
+            game_date = futures[future]
+            try:
+                date_result = future.result()
+            except Exception as e:
+                print("Failed to backfill %s: %s" % (game_date, e))
+                manifest.record_failure(game_date, "%s: %s" % (type(e).__name__, e))
+                throughput.failed_dates.append(game_date)
+                continue
+            if 'failed_games' in date_result:
+                print("Failed to backfill %i games of %s, retrying the date next run" %
+                      (len(date_result['failed_games']), game_date))
+                manifest.record_failure(game_date, date_result['failed_games'])
+                throughput.failed_dates.append(game_date)
+                continue
+            manifest.mark_complete(game_date, date_result)
+            throughput.add_date(date_result)
+            print("Backfilled %s. %s" % (game_date, throughput))
+
+    return throughput
@@ -0,0 +1,132 @@
+"""
+gameday_mirror.py
+Module used for mirroring Gameday files into a local directory tree and serving the mirror over HTTP
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import os
+import threading
+
+import gameday
+
+# Number of files copied at once by mirror_date
+MIRROR_WORKERS = 16
+
+# Files of a game directory read when mining the game
+GAME_FILE_NAMES = ['game.xml', 'players.xml', 'plays.xml']
+PITCHER_TENDENCIES_FILE_NAME = 'pitchtendencies_game.xml'
+
+
+def get_game_file_paths(game_info, source):
+    """
+    Get the paths of every file of a game that is read when mining it
+    :param game_info: GameInfo of the game of interest
+    :param source: HttpGamedaySource or LocalGamedaySource the game is listed from
+    :return: list of paths relative to the root of the tree
+    """
+    game_path = gameday.get_game_path(game_info)
+    paths = [game_path + '/' + file_name for file_name in GAME_FILE_NAMES]
+    for player_type in [gameday.HITTER_PLAYER_TYPE, gameday.PITCHER_PLAYER_TYPE]:
+        for file_name in source.list_directory(game_path + '/' + player_type):
+            if not file_name.endswith('.xml'):
+                continue
+            paths.append(game_path + '/' + player_type + '/' + file_name)
+
+            premium_path = game_path + '/premium/' + player_type + '/' + file_name.split('.')[0] + '/'
+            paths += [premium_path + pitch_file_name for _, pitch_file_name in gameday.PITCH_TYPE_FILES]
+            if player_type == gameday.PITCHER_PLAYER_TYPE:
+                paths.append(premium_path + PITCHER_TENDENCIES_FILE_NAME)
+
+    return paths
+
+
+def mirror_file(source, path, mirror_dir):
+    """
+    Copy a file into the mirror unless it is already there
+    :return: True if the file was written, False if it was already mirrored or does not exist in the source
+    """
+    file_path = os.path.join(mirror_dir, *path.split('/'))
+    if os.path.exists(file_path):
+        return False
+
+    content = source.get_content(path)
+    if content is None:
+        return False
+
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    temporary_path = file_path + '.tmp'
+    with open(temporary_path, 'wb') as mirror_file_handle:
+        mirror_file_handle.write(content)
+    os.replace(temporary_path, file_path)
+
+    return True
+
+
+def mirror_date(game_date, mirror_dir, source=None, max_workers=MIRROR_WORKERS):
+    """
+    Copy every file read when mining the games of a date into the mirror. Files already in the mirror are not
+    requested again, so an interrupted mirror can simply be run again.
+    :param game_date: date of interest
+    :param mirror_dir: root directory of the mirror, laid out like the Gameday tree
+    :param source: HttpGamedaySource or LocalGamedaySource to copy from (default is gameday.GAMEDAY_SOURCE)
+    :param max_workers: number of files copied at once
+    :return: number of files written
+    """
+    if source is None:
+        source = gameday.GAMEDAY_SOURCE
+
+    day_path = gameday.get_day_path(game_date)
+    game_ids = [name for name in source.list_directory(day_path) if name.startswith('gid_')]
+    # The day directory is created even without games so the mirror lists the date as empty
+    os.makedirs(os.path.join(mirror_dir, *day_path.split('/')), exist_ok=True)
+
+    paths = list()
+    for game_id in game_ids:
+        paths += get_game_file_paths(gameday.GameInfo(game_date, game_id), source)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return sum(executor.map(lambda path: mirror_file(source, path, mirror_dir), paths))
+
+
+def mirror_dates(start_date, end_date, mirror_dir, source=None, max_workers=MIRROR_WORKERS):
+    """
+    Mirror every date of the range
+    :param start_date: first date of the range
+    :param end_date: last date of the range (inclusive)
+    :param mirror_dir: root directory of the mirror
+    :param source: HttpGamedaySource or LocalGamedaySource to copy from (default is gameday.GAMEDAY_SOURCE)
+    :param max_workers: number of files copied at once
+    :return: number of files written
+    """
+    num_files = 0
+    game_date = start_date
+    while game_date <= end_date:
+        num_date_files = mirror_date(game_date, mirror_dir, source, max_workers)
+        print("Mirrored %i files for %s" % (num_date_files, game_date))
+        num_files += num_date_files
+        game_date += timedelta(days=1)
+
+    return num_files
+
+
+class QuietRequestHandler(SimpleHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mirror_server(mirror_dir, port=0):
+    """
+    Serve the mirror over HTTP in a background thread so it can stand in for the live host, e.g. with
+    gameday.set_gameday_source(gameday.HttpGamedaySource(server_url))
+    :param mirror_dir: root directory of the mirror
+    :param port: port to listen on (default is any free port)
+    :return: the running server (stop it with shutdown()) and its base URL
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), partial(QuietRequestHandler, directory=mirror_dir))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, 'http://%s:%i/' % server.server_address
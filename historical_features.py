@@ -0,0 +1,314 @@
+"""
+historical_features.py
+Module used for building the as-of-date stats of every player of a past season from the season's game logs, so a
+season of training data costs one game log request per player instead of mining every slate of the season
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+import json
+import os
+import re
+
+import pandas as pd
+
+from baseball_reference import TableNotFound, get_all_table_row_dicts, get_game_log_url, get_leaderboard_url, \
+    get_pitcher_hand_index, get_player_id_index, innings_to_outs
+from beautiful_soup_helper import FETCH_EXCEPTIONS, get_request_count, get_uncommented_soup_from_url
+
+# Number of game logs requested at once by build_season_features
+HISTORY_FETCH_WORKERS = 6
+
+# Counting stats of the game logs summed into the as-of stats. Innings pitched are converted to outs.
+HITTER_GAME_LOG_STATS = ["PA", "AB", "R", "H", "2B", "3B", "HR", "RBI", "BB", "IBB", "SO", "HBP", "SH", "SF", "GDP",
+                         "SB", "CS"]
+PITCHER_GAME_LOG_STATS = ["Outs", "H", "R", "ER", "BB", "SO", "HR", "HBP", "BF", "Pit"]
+
+# Windows of days before the game date summed into the recent stats
+RECENT_WINDOWS = [7, 14]
+
+HITTERS_FILE_NAME = "hitters.parquet"
+PITCHERS_FILE_NAME = "pitchers.parquet"
+
+PLAYER_KEY_COLUMNS = ["player_id", "game_date", "game_number"]
+
+
+class GameLogStore(object):
+    """
+    Local copy of the raw game log rows of each player and season, one JSON file per player. The game logs of a
+    finished season do not change, so each one is only requested once, even across reruns of a build. The current
+    season is still being played and is not stored (see fetch_game_log_rows).
+    """
+
+    def __init__(self, store_dir: str):
+        """
+        :param store_dir: root directory of the store, laid out as year/player_type/player_id.json
+        """
+        self._store_dir = store_dir
+
+    def get_path(self, player_type: str, player_id: str, year: int) -> str:
+        return os.path.join(self._store_dir, str(year), player_type, player_id + ".json")
+
+    def get(self, player_type: str, player_id: str, year: int) -> [dict]:
+        """
+        :param player_type: "b" for hitters, "p" for pitchers
+        :return: the stored game log rows, None if the game log has not been fetched
+        """
+        path = self.get_path(player_type, player_id, year)
+        if not os.path.exists(path):
+            return None
+
+        with open(path) as game_log_file:
+            return json.load(game_log_file)
+
+    def put(self, player_type: str, player_id: str, year: int, rows: [dict]):
+        path = self.get_path(player_type, player_id, year)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "w") as game_log_file:
+            json.dump(rows, game_log_file)
+        os.replace(temporary_path, path)
+
+
+def fetch_game_log_rows(player_type: str, player_id: str, year: int, store: GameLogStore = None) -> [dict]:
+    """
+    Get the rows of a player's season game log, from the store if it was already fetched. Only the game logs of
+    finished seasons are stored, and a page without a game log (e.g. an error page) is never stored.
+    :param player_type: "b" for hitters, "p" for pitchers
+    :param player_id: Baseball Reference ID of the player
+    :param year: season of interest
+    :param store: GameLogStore the game log is read from and written to (default is to always request it)
+    :return: list of dictionaries of the game log's column labels to the row's values
+    """
+    if year >= date.today().year:
+        store = None
+    if store is not None:
+        rows = store.get(player_type, player_id, year)
+        if rows is not None:
+            return rows
+
+    table_name = "batting_gamelogs" if player_type == "b" else "pitching_gamelogs"
+    soup = get_uncommented_soup_from_url(get_game_log_url(player_id, year, player_type))
+    if soup is None:
+        return list()
+    try:
+        rows = get_all_table_row_dicts(soup, table_name)[1]
+    except TableNotFound:
+        return list()
+    # The header rows repeated through the table have no date
+    rows = [row for row in rows if row.get("Date", 0) != 0]
+
+    if store is not None:
+        store.put(player_type, player_id, year, rows)
+
+    return rows
+
+
+def parse_game_log_date(date_text: str, year: int) -> (datetime, int):
+    """
+    :param date_text: date of a game log row, e.g. "Apr 10", "Jul 4(2)" for the second game of a doubleheader or
+    "2016-04-10"
+    :param year: season of the game log
+    :return: date of the game and its number within the day (1 unless it is the second game of a doubleheader)
+    """
+    game_number = 1
+    doubleheader_match = re.search(r"\((\d)\)", date_text)
+    if doubleheader_match is not None:
+        game_number = int(doubleheader_match.group(1))
+    date_text = re.sub(r"\(\d\)", "", date_text).replace(u"\xa0", " ").strip()
+
+    try:
+        return datetime.strptime(date_text[:10], "%Y-%m-%d"), game_number
+    except ValueError:
+        return datetime.strptime("%s %i" % (date_text, year), "%b %d %Y"), game_number
+
+
+def to_number(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.
+
+
+def game_log_to_frame(player_type: str, player_id: str, year: int, rows: [dict]) -> pd.DataFrame:
+    """
+    :param player_type: "b" for hitters, "p" for pitchers
+    :param player_id: Baseball Reference ID of the player
+    :param year: season of the game log
+    :param rows: rows of the player's season game log
+    :return: DataFrame of one row per game with the game's keys and counting stats
+    """
+    stat_names = HITTER_GAME_LOG_STATS if player_type == "b" else PITCHER_GAME_LOG_STATS
+    game_rows = list()
+    for row in rows:
+        game_date, game_number = parse_game_log_date(row["Date"], year)
+        game_row = {"player_id": player_id,
+                    "game_date": game_date,
+                    "game_number": game_number,
+                    "team": row.get("Tm"),
+                    "opponent": row.get("Opp"),
+                    "is_home": row.get("") != "@"}
+        if player_type == "p":
+            row = dict(row, Outs=innings_to_outs(row.get("IP", 0)))
+            # Older game logs mark starts in the innings column (e.g. "GS-7"), newer ones have a GS column
+            game_row["is_start"] = str(row.get("Inngs", "")).startswith("GS") or str(row.get("GS", 0)) == "1"
+        for stat_name in stat_names:
+            game_row[stat_name] = to_number(row.get(stat_name, 0))
+        game_rows.append(game_row)
+
+    return pd.DataFrame(game_rows, columns=["player_id", "game_date", "game_number", "team", "opponent", "is_home"] +
+                        (["is_start"] if player_type == "p" else list()) + stat_names)
+
+
+def get_starters(pitcher_logs: pd.DataFrame, pitcher_hands: dict) -> pd.DataFrame:
+    """
+    :param pitcher_logs: game logs of every pitcher of the season
+    :param pitcher_hands: dictionary of the pitcher's Baseball Reference ID to "L" or "R"
+    :return: DataFrame of the starting pitcher and their throwing hand for each team's game, keyed by the date, the
+    pitching team (as "opponent", to join to the hitters) and the game number
+    """
+    starters = pitcher_logs.loc[pitcher_logs["is_start"].astype(bool),
+                                ["game_date", "team", "game_number", "player_id"]]
+    starters = starters.rename(columns={"team": "opponent", "player_id": "opposing_starter_id"})
+    starters["opposing_starter_hand"] = starters["opposing_starter_id"].map(pitcher_hands)
+
+    return starters.drop_duplicates(["game_date", "opponent", "game_number"])
+
+
+def get_as_of_stats(game_logs: pd.DataFrame, stat_names: [str], group_columns: [str], prefix: str) -> pd.DataFrame:
+    """
+    Sum the stats of every previous day of the season, so the stats of a game only include games before its date
+    :param game_logs: game logs with one row per game
+    :param stat_names: names of the stat columns to sum
+    :param group_columns: columns the sums are accumulated within, starting with "player_id"
+    :param prefix: prefix of the as-of stat columns
+    :return: DataFrame of the as-of stats, indexed by the group columns and the game date
+    """
+    daily_stats = game_logs.groupby(group_columns + ["game_date"])[stat_names].sum()
+    as_of_stats = daily_stats.groupby(level=group_columns).cumsum() - daily_stats
+    return as_of_stats.add_prefix(prefix)
+
+
+def get_recent_stats(game_logs: pd.DataFrame, stat_names: [str], window: int) -> pd.DataFrame:
+    """
+    :return: DataFrame of the stats of the window of days before each game date, indexed by the player and date
+    """
+    daily_stats = game_logs.groupby(["player_id", "game_date"])[stat_names].sum().reset_index(level="player_id")
+    recent_stats = daily_stats.groupby("player_id")[stat_names].rolling("%iD" % window, closed="left").sum()
+    return recent_stats.fillna(0.).add_prefix("last_%i_" % window)
+
+
+def add_as_of_features(game_logs: pd.DataFrame, stat_names: [str], by_hand: bool = False) -> pd.DataFrame:
+    """
+    Add the season-to-date, recent and (for hitters) vs-hand stats of each game, as they stood before the game date
+    :param game_logs: game logs of every player, with a "opposing_starter_hand" column if by_hand is True
+    :param stat_names: names of the stat columns
+    :param by_hand: True to add the stats of the games against starters throwing with the same hand as the game's
+    :return: the game logs with the game's own stats prefixed with "game_" and the as-of stat columns
+    """
+    features = game_logs.rename(columns={stat_name: "game_" + stat_name for stat_name in stat_names})
+    features = features.join(get_as_of_stats(game_logs, stat_names, ["player_id"], "season_"),
+                             on=["player_id", "game_date"])
+    for window in RECENT_WINDOWS:
+        features = features.join(get_recent_stats(game_logs, stat_names, window), on=["player_id", "game_date"])
+
+    if by_hand:
+        hand_stats = get_as_of_stats(game_logs.dropna(subset=["opposing_starter_hand"]), stat_names,
+                                     ["player_id", "opposing_starter_hand"], "vs_hand_")
+        features = features.join(hand_stats, on=["player_id", "opposing_starter_hand", "game_date"])
+
+    return features.sort_values(PLAYER_KEY_COLUMNS).reset_index(drop=True)
+
+
+def get_season_players(year: int) -> (list, list, dict):
+    """
+    :param year: season of interest
+    :return: Baseball Reference IDs of the season's hitters and pitchers, and the throwing hand of each pitcher
+    """
+    hitter_soup = get_uncommented_soup_from_url(get_leaderboard_url(year, "batting"))
+    pitcher_soup = get_uncommented_soup_from_url(get_leaderboard_url(year, "pitching"))
+    hitter_ids = sorted(set(get_player_id_index(hitter_soup, "players_standard_batting").values()))
+    pitcher_ids = sorted(set(get_player_id_index(pitcher_soup, "players_standard_pitching").values()))
+
+    return hitter_ids, pitcher_ids, get_pitcher_hand_index(pitcher_soup)
+
+
+def fetch_season_game_logs(player_type: str, player_ids: [str], year: int, store: GameLogStore = None,
+                           max_workers: int = HISTORY_FETCH_WORKERS) -> (pd.DataFrame, [str]):
+    """
+    :return: DataFrame of the game logs of every player, fetched concurrently, and the IDs of the players whose
+    game log could not be fetched (e.g. after a rate limit), which have no rows
+    """
+    def fetch_game_log(player_id):
+        try:
+            return game_log_to_frame(player_type, player_id, year,
+                                     fetch_game_log_rows(player_type, player_id, year, store)), False
+        except FETCH_EXCEPTIONS as e:
+            print("Failed to fetch the %i game log of %s (%s)" % (year, player_id, e))
+            return game_log_to_frame(player_type, player_id, year, list()), True
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        game_logs = list(executor.map(fetch_game_log, player_ids))
+
+    failed_ids = [player_id for player_id, (_, failed) in zip(player_ids, game_logs) if failed]
+    # An empty game log would turn the concatenated game_date column into objects
+    frames = [game_log for game_log, _ in game_logs if len(game_log) > 0] or \
+        [game_log_to_frame(player_type, None, year, list())]
+    return pd.concat(frames, ignore_index=True), failed_ids
+
+
+def write_partition_frame(partition_dir: str, file_name: str, frame: pd.DataFrame):
+    temporary_path = os.path.join(partition_dir, file_name + ".tmp")
+    frame.to_parquet(temporary_path, index=False)
+    os.replace(temporary_path, os.path.join(partition_dir, file_name))
+
+
+def write_feature_partitions(output_dir: str, file_name: str, features: pd.DataFrame) -> int:
+    """
+    Write the features of each game date to its own game_date=yyyy-mm-dd partition directory
+    :return: number of partitions written
+    """
+    num_partitions = 0
+    for game_date, date_features in features.groupby("game_date"):
+        partition_dir = os.path.join(output_dir, "game_date=" + game_date.date().isoformat())
+        os.makedirs(partition_dir, exist_ok=True)
+        write_partition_frame(partition_dir, file_name, date_features.drop(columns="game_date"))
+        num_partitions += 1
+
+    return num_partitions
+
+
+def build_season_features(year: int, output_dir: str, game_log_dir: str = None,
+                          max_workers: int = HISTORY_FETCH_WORKERS) -> dict:
+    """
+    Build the as-of-date stats of every hitter and pitcher for every game of a season. The season's leaderboards
+    list the players, each player's game log is requested once and the season-to-date, last 7 and 14 day and
+    vs-hand stats of each game are rebuilt locally from the game logs.
+    :param year: season of interest
+    :param output_dir: root directory of the dataset, with one game_date=yyyy-mm-dd partition per date
+    :param game_log_dir: directory of the GameLogStore (default is a directory in the output directory)
+    :param max_workers: number of game logs requested at once
+    :return: dictionary of the number of hitter rows, pitcher rows, partitions and requests of the build, and
+    the "failed" IDs of the players whose game log could not be fetched, so the season can be built again
+    """
+    start_request_count = get_request_count()
+    store = GameLogStore(game_log_dir or os.path.join(output_dir, "_game_logs"))
+
+    hitter_ids, pitcher_ids, pitcher_hands = get_season_players(year)
+    print("Building %i features for %i hitters and %i pitchers" % (year, len(hitter_ids), len(pitcher_ids)))
+    hitter_logs, failed_hitter_ids = fetch_season_game_logs("b", hitter_ids, year, store, max_workers)
+    pitcher_logs, failed_pitcher_ids = fetch_season_game_logs("p", pitcher_ids, year, store, max_workers)
+
+    hitter_logs = hitter_logs.merge(get_starters(pitcher_logs, pitcher_hands),
+                                    on=["game_date", "opponent", "game_number"], how="left")
+    hitter_features = add_as_of_features(hitter_logs, HITTER_GAME_LOG_STATS, by_hand=True)
+    pitcher_features = add_as_of_features(pitcher_logs, PITCHER_GAME_LOG_STATS)
+
+    num_partitions = write_feature_partitions(output_dir, HITTERS_FILE_NAME, hitter_features)
+    write_feature_partitions(output_dir, PITCHERS_FILE_NAME, pitcher_features)
+
+    return {"hitters": len(hitter_features),
+            "pitchers": len(pitcher_features),
+            "partitions": num_partitions,
+            "requests": get_request_count() - start_request_count,
+            "failed": failed_hitter_ids + failed_pitcher_ids}
@@ -0,0 +1,233 @@
+"""
+plate_appearance_store.py
+Module used for persisting Stathead plate appearance events so batter vs. pitcher stats can be computed locally
+"""
+
+import sqlite3
+from datetime import date, datetime
+
+import selenium.webdriver
+
+from stathead import get_vs_pitcher_gamelogs
+
+# Plate appearance outcome counters produced by stathead.interpret_plate_appearance_result_string
+PLATE_APPEARANCE_STAT_KEYS = ["PA", "AB", "H", "2B", "3B", "HR", "RBI", "BB", "SO", "SH", "SF", "IBB", "HBP", "GDP"]
+
+# Column name and SQLite type of every field stored for a plate appearance. The names match the keys of the
+# dictionaries returned by stathead.get_vs_pitcher_gamelogs so events round-trip unchanged.
+EVENT_COLUMNS = [("HitterId", "TEXT NOT NULL"),
+                 ("PitcherId", "TEXT NOT NULL"),
+                 ("Date", "TEXT NOT NULL"),
+                 ("Sequence", "INTEGER NOT NULL"),
+                 ("HitterTeam", "TEXT"),
+                 ("PitcherTeam", "TEXT"),
+                 ("ScoreString", "TEXT"),
+                 ("Inning", "TEXT"),
+                 ("RunnerOnFirst", "INTEGER"),
+                 ("RunnerOnSecond", "INTEGER"),
+                 ("RunnerOnThird", "INTEGER"),
+                 ("Outs", "INTEGER"),
+                 ("Pitches", "INTEGER"),
+                 ("Balls", "INTEGER"),
+                 ("Strikes", "INTEGER"),
+                 ("PlayDescription", "TEXT"),
+                 ("is_postseason", "INTEGER")] + [(key, "REAL") for key in PLATE_APPEARANCE_STAT_KEYS]
+
+BOOLEAN_COLUMNS = ["RunnerOnFirst", "RunnerOnSecond", "RunnerOnThird", "is_postseason"]
+
+
+def quote_column(column_name: str) -> str:
+    return '"%s"' % column_name
+
+
+def date_to_key(event_date) -> str:
+    """ Convert the date of a plate appearance to the ISO string stored in the database
+    :param event_date: date or datetime of the plate appearance
+    :return: ISO representation of the date (yyyy-mm-dd)
+    """
+    if isinstance(event_date, datetime):
+        event_date = event_date.date()
+    return event_date.isoformat()
+
+
+def key_to_date(date_key: str) -> datetime:
+    return datetime.combine(date.fromisoformat(date_key), datetime.min.time())
+
+
+class PlateAppearanceStore(object):
+    """
+    Persistent store of plate appearance events keyed by hitter, pitcher, date and sequence. Matchups are synced
+    incrementally from Stathead so that only matchups with new games are requested again.
+    """
+
+    def __init__(self, database_path: str = ":memory:"):
+        """
+        :param database_path: path to the SQLite database file (default is an in-memory database)
+        :type database_path: str
+        """
+        self._connection = sqlite3.connect(database_path)
+        self._create_tables()
+
+    def _create_tables(self):
+        column_definitions = ", ".join("%s %s" % (quote_column(name), sql_type) for name, sql_type in EVENT_COLUMNS)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS plate_appearances (%s, "
+                                 "PRIMARY KEY (HitterId, PitcherId, Date, Sequence))" % column_definitions)
+        # Databases created before a column was added are migrated in place
+        existing_columns = [row[1] for row in self._connection.execute("PRAGMA table_info(plate_appearances)")]
+        for name, sql_type in EVENT_COLUMNS:
+            if name not in existing_columns:
+                self._connection.execute("ALTER TABLE plate_appearances ADD COLUMN %s %s" %
+                                         (quote_column(name), sql_type))
+        self._connection.execute("CREATE TABLE IF NOT EXISTS matchup_sync (HitterId TEXT NOT NULL, "
+                                 "PitcherId TEXT NOT NULL, LastSynced TEXT NOT NULL, "
+                                 "PRIMARY KEY (HitterId, PitcherId))")
+        self._connection.commit()
+
+    def close(self):
+        self._connection.close()
+
+    def insert_events(self, events: [dict]) -> int:
+        """
+        Insert the given plate appearances, ignoring any that are already stored
+        :param events: plate appearance dictionaries as returned by stathead.get_vs_pitcher_gamelogs
+        :type events: [dict]
+        :return: number of plate appearances that were not previously stored
+        :rtype: int
+        """
+        column_names = [name for name, _ in EVENT_COLUMNS]
+        statement = "INSERT OR IGNORE INTO plate_appearances (%s) VALUES (%s)" % \
+                    (", ".join(quote_column(name) for name in column_names), ", ".join("?" * len(column_names)))
+
+        rows = list()
+        for event in events:
+            # Some early games do not have a date populated, so they cannot be keyed
+            if event.get("Date") is None:
+                continue
+            row = list()
+            for name in column_names:
+                value = event.get(name)
+                if name == "Date":
+                    value = date_to_key(value)
+                elif name in BOOLEAN_COLUMNS and value is not None:
+                    value = int(value)
+                row.append(value)
+            rows.append(row)
+
+        num_rows_before = self._connection.total_changes
+        self._connection.executemany(statement, rows)
+        self._connection.commit()
+
+        return self._connection.total_changes - num_rows_before
+
+    def get_last_event_date(self, hitter_id: str, pitcher_id: str) -> datetime:
+        """
+        :return: date of the most recent stored plate appearance for the matchup, None if there are none
+        :rtype: datetime
+        """
+        result = self._connection.execute("SELECT MAX(Date) FROM plate_appearances WHERE HitterId = ? AND "
+                                          "PitcherId = ?", (hitter_id, pitcher_id)).fetchone()[0]
+        if result is None:
+            return None
+
+        return key_to_date(result)
+
+    def get_last_synced(self, hitter_id: str, pitcher_id: str) -> date:
+        """
+        :return: date the matchup was last synced from Stathead, None if it has never been synced. All plate
+        appearances before this date are stored.
+        :rtype: date
+        """
+        result = self._connection.execute("SELECT LastSynced FROM matchup_sync WHERE HitterId = ? AND "
+                                          "PitcherId = ?", (hitter_id, pitcher_id)).fetchone()
+        if result is None:
+            return None
+
+        return date.fromisoformat(result[0])
+
+    def needs_sync(self, hitter_id: str, pitcher_id: str, game_dates: [date]) -> bool:
+        """
+        Determine whether the matchup may have plate appearances that are not stored yet
+        :param hitter_id: Stathead ID of the hitter
+        :param pitcher_id: Stathead ID of the pitcher
+        :param game_dates: dates of the games the hitter and pitcher have both played in (e.g. the games between
+        their teams). The matchup is only requested again if one of these games happened on or after the last sync.
+        :return: True if the matchup should be requested from Stathead
+        """
+        last_synced = self.get_last_synced(hitter_id, pitcher_id)
+        if last_synced is None:
+            return True
+
+        return any(date_to_key(game_date) >= last_synced.isoformat() for game_date in game_dates)
+
+    def sync_matchup(self, hitter_id: str, hitter_last_name: str, pitcher_id: str, credentials: (str, str),
+                     game_dates: [date], browser: selenium.webdriver.Firefox = None) -> int:
+        """
+        Request the matchup from Stathead if it may have new games and store the new plate appearances
+        :param hitter_id: Stathead ID of the hitter
+        :param hitter_last_name: last name of the hitter (used to interpret the play descriptions)
+        :param pitcher_id: Stathead ID of the pitcher
+        :param credentials: Stathead username and password
+        :param game_dates: dates of the games the hitter and pitcher have both played in (see needs_sync)
+        :param browser: browser already logged in to Stathead (default is a new login)
+        :return: number of new plate appearances stored
+        """
+        if not self.needs_sync(hitter_id, pitcher_id, game_dates):
+            return 0
+
+        last_event_date = self.get_last_event_date(hitter_id, pitcher_id)
+        events = get_vs_pitcher_gamelogs(hitter_id, hitter_last_name, pitcher_id, credentials, browser)
+        if last_event_date is not None:
+            events = [event for event in events if event["Date"] is not None and event["Date"] >= last_event_date]
+        num_new_events = self.insert_events(events)
+
+        self._connection.execute("INSERT OR REPLACE INTO matchup_sync (HitterId, PitcherId, LastSynced) "
+                                 "VALUES (?, ?, ?)", (hitter_id, pitcher_id, date.today().isoformat()))
+        self._connection.commit()
+
+        return num_new_events
+
+    def get_events(self, hitter_id: str, pitcher_id: str, before_date: date = None) -> [dict]:
+        """
+        Get the stored plate appearances for the matchup in chronological order
+        :param hitter_id: Stathead ID of the hitter
+        :param pitcher_id: Stathead ID of the pitcher
+        :param before_date: only include plate appearances before this date (default is all of them)
+        :return: plate appearance dictionaries in the same form as stathead.get_vs_pitcher_gamelogs
+        """
+        column_names = [name for name, _ in EVENT_COLUMNS]
+        query = "SELECT %s FROM plate_appearances WHERE HitterId = ? AND PitcherId = ?" % \
+                ", ".join(quote_column(name) for name in column_names)
+        parameters = [hitter_id, pitcher_id]
+        if before_date is not None:
+            query += " AND Date < ?"
+            parameters.append(date_to_key(before_date))
+        query += " ORDER BY Date, Sequence"
+
+        events = list()
+        for row in self._connection.execute(query, parameters):
+            event = dict(zip(column_names, row))
+            event["Date"] = key_to_date(event["Date"])
+            for name in BOOLEAN_COLUMNS:
+                if event[name] is not None:
+                    event[name] = bool(event[name])
+            events.append(event)
+
+        return events
+
+    def get_vs_pitcher_stats(self, hitter_id: str, pitcher_id: str, as_of_date: date = None) -> dict:
+        """
+        Aggregate the hitter's stats against the pitcher from the stored plate appearances
+        :param hitter_id: Stathead ID of the hitter
+        :param pitcher_id: Stathead ID of the pitcher
+        :param as_of_date: only include plate appearances before this date, i.e. the pregame stats for a game on
+        this date (default is all of them)
+        :return: dictionary of the summed plate appearance stats
+        """
+        query = "SELECT %s FROM plate_appearances WHERE HitterId = ? AND PitcherId = ?" % \
+                ", ".join("TOTAL(%s)" % quote_column(key) for key in PLATE_APPEARANCE_STAT_KEYS)
+        parameters = [hitter_id, pitcher_id]
+        if as_of_date is not None:
+            query += " AND Date < ?"
+            parameters.append(date_to_key(as_of_date))
+
+        return dict(zip(PLATE_APPEARANCE_STAT_KEYS, self._connection.execute(query, parameters).fetchone()))
@@ -8,11 +8,10 @@ from datetime import datetime, date
 import bs4
 import selenium.webdriver.remote.webelement
 from selenium import webdriver
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import NoSuchElementException
-from time import sleep
+
+from selenium_helper import DEFAULT_TIMEOUT, wait_for_clickable, wait_for_stable_element_count
 
 from team_dict import *
 from baseball_reference import get_team_info, TableNotFound
@@ -112,13 +111,15 @@ class SeleniumRotowireMiner(object):
     all the necessary data.
     """
 
-    def get_game_lineups(self, url: str = None, game_date: date = None) -> [Game]:
+    def get_game_lineups(self, url: str = None, game_date: date = None, timeout: float = DEFAULT_TIMEOUT) -> [Game]:
         """
         Get the list of Game objects representing all players participating in the games from the input url and date
         :param url: URL to open with Selenium containing the daily lineups (default is the daily linueps page from today)
         :type url: str
         :param game_date: date of the game (default is today)
         :type game_date: date
+        :param timeout: maximum number of seconds to wait for each part of the page to render
+        :type timeout: float
         :return: list of Game objects
         :rtype: [Game]
         """
@@ -135,7 +136,8 @@ class SeleniumRotowireMiner(object):
 
         # Close promotional modal
         try:
-            modal_dismiss_button = WebDriverWait(browser, 20).until(EC.element_to_be_clickable((By.ID, "close-vwo-ps-modal")))
+            modal_dismiss_button = wait_for_clickable(browser, (By.ID, "close-vwo-ps-modal"), timeout,
+                                                      label="rotowire_modal")
             modal_dismiss_button.click()
         except selenium.common.exceptions.TimeoutException:
             print("Did not encounter pop-up modal. Proceeding...")
@@ -143,17 +145,20 @@ class SeleniumRotowireMiner(object):
         main_node = browser.find_element(By.TAG_NAME, "main").find_element(By.XPATH, ".//div[@class='flex-row flex-wrap mb-10']")
         dfs_show_salaries_node = main_node.find_element(By.XPATH, ".//div[@data-name='lineups-mlb-showsalaries']")
         # TODO this isn't necessarily correct because this won't be the class name if the
-        dfs_yes_button = WebDriverWait(dfs_show_salaries_node, 20).until(EC.element_to_be_clickable((By.CLASS_NAME, "toggle-tab")))
+        dfs_yes_button = wait_for_clickable(dfs_show_salaries_node, (By.CLASS_NAME, "toggle-tab"), timeout,
+                                            label="rotowire_salaries_toggle")
         dfs_yes_button.click()
         # TODO may also want to click the button determining whether the started games are hidden or not
         # show_display_settings_button = WebDriverWait(browser, 20).until(EC.element_to_be_clickable((By.CLASS_NAME, "revealer btn soft size-1 pad-2")))
         # show_display_settings_button.click()
 
-        # Sleep for 10 seconds to allow the user to provide some input
-        # TODO this is pretty hacky
-        sleep(10)
-
-        lineup_nodes = browser.find_elements(By.CLASS_NAME, LINEUP_LABEL)
+        # Wait for the lineups to finish rendering rather than sleeping for a fixed amount of time
+        try:
+            lineup_nodes = wait_for_stable_element_count(browser, (By.CLASS_NAME, LINEUP_LABEL), timeout,
+                                                         label="rotowire_lineups")
+        except selenium.common.exceptions.TimeoutException:
+            # No lineups have been posted for the slate yet
+            lineup_nodes = list()
         games = list()
         for lineup_node in lineup_nodes:
             home_team_lineup = list()
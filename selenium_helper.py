@@ -0,0 +1,150 @@
+"""
+selenium_helper.py
+Module used for implementing condition based waits for pages rendered with Selenium
+"""
+
+import threading
+import time
+
+import selenium.webdriver.remote.webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+DEFAULT_TIMEOUT = 20.0
+DEFAULT_POLL_FREQUENCY = 0.25
+DEFAULT_PAGE_LOAD_ATTEMPTS = 3
+
+
+class WaitTimings(object):
+    """
+    Thread-safe record of how long each labelled wait took so slow pages can be identified
+    """
+
+    def __init__(self):
+        self._durations = dict()
+        self._lock = threading.Lock()
+
+    def record(self, label: str, duration: float):
+        with self._lock:
+            self._durations.setdefault(label, list()).append(duration)
+
+    def get_durations(self, label: str) -> [float]:
+        with self._lock:
+            return list(self._durations.get(label, list()))
+
+    def summary(self) -> dict:
+        """
+        :return: dictionary of wait label to the number of waits, total seconds and longest wait in seconds
+        """
+        with self._lock:
+            return {label: (len(durations), sum(durations), max(durations))
+                    for label, durations in self._durations.items()}
+
+    def clear(self):
+        with self._lock:
+            self._durations = dict()
+
+
+WAIT_TIMINGS = WaitTimings()
+
+
+class element_count_is_stable(object):
+    """
+    Expected condition that is met once at least min_count elements match the locator and the number of matches
+    has not changed for stable_polls consecutive polls. Used for pages that render table rows incrementally.
+    """
+
+    def __init__(self, locator: (str, str), min_count: int = 1, stable_polls: int = 2):
+        self._locator = locator
+        self._min_count = min_count
+        self._stable_polls = stable_polls
+        self._last_count = None
+        self._num_stable_polls = 0
+
+    def __call__(self, driver):
+        elements = driver.find_elements(*self._locator)
+        if len(elements) == self._last_count:
+            self._num_stable_polls += 1
+        else:
+            self._last_count = len(elements)
+            self._num_stable_polls = 0
+
+        if len(elements) >= self._min_count and self._num_stable_polls >= self._stable_polls:
+            return elements
+
+        return False
+
+
+def document_is_ready(driver) -> bool:
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def timed_wait(driver, condition, timeout: float = DEFAULT_TIMEOUT, label: str = None,
+               poll_frequency: float = DEFAULT_POLL_FREQUENCY):
+    """
+    Wait until the condition is met and record how long it took
+    :param driver: web driver (or web element) to evaluate the condition against
+    :param condition: Selenium expected condition
+    :param timeout: maximum number of seconds to wait
+    :param label: name the wait is recorded under in WAIT_TIMINGS (default is the condition's class name)
+    :param poll_frequency: number of seconds in between evaluations of the condition
+    :return: the value returned by the condition once it was met
+    :raises TimeoutException: the condition was not met within the timeout
+    """
+    if label is None:
+        label = type(condition).__name__
+
+    start_time = time.perf_counter()
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency).until(condition)
+    finally:
+        WAIT_TIMINGS.record(label, time.perf_counter() - start_time)
+
+
+def wait_for_element(driver, locator: (str, str), timeout: float = DEFAULT_TIMEOUT, label: str = None):
+    return timed_wait(driver, EC.presence_of_element_located(locator), timeout, label)
+
+
+def wait_for_clickable(driver, locator: (str, str), timeout: float = DEFAULT_TIMEOUT, label: str = None):
+    return timed_wait(driver, EC.element_to_be_clickable(locator), timeout, label)
+
+
+def wait_for_stable_element_count(driver, locator: (str, str), timeout: float = DEFAULT_TIMEOUT,
+                                  min_count: int = 1, stable_polls: int = 2, label: str = None) -> list:
+    """
+    Wait until the elements matching the locator have finished rendering
+    :return: list of the matching elements
+    """
+    return timed_wait(driver, element_count_is_stable(locator, min_count, stable_polls), timeout, label)
+
+
+def load_page(browser: selenium.webdriver.remote.webdriver.WebDriver, url: str, timeout: float = DEFAULT_TIMEOUT,
+              max_attempts: int = DEFAULT_PAGE_LOAD_ATTEMPTS, label: str = None):
+    """
+    Open the URL and wait until the document is ready, reloading the page if the browser reports an error
+    :param browser: web driver used to open the page
+    :param url: absolute URL of the page
+    :param timeout: maximum number of seconds to wait for each attempt to load the page
+    :param max_attempts: maximum number of times to request the page
+    :param label: name the wait is recorded under in WAIT_TIMINGS (default is "load_page")
+    :raises WebDriverException: the page could not be loaded in any of the attempts
+    """
+    if label is None:
+        label = "load_page"
+
+    # The browser is shared with the caller, so its own page load timeout is restored afterwards
+    previous_timeout = browser.timeouts.page_load
+    browser.set_page_load_timeout(timeout)
+    try:
+        for attempt in range(max_attempts):
+            try:
+                browser.get(url)
+                timed_wait(browser, document_is_ready, timeout, label)
+                return
+            except WebDriverException as e:
+                if attempt + 1 >= max_attempts:
+                    raise e
+                print("Failed to load %s (%s). Trying again." % (url, type(e).__name__))
+    finally:
+        browser.set_page_load_timeout(previous_timeout)
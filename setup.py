@@ -7,6 +7,9 @@ setup(name='mlbscrape',
       version='1.0.1',
       description='Python package for mining MLB data',
       url='https://github.com/fultoncjb/mlb-scraper',
-      py_modules=['baseball_reference', 'stat_miner', 'rotowire', 'draft_kings', 'team_dict', 'beautiful_soup_helper', 'fan_graphs', 'stathead'],
-      install_requires=['bidict', 'bs4', 'lxml', 'requests', 'selenium', 'pyyaml']
+      py_modules=['baseball_reference', 'stat_miner', 'rotowire', 'draft_kings', 'team_dict', 'beautiful_soup_helper',
+                  'fan_graphs', 'stathead', 'plate_appearance_store', 'selenium_helper', 'gameday',
+                  'gameday_backfill', 'gameday_mirror', 'slate_checkpoint', 'historical_features',
+                  'telemetry'],
+      install_requires=['bidict', 'bs4', 'lxml', 'requests', 'selenium', 'pyyaml', 'pandas', 'pyarrow']
      )
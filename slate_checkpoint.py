@@ -0,0 +1,169 @@
+"""
+slate_checkpoint.py
+Module used for checkpointing the units of a slate run so that a rerun only mines what did not complete
+"""
+
+import json
+import pickle
+import sqlite3
+from datetime import date
+
+# Types of the units recorded in the failure report
+HITTER_UNIT_TYPE = "hitter"
+PITCHER_UNIT_TYPE = "pitcher"
+GAME_UNIT_TYPE = "game"
+
+
+class SlateCheckpoint(object):
+    """
+    Persistent store of the completed units of slate runs: the Baseball Reference ID of each player, the stats of
+    each player for a game, the park factors of each home team and the result of each game. Every unit is written
+    as soon as it completes, so a rerun of the same slate (e.g. after a late lineup change or a failed request)
+    skips the completed units and only mines the rest. The failures of the last run of each slate date are kept
+    as a report.
+    """
+
+    def __init__(self, database_path: str = ":memory:"):
+        """
+        :param database_path: path to the SQLite database file (default is an in-memory database)
+        :type database_path: str
+        """
+        self._connection = sqlite3.connect(database_path)
+        self._create_tables()
+
+    def _create_tables(self):
+        self._connection.execute("CREATE TABLE IF NOT EXISTS player_ids (PlayerType TEXT NOT NULL, "
+                                 "Name TEXT NOT NULL, Team TEXT NOT NULL, Year INTEGER NOT NULL, "
+                                 "BaseballReferenceId TEXT NOT NULL, PRIMARY KEY (PlayerType, Name, Team, Year))")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS player_stats (SlateDate TEXT NOT NULL, "
+                                 "UnitKey TEXT NOT NULL, Stats TEXT NOT NULL, PRIMARY KEY (SlateDate, UnitKey))")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS park_factors (SlateDate TEXT NOT NULL, "
+                                 "Team TEXT NOT NULL, HitterFactor INTEGER, PitcherFactor INTEGER, "
+                                 "PRIMARY KEY (SlateDate, Team))")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS game_results (SlateDate TEXT NOT NULL, "
+                                 "GameKey TEXT NOT NULL, Result BLOB NOT NULL, PRIMARY KEY (SlateDate, GameKey))")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS failures (SlateDate TEXT NOT NULL, "
+                                 "UnitType TEXT NOT NULL, Name TEXT NOT NULL, Team TEXT, Reason TEXT NOT NULL)")
+        self._connection.commit()
+
+    def close(self):
+        self._connection.close()
+
+    def get_player_id(self, player_type: str, player_key: (str, str, int)) -> str:
+        """
+        :param player_type: "b" for hitters, "p" for pitchers
+        :param player_key: name, Baseball Reference team and year of the player
+        :return: the player's Baseball Reference ID, None if it has not been resolved
+        """
+        result = self._connection.execute("SELECT BaseballReferenceId FROM player_ids WHERE PlayerType = ? AND "
+                                          "Name = ? AND Team = ? AND Year = ?", (player_type,) + player_key).fetchone()
+        if result is None:
+            return None
+
+        return result[0]
+
+    def save_player_id(self, player_type: str, player_key: (str, str, int), baseball_reference_id: str):
+        self._connection.execute("INSERT OR REPLACE INTO player_ids (PlayerType, Name, Team, Year, "
+                                 "BaseballReferenceId) VALUES (?, ?, ?, ?, ?)",
+                                 (player_type,) + player_key + (baseball_reference_id,))
+        self._connection.commit()
+
+    def get_player_stats(self, slate_date: date, unit_key: str) -> dict:
+        """
+        :param slate_date: date of the slate
+        :param unit_key: key of the player's unit, unique within the slate
+        :return: dictionary of stat split to the stats of the split, None if the unit has not completed
+        """
+        result = self._connection.execute("SELECT Stats FROM player_stats WHERE SlateDate = ? AND UnitKey = ?",
+                                          (slate_date.isoformat(), unit_key)).fetchone()
+        if result is None:
+            return None
+
+        return json.loads(result[0])
+
+    def save_player_stats(self, slate_date: date, unit_key: str, stats: dict):
+        self._connection.execute("INSERT OR REPLACE INTO player_stats (SlateDate, UnitKey, Stats) VALUES (?, ?, ?)",
+                                 (slate_date.isoformat(), unit_key, json.dumps(stats)))
+        self._connection.commit()
+
+    def get_park_factors(self, slate_date: date, team: str) -> (int, int):
+        """
+        :param slate_date: date of the slate
+        :param team: Baseball Reference abbreviation of the home team
+        :return: hitter and pitcher park factors, None if they have not been mined
+        """
+        result = self._connection.execute("SELECT HitterFactor, PitcherFactor FROM park_factors WHERE "
+                                          "SlateDate = ? AND Team = ?", (slate_date.isoformat(), team)).fetchone()
+        if result is None:
+            return None
+
+        return tuple(result)
+
+    def save_park_factors(self, slate_date: date, team: str, park_factors: (int, int)):
+        self._connection.execute("INSERT OR REPLACE INTO park_factors (SlateDate, Team, HitterFactor, "
+                                 "PitcherFactor) VALUES (?, ?, ?, ?)",
+                                 (slate_date.isoformat(), team) + tuple(park_factors))
+        self._connection.commit()
+
+    def get_game_result(self, slate_date: date, game_key: str):
+        """
+        :param slate_date: date of the slate
+        :param game_key: key of the game, unique within the slate
+        :return: the stored result of the game, None if the game has not completed
+        """
+        result = self._connection.execute("SELECT Result FROM game_results WHERE SlateDate = ? AND GameKey = ?",
+                                          (slate_date.isoformat(), game_key)).fetchone()
+        if result is None:
+            return None
+
+        return pickle.loads(result[0])
+
+    def save_game_result(self, slate_date: date, game_key: str, game_result):
+        self._connection.execute("INSERT OR REPLACE INTO game_results (SlateDate, GameKey, Result) VALUES (?, ?, ?)",
+                                 (slate_date.isoformat(), game_key, pickle.dumps(game_result)))
+        self._connection.commit()
+
+    def clear_failures(self, slate_date: date):
+        """
+        Forget the failures of the previous run of the slate, called at the start of a run
+        """
+        self._connection.execute("DELETE FROM failures WHERE SlateDate = ?", (slate_date.isoformat(),))
+        self._connection.commit()
+
+    def record_failure(self, slate_date: date, unit_type: str, name: str, team: str, reason: str):
+        """
+        :param slate_date: date of the slate
+        :param unit_type: HITTER_UNIT_TYPE, PITCHER_UNIT_TYPE or GAME_UNIT_TYPE
+        :param name: name of the player (or key of the game)
+        :param team: team of the player (None for games)
+        :param reason: why the unit could not be completed
+        """
+        self._connection.execute("INSERT INTO failures (SlateDate, UnitType, Name, Team, Reason) VALUES "
+                                 "(?, ?, ?, ?, ?)", (slate_date.isoformat(), unit_type, name, team, reason))
+        self._connection.commit()
+
+    def get_failures(self, slate_date: date) -> [dict]:
+        """
+        :return: dictionaries of the unit type, name, team and reason of every failure of the slate's last run
+        """
+        rows = self._connection.execute("SELECT UnitType, Name, Team, Reason FROM failures WHERE SlateDate = ? "
+                                        "ORDER BY rowid", (slate_date.isoformat(),)).fetchall()
+        return [dict(zip(["UnitType", "Name", "Team", "Reason"], row)) for row in rows]
+
+    def get_failure_report(self, slate_date: date) -> str:
+        """
+        :return: human-readable list of the failures of the slate's last run
+        """
+        failures = self.get_failures(slate_date)
+        if len(failures) == 0:
+            return "No failures for the %s slate" % slate_date.isoformat()
+
+        lines = ["%i failures for the %s slate:" % (len(failures), slate_date.isoformat())]
+        for failure in failures:
+            if failure["Team"] is None:
+                lines.append("  %s %s: %s" % (failure["UnitType"], failure["Name"], failure["Reason"]))
+            else:
+                lines.append("  %s %s (%s): %s" % (failure["UnitType"], failure["Name"], failure["Team"],
+                                                   failure["Reason"]))
+
+        return "\n".join(lines)
@@ -4,10 +4,76 @@ Top-level module used for mining stats for particular players and games
 """
 
 from rotowire import *
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import re
+import unicodedata
 from multiprocessing import Pool
+from pandas import DataFrame
+import pandas as pd
 from team_dict import *
 from baseball_reference import *
 from stathead import get_hitter_id
+from beautiful_soup_helper import FETCH_EXCEPTIONS, PageCache, set_page_cache
+from slate_checkpoint import SlateCheckpoint, HITTER_UNIT_TYPE, PITCHER_UNIT_TYPE, GAME_UNIT_TYPE
+from telemetry import CACHE_LOOKUP_EVENT, PLAYER_MINED_EVENT, emit, timed
+import baseball_reference
+import sqlite3
+import threading
+
+# Number of pages fetched at once when mining a slate
+SLATE_FETCH_WORKERS = 6
+
+# Ways of running the games of get_pregame_stats_wrapper, which mine_pregame_stats uses instead of mine_slate when
+# given one. Mining mostly waits on requests, so the threads and asyncio modes run in this process and share its
+# session and page cache. The processes mode pays for starting workers and pickling games and is only worth it
+# when parsing, not the network, is the bottleneck.
+THREADS_EXECUTION_MODE = "threads"
+ASYNCIO_EXECUTION_MODE = "asyncio"
+PROCESSES_EXECUTION_MODE = "processes"
+EXECUTION_MODES = [THREADS_EXECUTION_MODE, ASYNCIO_EXECUTION_MODE, PROCESSES_EXECUTION_MODE]
+
+# Number of games mined at once by get_pregame_stats_wrapper
+PREGAME_STATS_WORKERS = 6
+
+# Stat splits of the miners, used as column prefixes of the slate tables (e.g. "season_HR")
+HITTER_STAT_SPLITS = ["career", "vs_hand", "recent", "season", "vs_pitcher"]
+PITCHER_STAT_SPLITS = ["career", "recent", "season"]
+
+# Number of player stats kept in memory by a PlayerStatCache
+PLAYER_STAT_CACHE_SIZE = 4096
+
+# Stat kinds that barely move with a day's games, so they are cached for the week (as of its Monday) instead of for
+# the day. The other kinds (season, recent and vs. pitcher stats) roll daily. Both are dropped by
+# PlayerStatCache.expire once their date has passed.
+STABLE_STAT_KINDS = ["career", "vs_hand"]
+
+UMPIRE_FACTORS_URL = "https://swishanalytics.com/mlb/mlb-umpire-factors"
+UMPIRE_FACTORS_FILE_NAME = "umpire_factors_%s.parquet"
+UMPIRE_TABLE_NUM_CELLS = 15
+
+# Column name, index of the cell in the umpire table, suffix removed from the cell and divisor of each umpire factor
+UMPIRE_FACTOR_COLUMNS = [("K %", 3, "%", 100.),
+                         ("BB %", 4, "%", 100.),
+                         ("RPG", 5, "", 1.),
+                         ("BA", 6, "", 1.),
+                         ("OBP", 7, "", 1.),
+                         ("SLG", 8, "", 1.),
+                         ("K Boost", 9, "x", 1.),
+                         ("BB Boost", 10, "x", 1.),
+                         ("R Boost", 11, "x", 1.),
+                         ("BA Boost", 12, "x", 1.),
+                         ("OBP Boost", 13, "x", 1.),
+                         ("SLG Boost", 14, "x", 1.)]
+
+GAME_KEY_COLUMNS = ["game_index", "game_date", "game_time", "away_team", "home_team"]
+HITTER_KEY_COLUMNS = ["game_index", "is_home", "batting_order_position", "baseball_reference_id"]
+PITCHER_KEY_COLUMNS = ["game_index", "is_home", "baseball_reference_id"]
+LINEUP_KEY_COLUMNS = ["batting_order_position", "name", "rotowire_id", "baseball_reference_id"]
 
 
 class NoGamesFound(Exception):
@@ -15,30 +81,320 @@ class NoGamesFound(Exception):
         super(NoGamesFound, self).__init__("No games found.")
 
 
-def get_pregame_stats_wrapper(games, threading_enabled=True):
+def get_pregame_stats_wrapper(games, threading_enabled=True, execution_mode=THREADS_EXECUTION_MODE,
+                              max_workers=PREGAME_STATS_WORKERS, checkpoint=None):
+    """ Mine the pregame stats of every game. A game that fails is recorded in the checkpoint's failure report
+    instead of failing the slate, and each completed game is saved as soon as it completes, so a rerun only
+    mines the games that are not in the checkpoint yet.
+    :param games: list of Game objects
+    :param threading_enabled: mine several games at once, otherwise one game after the other
+    :param execution_mode: one of EXECUTION_MODES
+    :param max_workers: number of games mined at once
+    :param checkpoint: SlateCheckpoint of the previous runs (default is a fresh in-memory checkpoint)
+    :return: SlateStats of the games, in the order of the games. Games that failed have no players.
+    """
+    if execution_mode not in EXECUTION_MODES:
+        raise ValueError("Unknown execution mode %s (expected one of %s)" % (execution_mode, EXECUTION_MODES))
 
-    if threading_enabled:
-        thread_pool = Pool(6)
-        thread_pool.map(get_pregame_stats, games)
-    else:
-        for game in games:
-            get_pregame_stats(game)
+    if checkpoint is None:
+        checkpoint = SlateCheckpoint()
+    for slate_date in set(game.game_date for game in games):
+        checkpoint.clear_failures(slate_date)
+
+    game_results = [checkpoint.get_game_result(game.game_date, get_game_result_key(game)) for game in games]
+    remaining_indexes = [game_index for game_index, game_result in enumerate(game_results) if game_result is None]
+    remaining_games = [games[game_index] for game_index in remaining_indexes]
+    print("Mining %i of %i games" % (len(remaining_games), len(games)))
+
+    # Called on this thread for each game as it completes, so the checkpoint is only used from one thread
+    def complete_game(remaining_index, game_outcome):
+        game_index = remaining_indexes[remaining_index]
+        game = games[game_index]
+        game_result, error = game_outcome
+        if error is not None:
+            print("Failed to mine %s: %s" % (get_game_key(game), error))
+            checkpoint.record_failure(game.game_date, GAME_UNIT_TYPE, get_game_key(game), None, error)
+            game_results[game_index] = SlateStats.from_game_stats([GameStats(game)])
+        else:
+            checkpoint.save_game_result(game.game_date, get_game_result_key(game), game_result)
+            game_results[game_index] = game_result
+
+    if threading_enabled and execution_mode == PROCESSES_EXECUTION_MODE:
+        process_pool = Pool(max_workers)
+        try:
+            for remaining_index, game_outcome in enumerate(process_pool.imap(try_get_pregame_stats,
+                                                                             remaining_games)):
+                complete_game(remaining_index, game_outcome)
+        finally:
+            process_pool.close()
+            process_pool.join()
+        return SlateStats.concat(game_results)
+
+    # Games in this process share one page cache, so a page needed by several games is requested once
+    page_cache = PageCache()
+    previous_page_cache = set_page_cache(page_cache)
+    try:
+        if not threading_enabled:
+            for remaining_index, game in enumerate(remaining_games):
+                complete_game(remaining_index, try_get_pregame_stats(game))
+        elif execution_mode == ASYNCIO_EXECUTION_MODE:
+            asyncio.run(gather_pregame_stats(remaining_games, max_workers, complete_game))
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for remaining_index, game_outcome in enumerate(executor.map(try_get_pregame_stats,
+                                                                            remaining_games)):
+                    complete_game(remaining_index, game_outcome)
+    finally:
+        set_page_cache(previous_page_cache)
+    print("Mined %i games with %i requests (%i cached)" % (len(remaining_games), page_cache.misses,
+                                                           page_cache.hits))
+
+    return SlateStats.concat(game_results)
+
+
+async def gather_pregame_stats(games, max_workers=PREGAME_STATS_WORKERS, complete_game=None):
+    """ Mine the games from an event loop, at most max_workers at a time. The page functions block, so each game
+    runs in the loop's default executor.
+    :param complete_game: function of the index of the game and its outcome (see try_get_pregame_stats), called
+    on the loop's thread as each game completes
+    :return: list of outcomes, one per game
+    """
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def mine_game(game_index, game):
+        async with semaphore:
+            game_outcome = await asyncio.get_running_loop().run_in_executor(None, try_get_pregame_stats, game)
+        if complete_game is not None:
+            complete_game(game_index, game_outcome)
+        return game_outcome
+
+    return await asyncio.gather(*[mine_game(game_index, game) for game_index, game in enumerate(games)])
+
+
+def try_get_pregame_stats(game):
+    """ Mine a game without letting a page that could not be fetched stop the other games of the slate
+    :return: SlateStats of the game and None, or None and the reason the game failed
+    """
+    try:
+        return get_pregame_stats(game), None
+    except FETCH_EXCEPTIONS as e:
+        # Includes the RetriesExhausted raised by the soup helpers once they run out of retries
+        return None, "%s: %s" % (type(e).__name__, e)
 
 
 def get_pregame_stats(game):
+    """ Mine the pregame stats of a game. The result is returned as tables so it is cheap to send back from a
+    worker process.
+    :param game: Game object
+    :return: SlateStats of the game
+    """
     game_miner = GameMiner(game)
     game_miner.mine_park_factors()
     game_miner.get_pregame_hitting_stats()
     game_miner.get_pregame_pitching_stats()
+    return SlateStats.from_game_stats([game_miner.get_game_stats()])
 
 
-def mine_pregame_stats(threading_enabled=True):
-    """ Mine the hitter/pitcher stats and predict the outcomes and commit to the database session
+def mine_pregame_stats(threading_enabled=True, checkpoint_path=None, execution_mode=None):
+    """ Mine the hitter/pitcher stats of today's slate
+    :param threading_enabled: fetch the slate's pages concurrently
+    :param checkpoint_path: path of the SlateCheckpoint database. Rerunning with the same path only mines the
+    units of the slate that did not complete (default is to mine everything).
+    :param execution_mode: one of EXECUTION_MODES to mine the slate game by game with get_pregame_stats_wrapper
+    (default is to plan the slate's pages up front with mine_slate)
+    :return: SlateStats of the slate
     """
+    if execution_mode is not None and execution_mode not in EXECUTION_MODES:
+        raise ValueError("Unknown execution mode %s (expected one of %s)" % (execution_mode, EXECUTION_MODES))
+
     games = get_game_lineups()
     if len(games) == 0:
         raise NoGamesFound
-    get_pregame_stats_wrapper(games, threading_enabled)
+
+    checkpoint = SlateCheckpoint() if checkpoint_path is None else SlateCheckpoint(checkpoint_path)
+    try:
+        if execution_mode is None:
+            max_workers = SLATE_FETCH_WORKERS if threading_enabled else 1
+            slate_stats = SlateStats.from_game_stats(mine_slate(games, max_workers, checkpoint))
+        else:
+            slate_stats = get_pregame_stats_wrapper(games, threading_enabled, execution_mode, checkpoint=checkpoint)
+        for slate_date in sorted(set(game.game_date for game in games)):
+            print(checkpoint.get_failure_report(slate_date))
+    finally:
+        checkpoint.close()
+
+    return slate_stats
+
+
+def get_stat_kind(player_type: str, stat_split: str, variant=None) -> str:
+    """
+    :param player_type: "b" for hitting stats, "p" for pitching stats
+    :param stat_split: one of HITTER_STAT_SPLITS or PITCHER_STAT_SPLITS
+    :param variant: what else the stats depend on, e.g. the pitcher's hand, the opposing pitcher or the season
+    :return: stat kind of a PlayerStatCache key, e.g. "b:vs_hand:R"
+    """
+    if variant is None:
+        return "%s:%s" % (player_type, stat_split)
+    return "%s:%s:%s" % (player_type, stat_split, variant)
+
+
+def is_stable_stat_kind(stat_kind: str) -> bool:
+    return stat_kind.split(":")[1] in STABLE_STAT_KINDS
+
+
+def get_week_start(as_of_date: date) -> date:
+    return as_of_date - timedelta(days=as_of_date.weekday())
+
+
+def get_cache_date(stat_kind: str, as_of_date: date) -> date:
+    """
+    :return: date the PlayerStatCache keys the stats as of, the Monday of the week for the stable stat kinds
+    """
+    if is_stable_stat_kind(stat_kind):
+        return get_week_start(as_of_date)
+    return as_of_date
+
+
+class PlayerStatCache(object):
+    """
+    Cache of mined player stats keyed by Baseball Reference ID, stat kind (see get_stat_kind) and the date the
+    stats are as of (see get_cache_date). Recently used stats are kept in memory and every stat is written through
+    to an optional SQLite database, so a player mined by an earlier run of the day or for another contest is not
+    mined again.
+    """
+
+    def __init__(self, database_path: str = None, max_size: int = PLAYER_STAT_CACHE_SIZE):
+        """
+        :param database_path: path to the SQLite database file of the persistent tier (default is memory only)
+        :param max_size: number of stats kept in memory, the least recently used are evicted first
+        """
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        self.hits = 0
+        self.misses = 0
+        if database_path is not None:
+            # Miners run in threads, so the connection is shared and every access holds the lock
+            self._connection = sqlite3.connect(database_path, check_same_thread=False)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS player_stats (BaseballReferenceId TEXT NOT NULL, "
+                                     "StatKind TEXT NOT NULL, AsOfDate TEXT NOT NULL, Stats TEXT, "
+                                     "PRIMARY KEY (BaseballReferenceId, StatKind, AsOfDate))")
+            self._connection.commit()
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember(self, key, stats):
+        self._entries[key] = stats
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def _lookup(self, key):
+        # Called with the lock held
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return True, self._entries[key]
+        if self._connection is not None:
+            result = self._connection.execute("SELECT Stats FROM player_stats WHERE BaseballReferenceId = ? "
+                                              "AND StatKind = ? AND AsOfDate = ?", key).fetchone()
+            if result is not None:
+                stats = json.loads(result[0])
+                self._remember(key, stats)
+                return True, stats
+
+        return False, None
+
+    def get(self, baseball_reference_id: str, stat_kind: str, as_of_date: date = None) -> (bool, dict):
+        """
+        :param as_of_date: date the stats are as of (default is today)
+        :return: whether the stats are cached, and the stats (which may be None if the player has none)
+        """
+        if as_of_date is None:
+            as_of_date = date.today()
+        key = (baseball_reference_id, stat_kind, get_cache_date(stat_kind, as_of_date).isoformat())
+        with self._lock:
+            is_cached, stats = self._lookup(key)
+            if is_cached:
+                self.hits += 1
+            else:
+                self.misses += 1
+        emit(CACHE_LOOKUP_EVENT, cache="player_stats", hit=is_cached, player_id=baseball_reference_id,
+             stat_kind=stat_kind)
+
+        return is_cached, stats
+
+    def contains(self, baseball_reference_id: str, stat_kind: str, as_of_date: date = None) -> bool:
+        """
+        Whether the stats are cached, without counting it as a lookup, for planning which pages to fetch
+        :param as_of_date: date the stats are as of (default is today)
+        """
+        if as_of_date is None:
+            as_of_date = date.today()
+        key = (baseball_reference_id, stat_kind, get_cache_date(stat_kind, as_of_date).isoformat())
+        with self._lock:
+            return self._lookup(key)[0]
+
+    def put(self, baseball_reference_id: str, stat_kind: str, stats: dict, as_of_date: date = None):
+        if as_of_date is None:
+            as_of_date = date.today()
+        key = (baseball_reference_id, stat_kind, get_cache_date(stat_kind, as_of_date).isoformat())
+        with self._lock:
+            self._remember(key, stats)
+            if self._connection is not None:
+                self._connection.execute("INSERT OR REPLACE INTO player_stats (BaseballReferenceId, StatKind, "
+                                         "AsOfDate, Stats) VALUES (?, ?, ?, ?)", key + (json.dumps(stats),))
+                self._connection.commit()
+
+    def get_or_mine(self, baseball_reference_id: str, stat_kind: str, mine_function, as_of_date: date = None):
+        """
+        :param mine_function: function without arguments that mines the stats when they are not cached
+        :return: the cached or freshly mined stats
+        """
+        is_cached, stats = self.get(baseball_reference_id, stat_kind, as_of_date)
+        if not is_cached:
+            stats = mine_function()
+            self.put(baseball_reference_id, stat_kind, stats, as_of_date)
+
+        return stats
+
+    def expire(self, as_of_date: date = None):
+        """
+        Drop the stats that are no longer read: the kinds that roll daily from before the date, and the stable kinds
+        from before its week
+        :param as_of_date: first date whose stats are still valid (default is today)
+        """
+        if as_of_date is None:
+            as_of_date = date.today()
+        week_start = get_week_start(as_of_date).isoformat()
+        with self._lock:
+            for key in [key for key in self._entries
+                        if key[2] < (week_start if is_stable_stat_kind(key[1]) else as_of_date.isoformat())]:
+                del self._entries[key]
+            if self._connection is not None:
+                stable_kind_filter = " OR ".join("StatKind LIKE '_:%s%%'" % stat_split
+                                                 for stat_split in STABLE_STAT_KINDS)
+                self._connection.execute("DELETE FROM player_stats WHERE AsOfDate < ? AND NOT (%s)" %
+                                         stable_kind_filter, (as_of_date.isoformat(),))
+                self._connection.execute("DELETE FROM player_stats WHERE AsOfDate < ?", (week_start,))
+                self._connection.commit()
+
+
+# Cache used by the miners of this process
+PLAYER_STAT_CACHE = PlayerStatCache()
+
+
+def set_player_stat_cache(player_stat_cache: PlayerStatCache):
+    """ Use another cache for the miners of this process, e.g. one backed by a database shared by every run
+    :param player_stat_cache: the PlayerStatCache
+    """
+    global PLAYER_STAT_CACHE
+    PLAYER_STAT_CACHE = player_stat_cache
 
 
 class HitterMiner(object):
@@ -50,6 +406,10 @@ class HitterMiner(object):
         self.recent_stats = dict()
         self.season_stats = dict()
 
+    @property
+    def baseball_reference_id(self):
+        return self._baseball_reference_id
+
     @staticmethod
     def get_id(full_name, team_abbreviation, year):
         return get_hitter_id(full_name, team_abbreviation, year)
@@ -58,19 +418,31 @@ class HitterMiner(object):
         return get_stathead_id(self._baseball_reference_id)
 
     def mine_career_stats(self, hitter_career_soup=None):
-        return get_career_hitting_stats(self._baseball_reference_id, hitter_career_soup)
+        return PLAYER_STAT_CACHE.get_or_mine(self._baseball_reference_id, get_stat_kind("b", "career"),
+                                             lambda: get_career_hitting_stats(self._baseball_reference_id,
+                                                                              hitter_career_soup))
 
     def mine_vs_hand_stats(self, pitcher_hand, hitter_career_soup=None):
-        return get_vs_hand_hitting_stats(self._baseball_reference_id, pitcher_hand, hitter_career_soup)
+        return PLAYER_STAT_CACHE.get_or_mine(self._baseball_reference_id, get_stat_kind("b", "vs_hand", pitcher_hand),
+                                             lambda: get_vs_hand_hitting_stats(self._baseball_reference_id,
+                                                                               pitcher_hand, hitter_career_soup))
 
     def mine_recent_stats(self, hitter_career_soup=None):
-        return get_recent_hitting_stats(self._baseball_reference_id, hitter_career_soup)
+        return PLAYER_STAT_CACHE.get_or_mine(self._baseball_reference_id, get_stat_kind("b", "recent"),
+                                             lambda: get_recent_hitting_stats(self._baseball_reference_id,
+                                                                              hitter_career_soup))
 
     def mine_season_stats(self, year=None, soup=None):
-        return get_season_hitting_stats(self._baseball_reference_id, year, soup)
+        return PLAYER_STAT_CACHE.get_or_mine(self._baseball_reference_id,
+                                             get_stat_kind("b", "season", year or date.today().year),
+                                             lambda: get_season_hitting_stats(self._baseball_reference_id, year,
+                                                                              soup))
 
     def mine_vs_pitcher_stats(self, pitcher_baseball_reference_id, vs_soup=None):
-        return get_vs_pitcher_stats(self._baseball_reference_id, pitcher_baseball_reference_id, vs_soup)
+        return PLAYER_STAT_CACHE.get_or_mine(self._baseball_reference_id,
+                                             get_stat_kind("b", "vs_pitcher", pitcher_baseball_reference_id),
+                                             lambda: get_vs_pitcher_stats(self._baseball_reference_id,
+                                                                          pitcher_baseball_reference_id, vs_soup))
 
     def mine_yesterdays_results(self):
         yesterdays_date = date.today() - timedelta(days=1)
@@ -78,28 +450,73 @@ class HitterMiner(object):
 
 
 class LineupMiner(object):
-    def __init__(self, lineup, opposing_pitcher, game_date, game_time, is_home):
+    def __init__(self, lineup, opposing_pitcher, game_date, game_time, is_home, opposing_pitcher_id=None):
+        """
+        :param lineup: list of PlayerStruct objects in batting order
+        :param opposing_pitcher: PlayerStruct of the opposing starting pitcher
+        :param opposing_pitcher_id: Baseball Reference ID of the opposing pitcher (default is to look it up)
+        """
         self._lineup = lineup
         self._opposing_pitcher = opposing_pitcher
+        self._opposing_pitcher_id = opposing_pitcher_id
         self._game_date = game_date
         self._game_time = game_time
         self._is_home = is_home
         self._hitter_miners = list()
+        # Baseball Reference ID of each mined hitter to the hitter's 1-based slot in the batting order
+        self.batting_order_positions = dict()
 
-    def mine_pregame_stats(self):
-        """ Fetch the pregame hitting stats from the web
-        :return:
+    def mine_pregame_stats(self, hitter_id_index: dict = None, max_workers: int = SLATE_FETCH_WORKERS) -> DataFrame:
+        """ Fetch the pregame hitting stats from the web. The IDs of the lineup are looked up in one index of the
+        season leaderboard, then the pages of every hitter are fetched as one concurrent batch.
+        :param hitter_id_index: index of the season's hitters (see get_hitter_id_index, default is to request it)
+        :param max_workers: maximum number of requests in flight
+        :return: DataFrame with one row per hitter that was found, in batting order
         """
+        year = self._game_date.year
+        if hitter_id_index is None:
+            hitter_id_index = get_hitter_id_index(year, fetch_slate_page(get_leaderboard_url(year, "batting")))
+        if self._opposing_pitcher_id is None:
+            opposing_team = get_baseball_reference_team(self._opposing_pitcher.team)
+            try:
+                self._opposing_pitcher_id = PitcherMiner.get_id(self._opposing_pitcher.name, opposing_team, year)
+            except PlayerNameNotFound as e:
+                print(e)
+
+        hitter_ids = list()
+        plan = SlatePlan()
         for current_hitter in self._lineup:
-            baseball_reference_id = HitterMiner.get_id(current_hitter.name)
-            hitter_miner = HitterMiner(baseball_reference_id)
-            hitter_career_soup = get_hitter_page_career_soup(baseball_reference_id)
-            hitter_miner.career_stats = current_hitter.mine_career_stats(hitter_career_soup)
-            hitter_miner.vs_hand_stats = current_hitter.mine_vs_hand_stats(hitter_career_soup, self._opposing_pitcher.pitcher_hand)
-            hitter_miner.recent_stats = current_hitter.mine_recent_stats(hitter_career_soup)
-            hitter_miner.season_stats = current_hitter.mine_season_stats()
-            hitter_miner.vs_pitcher_stats = current_hitter.mine_vs_pitcher_stats(self._opposing_pitcher.baseball_reference_id)
+            baseball_reference_id = hitter_id_index.get((current_hitter.name,
+                                                         get_baseball_reference_team(current_hitter.team)))
+            hitter_ids.append(baseball_reference_id)
+            if baseball_reference_id is None:
+                print("Hitter %s (%s) not found in the %i leaderboard" % (current_hitter.name, current_hitter.team,
+                                                                           year))
+                continue
+            for url in get_uncached_page_urls(baseball_reference_id,
+                                              get_hitter_pages(baseball_reference_id, year, self._opposing_pitcher.hand,
+                                                               self._opposing_pitcher_id)):
+                plan.add_page(url)
+        pages = plan.fetch(max_workers)
+
+        self._hitter_miners = list()
+        self.batting_order_positions = dict()
+        hitter_rows = list()
+        for batting_order_position, (current_hitter, baseball_reference_id) in enumerate(zip(self._lineup,
+                                                                                              hitter_ids), 1):
+            if baseball_reference_id is None:
+                continue
+            hitter_miner = assemble_hitter_miner(baseball_reference_id, year, self._opposing_pitcher.hand,
+                                                 self._opposing_pitcher_id, pages)
             self._hitter_miners.append(hitter_miner)
+            self.batting_order_positions[baseball_reference_id] = batting_order_position
+            row = {"batting_order_position": batting_order_position,
+                   "name": current_hitter.name,
+                   "rotowire_id": current_hitter.rotowire_id,
+                   "baseball_reference_id": baseball_reference_id}
+            hitter_rows.append(add_miner_stats(row, hitter_miner, HITTER_STAT_SPLITS))
+
+        return make_table(hitter_rows, LINEUP_KEY_COLUMNS)
 
 
 class PitcherMiner(object):
@@ -123,19 +540,30 @@ class PitcherMiner(object):
         :param game_date: the date of the game (in the following form yyyy-mm-dd)
         :return: a PregamePitcherGameEntry object without the predicted_draftkings_points field populated
         """
-        pitcher_career_soup = get_pitcher_page_career_soup(self.baseball_reference_id)
-        self.career_stats = self.mine_career_stats(pitcher_career_soup)
-        self.recent_stats = self.mine_recent_stats(pitcher_career_soup)
-        self.season_stats = self.mine_season_stats()
+        with timed(PLAYER_MINED_EVENT, player_type="p", player_id=self.baseball_reference_id):
+            pitcher_career_soup = None
+            if not all(PLAYER_STAT_CACHE.contains(self.baseball_reference_id, get_stat_kind("p", stat_split))
+                       for stat_split in ["career", "recent"]):
+                pitcher_career_soup = get_pitcher_page_career_soup(self.baseball_reference_id)
+            self.career_stats = self.mine_career_stats(pitcher_career_soup)
+            self.recent_stats = self.mine_recent_stats(pitcher_career_soup)
+            self.season_stats = self.mine_season_stats()
 
     def mine_career_stats(self, pitcher_career_soup=None):
-        return get_career_pitching_stats(self.baseball_reference_id, pitcher_career_soup)
+        return PLAYER_STAT_CACHE.get_or_mine(self.baseball_reference_id, get_stat_kind("p", "career"),
+                                             lambda: get_career_pitching_stats(self.baseball_reference_id,
+                                                                               pitcher_career_soup))
 
     def mine_recent_stats(self, pitcher_career_soup=None):
-        return get_recent_pitcher_stats(self.baseball_reference_id, pitcher_career_soup)
+        return PLAYER_STAT_CACHE.get_or_mine(self.baseball_reference_id, get_stat_kind("p", "recent"),
+                                             lambda: get_recent_pitcher_stats(self.baseball_reference_id,
+                                                                              pitcher_career_soup))
 
     def mine_season_stats(self, year=None, soup=None):
-        return get_season_pitcher_stats(self.baseball_reference_id, year, soup)
+        return PLAYER_STAT_CACHE.get_or_mine(self.baseball_reference_id,
+                                             get_stat_kind("p", "season", year or date.today().year),
+                                             lambda: get_season_pitcher_stats(self.baseball_reference_id, year,
+                                                                              soup))
 
     def mine_yesterdays_results(self):
         yesterdays_date = date.today() - timedelta(days=1)
@@ -146,58 +574,888 @@ class GameMiner(object):
     def __init__(self, game):
 
         self._game = game
-        self._home_lineup_miner = LineupMiner(game.home_lineup, game.away_pitcher, game.game_date,
-                                              game.game_time, is_home=True)
+        year = game.game_date.year
         # TODO should have the ability to specify the baseball reference ID so we can use the database
-        baseball_reference_id = PitcherMiner.get_id(game.home_pitcher.name, game.home_pitcher.team, game.game_date.year)
-        self._home_pitcher_miner = PitcherMiner(baseball_reference_id)
+        home_pitcher_id = PitcherMiner.get_id(game.home_pitcher.name,
+                                              get_baseball_reference_team(game.home_pitcher.team), year)
+        self._home_pitcher_miner = PitcherMiner(home_pitcher_id)
+        away_pitcher_id = PitcherMiner.get_id(game.away_pitcher.name,
+                                              get_baseball_reference_team(game.away_pitcher.team), year)
+        self._away_pitcher_miner = PitcherMiner(away_pitcher_id)
+        self._home_lineup_miner = LineupMiner(game.home_lineup, game.away_pitcher, game.game_date,
+                                              game.game_time, is_home=True, opposing_pitcher_id=away_pitcher_id)
         self._away_lineup_miner = LineupMiner(game.away_lineup, game.home_pitcher, game.game_date,
-                                              game.game_time, is_home=False)
-        baseball_reference_id = PitcherMiner.get_id(game.away_pitcher.name, game.away_pitcher.team, game.game_date.year)
-        self._away_pitcher_miner = PitcherMiner(baseball_reference_id)
+                                              game.game_time, is_home=False, opposing_pitcher_id=home_pitcher_id)
+        self._park_factors = (None, None)
 
     def get_pregame_hitting_stats(self):
-        self._away_lineup_miner.mine_pregame_stats()
-        self._home_lineup_miner.mine_pregame_stats()
+        year = self._game.game_date.year
+        hitter_id_index = get_hitter_id_index(year, fetch_slate_page(get_leaderboard_url(year, "batting")))
+        self._away_lineup_miner.mine_pregame_stats(hitter_id_index)
+        self._home_lineup_miner.mine_pregame_stats(hitter_id_index)
 
     def get_pregame_pitching_stats(self):
         self._home_pitcher_miner.mine_pregame_stats()
         self._away_pitcher_miner.mine_pregame_stats()
 
     def mine_park_factors(self):
-        team_abbrev = self._home_pitcher_miner.get_team()
-        return get_team_info(get_baseball_reference_team(team_abbrev), self._game.game_date.year)
+        self._park_factors = get_team_info(get_baseball_reference_team(self._game.home_pitcher.team),
+                                           self._game.game_date.year)
+        return self._park_factors
+
+    def get_game_stats(self):
+        """
+        :return: GameStats of the mined lineups, pitchers and park factors
+        """
+        game_stats = GameStats(self._game)
+        for lineup_miner, hitter_miners in [(self._away_lineup_miner, game_stats.away_hitter_miners),
+                                            (self._home_lineup_miner, game_stats.home_hitter_miners)]:
+            hitter_miners += lineup_miner._hitter_miners
+            game_stats.batting_order_positions.update(lineup_miner.batting_order_positions)
+        game_stats.away_pitcher_miner = self._away_pitcher_miner
+        game_stats.home_pitcher_miner = self._home_pitcher_miner
+        game_stats.park_factors = self._park_factors
+
+        return game_stats
+
+
+def normalize_umpire_name(umpire_name: str) -> str:
+    """
+    :return: the name without accents, punctuation, case or extra spaces, e.g. "Angel Hernandez" for "Ángel
+    Hernández" is "angel hernandez"
+    """
+    if umpire_name is None:
+        return None
+    ascii_name = unicodedata.normalize("NFKD", umpire_name).encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^a-z ]", " ", ascii_name.lower()).split())
+
+
+def parse_umpire_factors(umpire_soup: BeautifulSoup) -> DataFrame:
+    """
+    :param umpire_soup: soup of the umpire factors page
+    :return: DataFrame of the factors of every umpire, indexed by normalized name (see normalize_umpire_name)
+    """
+    columns = {column_name: list() for column_name, _, _, _ in UMPIRE_FACTOR_COLUMNS}
+    umpire_names = list()
+    stat_table = umpire_soup.find("table", {"id": "ump-table"})
+    if stat_table is not None and stat_table.find("tbody") is not None:
+        for umpire_row in stat_table.find("tbody").find_all("tr"):
+            cell_texts = [cell.get_text(strip=True) for cell in umpire_row.find_all("td")]
+            if len(cell_texts) < UMPIRE_TABLE_NUM_CELLS:
+                continue
+            umpire_names.append(cell_texts[0])
+            for column_name, cell_index, suffix, divisor in UMPIRE_FACTOR_COLUMNS:
+                columns[column_name].append(float(cell_texts[cell_index].replace(suffix, "")) / divisor)
+
+    umpire_factors = DataFrame(columns, dtype="float64")
+    umpire_factors.insert(0, "umpire_name", pd.Series(umpire_names, dtype="object"))
+    umpire_factors.index = pd.Index([normalize_umpire_name(name) for name in umpire_names], name="umpire_key")
+
+    return umpire_factors[~umpire_factors.index.duplicated()]
+
+
+class UmpireFactorCache(object):
+    """
+    Umpire factor table of the current day, kept in memory and optionally in a Parquet file per day. The table is
+    only requested once a day no matter how many games or slates are mined.
+    """
+
+    def __init__(self, cache_dir: str = None):
+        """
+        :param cache_dir: directory of the daily Parquet files (default is memory only)
+        """
+        self._cache_dir = cache_dir
+        self._umpire_factors = None
+        self._lock = threading.Lock()
+
+    def get_cache_path(self, as_of_date: date) -> str:
+        return os.path.join(self._cache_dir, UMPIRE_FACTORS_FILE_NAME % as_of_date.isoformat())
+
+    def get_umpire_factors(self, as_of_date: date = None) -> DataFrame:
+        """
+        :param as_of_date: date the factors are needed for (default is today)
+        :return: DataFrame of the factors (see parse_umpire_factors), with the date it was requested stored in
+        its attrs["as_of_date"]
+        """
+        if as_of_date is None:
+            as_of_date = date.today()
+        with self._lock:
+            if self._umpire_factors is not None and self._umpire_factors.attrs["as_of_date"] == as_of_date:
+                emit(CACHE_LOOKUP_EVENT, cache="umpire_factors", hit=True)
+                return self._umpire_factors
+
+            is_cached = self._cache_dir is not None and os.path.exists(self.get_cache_path(as_of_date))
+            emit(CACHE_LOOKUP_EVENT, cache="umpire_factors", hit=is_cached)
+            if is_cached:
+                umpire_factors = pd.read_parquet(self.get_cache_path(as_of_date))
+            else:
+                umpire_factors = parse_umpire_factors(get_soup_from_url(UMPIRE_FACTORS_URL))
+                if self._cache_dir is not None:
+                    self._save(umpire_factors, as_of_date)
+            umpire_factors.attrs["as_of_date"] = as_of_date
+            self._umpire_factors = umpire_factors
+
+            return umpire_factors
+
+    def _save(self, umpire_factors: DataFrame, as_of_date: date):
+        os.makedirs(self._cache_dir, exist_ok=True)
+        # Only the file of the latest day is kept
+        file_prefix, file_suffix = UMPIRE_FACTORS_FILE_NAME.split("%s")
+        for file_name in os.listdir(self._cache_dir):
+            if file_name.startswith(file_prefix) and file_name.endswith(file_suffix):
+                os.remove(os.path.join(self._cache_dir, file_name))
+        temporary_path = self.get_cache_path(as_of_date) + ".tmp"
+        umpire_factors.to_parquet(temporary_path)
+        os.replace(temporary_path, self.get_cache_path(as_of_date))
+
+
+# Umpire factors shared by the UmpireMiners of this process
+UMPIRE_FACTOR_CACHE = UmpireFactorCache()
 
 
 class UmpireMiner(object):
 
+    def __init__(self, umpire_factor_cache: UmpireFactorCache = None):
+        """
+        :param umpire_factor_cache: cache of the umpire factor table (default is UMPIRE_FACTOR_CACHE)
+        """
+        self._umpire_factor_cache = UMPIRE_FACTOR_CACHE if umpire_factor_cache is None else umpire_factor_cache
+
+    def get_umpire_factors(self, as_of_date: date = None) -> DataFrame:
+        return self._umpire_factor_cache.get_umpire_factors(as_of_date)
+
     def mine_umpire_data(self):
-        url = "https://swishanalytics.com/mlb/mlb-umpire-factors"
-        umpire_soup = get_soup_from_url(url)
-
-        stat_table = umpire_soup.find("table", {"id": "ump-table"}).find("tbody")
-
-        ump_dict = dict()
-        if stat_table is not None:
-            ump_rows = stat_table.findAll("tr")
-            for ump_row in ump_rows:
-                ump_data = ump_row.findAll("td")
-                ump_entry = dict()
-
-                ump_entry["K %"] = float(ump_data[3].text.strip().replace("%", "")) / 100
-                ump_entry["BB %"] = float(ump_data[4].text.strip().replace("%", "")) / 100
-                ump_entry["RPG"] = float(ump_data[5].text.strip())
-                ump_entry["BA"] = float(ump_data[6].text.strip())
-                ump_entry["OBP"] = float(ump_data[7].text.strip())
-                ump_entry["SLG"] = float(ump_data[8].text.strip())
-
-                ump_entry["K Boost"] = float(ump_data[9].text.strip().replace("x", ""))
-                ump_entry["BB Boost"] = float(ump_data[10].text.strip().replace("x", ""))
-                ump_entry["R Boost"] = float(ump_data[11].text.strip().replace("x", ""))
-                ump_entry["BA Boost"] = float(ump_data[12].text.strip().replace("x", ""))
-                ump_entry["OBP Boost"] = float(ump_data[13].text.strip().replace("x", ""))
-                ump_entry["SLG Boost"] = float(ump_data[14].text.strip().replace("x", ""))
-
-                ump_dict[ump_data[0].text.strip()] = ump_entry
-
-        return ump_dict
\ No newline at end of file
+        """
+        :return: dictionary of umpire name to the dictionary of the umpire's factors
+        """
+        umpire_factors = self.get_umpire_factors()
+        return {row["umpire_name"]: {column_name: row[column_name] for column_name, _, _, _ in UMPIRE_FACTOR_COLUMNS}
+                for _, row in umpire_factors.iterrows()}
+
+    def get_slate_umpire_factors(self, games, as_of_date: date = None) -> DataFrame:
+        """
+        Join the umpire factors with the umpire of every game of the slate
+        :param games: list of Game objects
+        :param as_of_date: date the factors are needed for (default is today)
+        :return: DataFrame with one row per game in the order of the games (the game_index of SlateStats), with
+        missing factors for the games whose umpire is unknown
+        """
+        slate_umpires = DataFrame({"game_index": range(len(games)),
+                                   "game_umpire_name": [game.umpire_name for game in games]})
+        slate_umpires["umpire_key"] = slate_umpires["game_umpire_name"].map(normalize_umpire_name)
+
+        return slate_umpires.join(self.get_umpire_factors(as_of_date), on="umpire_key")
+
+
+class SlatePlan(object):
+    """
+    Set of the pages needed to mine a slate. Pages are keyed by URL, so a page needed by several games (the season
+    leaderboards, a pitcher's pages, a park) is only requested once.
+    """
+
+    def __init__(self):
+        self._urls = dict()
+
+    def add_page(self, url: str) -> str:
+        self._urls.setdefault(url, None)
+        return url
+
+    def get_urls(self) -> [str]:
+        return list(self._urls)
+
+    def __len__(self):
+        return len(self._urls)
+
+    def fetch(self, max_workers: int = SLATE_FETCH_WORKERS) -> dict:
+        """
+        Request every page of the plan with at most max_workers requests in flight
+        :return: dictionary of URL to the page's soup with the commented tables restored (None if it failed)
+        """
+        urls = self.get_urls()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(zip(urls, executor.map(fetch_slate_page, urls)))
+
+
+def fetch_slate_page(url: str) -> BeautifulSoup:
+    try:
+        return get_uncommented_soup_from_url(url)
+    except FETCH_EXCEPTIONS as e:
+        print("Failed to fetch %s (%s)" % (url, e))
+        return None
+
+
+class GameStats(object):
+    def __init__(self, game):
+        self.game = game
+        self.away_hitter_miners = list()
+        self.home_hitter_miners = list()
+        self.away_pitcher_miner = None
+        self.home_pitcher_miner = None
+        self.park_factors = (None, None)
+        # Baseball Reference ID of each mined hitter to the hitter's 1-based slot in the batting order
+        self.batting_order_positions = dict()
+
+
+def to_stat_value(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def add_miner_stats(row: dict, miner, stat_splits: [str]) -> dict:
+    """
+    Add the stat splits of a miner to a table row, each stat prefixed by its split (e.g. "season_HR")
+    """
+    for stat_split in stat_splits:
+        stats_dict = getattr(miner, stat_split + "_stats")
+        if stats_dict is None:
+            continue
+        for stat_name, value in stats_dict.items():
+            row[stat_split + "_" + stat_name] = to_stat_value(value)
+
+    return row
+
+
+def make_table(rows: [dict], key_columns: [str]) -> DataFrame:
+    if len(rows) == 0:
+        return DataFrame(columns=key_columns)
+    return DataFrame(rows)
+
+
+class SlateStats(object):
+    """
+    Pregame stats of a slate as three tables: one row per game with its park factors, one row per hitter and one
+    row per starting pitcher. Hitter and pitcher rows refer to their game by game_index. The tables are columnar,
+    so a worker process sends back a few arrays instead of pickling its miners.
+    """
+
+    def __init__(self, games: DataFrame, hitters: DataFrame, pitchers: DataFrame):
+        self.games = games
+        self.hitters = hitters
+        self.pitchers = pitchers
+
+    def __len__(self):
+        return len(self.games)
+
+    def get_game_hitters(self, game_index: int) -> DataFrame:
+        return self.hitters[self.hitters["game_index"] == game_index]
+
+    def get_game_pitchers(self, game_index: int) -> DataFrame:
+        return self.pitchers[self.pitchers["game_index"] == game_index]
+
+    @staticmethod
+    def from_game_stats(game_stats_list: [GameStats]) -> "SlateStats":
+        game_rows = list()
+        hitter_rows = list()
+        pitcher_rows = list()
+        for game_index, game_stats in enumerate(game_stats_list):
+            game = game_stats.game
+            hitter_park_factor, pitcher_park_factor = game_stats.park_factors
+            game_rows.append({"game_index": game_index,
+                              "game_date": game.game_date,
+                              "game_time": game.game_time,
+                              "away_team": game.away_pitcher.team,
+                              "home_team": game.home_pitcher.team,
+                              "hitter_park_factor": hitter_park_factor,
+                              "pitcher_park_factor": pitcher_park_factor})
+
+            for is_home, hitter_miners, pitcher_miner in \
+                    [(False, game_stats.away_hitter_miners, game_stats.away_pitcher_miner),
+                     (True, game_stats.home_hitter_miners, game_stats.home_pitcher_miner)]:
+                for hitter_miner in hitter_miners:
+                    hitter_id = hitter_miner.baseball_reference_id
+                    row = {"game_index": game_index,
+                           "is_home": is_home,
+                           "batting_order_position": game_stats.batting_order_positions.get(hitter_id),
+                           "baseball_reference_id": hitter_id}
+                    hitter_rows.append(add_miner_stats(row, hitter_miner, HITTER_STAT_SPLITS))
+                if pitcher_miner is not None:
+                    row = {"game_index": game_index,
+                           "is_home": is_home,
+                           "baseball_reference_id": pitcher_miner.baseball_reference_id}
+                    pitcher_rows.append(add_miner_stats(row, pitcher_miner, PITCHER_STAT_SPLITS))
+
+        return SlateStats(make_table(game_rows, GAME_KEY_COLUMNS),
+                          make_table(hitter_rows, HITTER_KEY_COLUMNS),
+                          make_table(pitcher_rows, PITCHER_KEY_COLUMNS))
+
+    @staticmethod
+    def concat(slate_stats_list: ["SlateStats"]) -> "SlateStats":
+        """
+        Join the results of several workers, renumbering the games in the order of the list
+        """
+        tables = {"games": list(), "hitters": list(), "pitchers": list()}
+        game_offset = 0
+        for slate_stats in slate_stats_list:
+            for table_name in tables:
+                table = getattr(slate_stats, table_name).copy()
+                table["game_index"] += game_offset
+                tables[table_name].append(table)
+            game_offset += len(slate_stats)
+
+        if game_offset == 0:
+            return SlateStats.from_game_stats(list())
+        return SlateStats(*[pd.concat(tables[table_name], ignore_index=True)
+                            for table_name in ["games", "hitters", "pitchers"]])
+
+
+def get_player_key(player: PlayerStruct, year: int) -> (str, str, int):
+    """
+    :return: name, Baseball Reference team and year used to look the player up in the season leaderboards
+    """
+    return player.name, get_baseball_reference_team(player.team), year
+
+
+def get_game_key(game) -> str:
+    """
+    :return: key of the game within its slate, e.g. "BOS@TOR 1:07 PM"
+    """
+    return "%s@%s %s" % (game.away_pitcher.team, game.home_pitcher.team, game.game_time)
+
+
+def get_game_result_key(game) -> str:
+    """
+    :return: key of the mined result of the game, e.g. "BOS@TOR 1:07 PM 3f2a9c61d0b4". The suffix is a hash of
+    the starters and lineups, compared the same way as PlayerStruct equality, so a lineup or starter change is
+    mined again instead of returning the result of the old players.
+    """
+    players = [game.away_pitcher, game.home_pitcher] + list(game.away_lineup) + [None] + list(game.home_lineup)
+    player_text = ";".join("" if player is None else
+                           "%s|%s|%s|%s" % (player.team, player.rotowire_id, player.position, player.hand)
+                           for player in players)
+    return "%s %s" % (get_game_key(game), hashlib.sha1(player_text.encode('utf-8')).hexdigest()[:12])
+
+
+def get_hitter_unit_key(hitter_id: str, pitcher_hand: str, pitcher_id: str) -> str:
+    return "b|%s|%s|%s" % (hitter_id, pitcher_hand, pitcher_id)
+
+
+def get_pitcher_unit_key(pitcher_id: str) -> str:
+    return "p|%s" % pitcher_id
+
+
+def get_hitter_pages(hitter_id: str, year: int, pitcher_hand: str, pitcher_id: str) -> dict:
+    """
+    :return: dictionary of the URL of each page needed to mine the hitter against the pitcher (None if the
+    pitcher is unknown) to the stat kinds mined from the page
+    """
+    pages = OrderedDict([(get_player_url(hitter_id), [get_stat_kind("b", "career")]),
+                         (get_split_url(hitter_id), [get_stat_kind("b", "vs_hand", pitcher_hand),
+                                                     get_stat_kind("b", "recent")]),
+                         (get_split_url(hitter_id, year), [get_stat_kind("b", "season", year)])])
+    if pitcher_id is not None:
+        pages[get_vs_pitcher_url(hitter_id)] = [get_stat_kind("b", "vs_pitcher", pitcher_id)]
+    return pages
+
+
+def get_pitcher_pages(pitcher_id: str, year: int) -> dict:
+    return OrderedDict([(get_split_url(pitcher_id, player_type="p"), [get_stat_kind("p", "career"),
+                                                                      get_stat_kind("p", "recent")]),
+                        (get_split_url(pitcher_id, year, "p"), [get_stat_kind("p", "season", year)])])
+
+
+def get_uncached_page_urls(baseball_reference_id: str, player_pages: dict) -> [str]:
+    """
+    :param player_pages: dictionary of page URL to stat kinds (see get_hitter_pages)
+    :return: URLs of the pages with a stat kind that is not in the PLAYER_STAT_CACHE
+    """
+    return [url for url, stat_kinds in player_pages.items()
+            if not all(PLAYER_STAT_CACHE.contains(baseball_reference_id, stat_kind) for stat_kind in stat_kinds)]
+
+
+def get_miner_stats(miner, stat_splits: [str]) -> dict:
+    return {stat_split: getattr(miner, stat_split + "_stats") for stat_split in stat_splits}
+
+
+def set_miner_stats(miner, stats: dict):
+    for stat_split, stats_dict in stats.items():
+        setattr(miner, stat_split + "_stats", stats_dict)
+
+
+def iter_game_players(game, hitter_ids: dict, pitcher_ids: dict):
+    """
+    Iterate over the hitters of a game with the opposing starting pitcher
+    :return: generator of whether the hitter is at home, the hitter's 1-based slot in the batting order, the
+    hitter, the hitter's Baseball Reference ID (None if unresolved), the opposing pitcher and the opposing
+    pitcher's Baseball Reference ID (None if unresolved)
+    """
+    year = game.game_date.year
+    for is_home, lineup, opposing_pitcher in [(False, game.away_lineup, game.home_pitcher),
+                                              (True, game.home_lineup, game.away_pitcher)]:
+        opposing_pitcher_id = pitcher_ids.get(get_player_key(opposing_pitcher, year))
+        for batting_order_position, hitter in enumerate(lineup, 1):
+            yield is_home, batting_order_position, hitter, hitter_ids.get(get_player_key(hitter, year)), \
+                opposing_pitcher, opposing_pitcher_id
+
+
+def load_slate_ids(games, checkpoint: SlateCheckpoint) -> (dict, dict):
+    """
+    :return: dictionaries of hitter and pitcher keys to the Baseball Reference IDs resolved by previous runs
+    """
+    hitter_ids = dict()
+    pitcher_ids = dict()
+    for game in games:
+        year = game.game_date.year
+        for players, player_ids, player_type in [(game.away_lineup + game.home_lineup, hitter_ids, "b"),
+                                                 ([game.away_pitcher, game.home_pitcher], pitcher_ids, "p")]:
+            for player in players:
+                player_key = get_player_key(player, year)
+                baseball_reference_id = checkpoint.get_player_id(player_type, player_key)
+                if baseball_reference_id is not None:
+                    player_ids[player_key] = baseball_reference_id
+
+    return hitter_ids, pitcher_ids
+
+
+def resolve_slate_ids(games, pages: dict, hitter_ids: dict = None, pitcher_ids: dict = None) -> (dict, dict):
+    """
+    Look up the Baseball Reference ID of every player of the slate in the fetched season leaderboards
+    :param games: list of Game objects
+    :param pages: dictionary of URL to soup containing the leaderboards of every year of the slate
+    :param hitter_ids: hitter IDs that are already known and are not looked up again
+    :param pitcher_ids: pitcher IDs that are already known and are not looked up again
+    :return: dictionaries of hitter and pitcher keys (see get_player_key) to Baseball Reference IDs. Players that
+    could not be found are left out.
+    """
+    hitter_ids = dict() if hitter_ids is None else dict(hitter_ids)
+    pitcher_ids = dict() if pitcher_ids is None else dict(pitcher_ids)
+    for game in games:
+        year = game.game_date.year
+        for players, player_ids, stat_type, get_id in [(game.away_lineup + game.home_lineup, hitter_ids, "batting",
+                                                        baseball_reference.get_hitter_id),
+                                                       ([game.away_pitcher, game.home_pitcher], pitcher_ids,
+                                                        "pitching", baseball_reference.get_pitcher_id)]:
+            leaderboard_soup = pages.get(get_leaderboard_url(year, stat_type))
+            if leaderboard_soup is None:
+                continue
+            for player in players:
+                player_key = get_player_key(player, year)
+                if player_key in player_ids:
+                    continue
+                try:
+                    player_ids[player_key] = get_id(player.name, player_key[1], year, leaderboard_soup)
+                except PlayerNameNotFound as e:
+                    print(e)
+
+    return hitter_ids, pitcher_ids
+
+
+def checkpoint_slate_ids(games, hitter_ids: dict, pitcher_ids: dict, pages: dict, checkpoint: SlateCheckpoint):
+    """
+    Save the resolved IDs of the slate and record a failure for every player that could not be resolved
+    """
+    reported_keys = set()
+    for game in games:
+        year = game.game_date.year
+        for players, player_ids, player_type, unit_type, stat_type in \
+                [(game.away_lineup + game.home_lineup, hitter_ids, "b", HITTER_UNIT_TYPE, "batting"),
+                 ([game.away_pitcher, game.home_pitcher], pitcher_ids, "p", PITCHER_UNIT_TYPE, "pitching")]:
+            for player in players:
+                player_key = get_player_key(player, year)
+                if (player_type, player_key) in reported_keys:
+                    continue
+                reported_keys.add((player_type, player_key))
+
+                baseball_reference_id = player_ids.get(player_key)
+                if baseball_reference_id is not None:
+                    if checkpoint.get_player_id(player_type, player_key) is None:
+                        checkpoint.save_player_id(player_type, player_key, baseball_reference_id)
+                elif pages.get(get_leaderboard_url(year, stat_type)) is None:
+                    checkpoint.record_failure(game.game_date, unit_type, player.name, player.team,
+                                              "the %i %s leaderboard could not be fetched" % (year, stat_type))
+                else:
+                    checkpoint.record_failure(game.game_date, unit_type, player.name, player_key[1],
+                                              "not found in the %i %s leaderboard" % (year, stat_type))
+
+
+def plan_slate_players(games, hitter_ids: dict, pitcher_ids: dict, checkpoint: SlateCheckpoint = None) -> SlatePlan:
+    """
+    Enumerate the player pages needed by every game, each unique page once. Players whose unit is already in the
+    checkpoint are not fetched, nor are pages whose stats are all in the PLAYER_STAT_CACHE.
+    """
+    plan = SlatePlan()
+    for game in games:
+        year = game.game_date.year
+        for _, _, hitter, hitter_id, opposing_pitcher, opposing_pitcher_id in \
+                iter_game_players(game, hitter_ids, pitcher_ids):
+            if hitter_id is None:
+                continue
+            unit_key = get_hitter_unit_key(hitter_id, opposing_pitcher.hand, opposing_pitcher_id)
+            if checkpoint is not None and checkpoint.get_player_stats(game.game_date, unit_key) is not None:
+                continue
+            for url in get_uncached_page_urls(hitter_id, get_hitter_pages(hitter_id, year, opposing_pitcher.hand,
+                                                                          opposing_pitcher_id)):
+                plan.add_page(url)
+        for pitcher in [game.away_pitcher, game.home_pitcher]:
+            pitcher_id = pitcher_ids.get(get_player_key(pitcher, year))
+            if pitcher_id is None:
+                continue
+            if checkpoint is not None and \
+                    checkpoint.get_player_stats(game.game_date, get_pitcher_unit_key(pitcher_id)) is not None:
+                continue
+            for url in get_uncached_page_urls(pitcher_id, get_pitcher_pages(pitcher_id, year)):
+                plan.add_page(url)
+
+    return plan
+
+
+def mine_stat(mine_function, soup, *args):
+    """
+    Run a stat function on a fetched page
+    :return: dictionary of the stats, None if the page could not be fetched or does not have the stats
+    """
+    if soup is None:
+        return None
+    try:
+        return mine_function(*args, soup=soup)
+    except (TableNotFound, TableRowNotFound, DidNotFacePitcher) as e:
+        print(e)
+        return None
+
+
+def mine_cached_stat(baseball_reference_id: str, stat_kind: str, mine_function, soup, *args):
+    """
+    Get stats from the PLAYER_STAT_CACHE, or mine them from a fetched page and cache them
+    :return: dictionary of the stats, None if they are not cached and the page could not be fetched or does not
+    have the stats
+    """
+    is_cached, stats = PLAYER_STAT_CACHE.get(baseball_reference_id, stat_kind)
+    if is_cached or soup is None:
+        return stats
+
+    stats = mine_stat(mine_function, soup, *args)
+    PLAYER_STAT_CACHE.put(baseball_reference_id, stat_kind, stats)
+    return stats
+
+
+def assemble_hitter_miner(hitter_id: str, year: int, pitcher_hand: str, pitcher_id: str,
+                          pages: dict) -> HitterMiner:
+    with timed(PLAYER_MINED_EVENT, player_type="b", player_id=hitter_id):
+        hitter_miner = HitterMiner(hitter_id)
+        hitter_miner.career_stats = mine_cached_stat(hitter_id, get_stat_kind("b", "career"), get_career_hitting_stats,
+                                                     pages.get(get_player_url(hitter_id)), hitter_id)
+        career_split_soup = pages.get(get_split_url(hitter_id))
+        hitter_miner.vs_hand_stats = mine_cached_stat(hitter_id, get_stat_kind("b", "vs_hand", pitcher_hand),
+                                                      get_vs_hand_hitting_stats, career_split_soup, hitter_id,
+                                                      pitcher_hand)
+        hitter_miner.recent_stats = mine_cached_stat(hitter_id, get_stat_kind("b", "recent"), get_recent_hitting_stats,
+                                                     career_split_soup, hitter_id)
+        hitter_miner.season_stats = mine_cached_stat(hitter_id, get_stat_kind("b", "season", year),
+                                                     get_season_hitting_stats,
+                                                     pages.get(get_split_url(hitter_id, year)), hitter_id, year)
+        if pitcher_id is not None:
+            hitter_miner.vs_pitcher_stats = mine_cached_stat(hitter_id, get_stat_kind("b", "vs_pitcher", pitcher_id),
+                                                             get_vs_pitcher_stats,
+                                                             pages.get(get_vs_pitcher_url(hitter_id)), hitter_id,
+                                                             pitcher_id)
+
+        return hitter_miner
+
+
+def assemble_pitcher_miner(pitcher_id: str, year: int, pages: dict) -> PitcherMiner:
+    with timed(PLAYER_MINED_EVENT, player_type="p", player_id=pitcher_id):
+        pitcher_miner = PitcherMiner(pitcher_id)
+        career_split_soup = pages.get(get_split_url(pitcher_id, player_type="p"))
+        pitcher_miner.career_stats = mine_cached_stat(pitcher_id, get_stat_kind("p", "career"),
+                                                      get_career_pitching_stats, career_split_soup, pitcher_id)
+        pitcher_miner.recent_stats = mine_cached_stat(pitcher_id, get_stat_kind("p", "recent"),
+                                                      get_recent_pitcher_stats, career_split_soup, pitcher_id)
+        pitcher_miner.season_stats = mine_cached_stat(pitcher_id, get_stat_kind("p", "season", year),
+                                                      get_season_pitcher_stats,
+                                                      pages.get(get_split_url(pitcher_id, year, "p")), pitcher_id, year)
+
+        return pitcher_miner
+
+
+def checkpoint_player_unit(checkpoint: SlateCheckpoint, game, unit_type: str, player: PlayerStruct, unit_key: str,
+                           stats: dict, baseball_reference_id: str, player_pages: dict):
+    """
+    Save the stats of a player unit if every stat it needs was mined, otherwise record it as a failure so the
+    next run fetches the missing pages again
+    """
+    num_missing_pages = len(get_uncached_page_urls(baseball_reference_id, player_pages))
+    if num_missing_pages > 0:
+        checkpoint.record_failure(game.game_date, unit_type, player.name, player.team,
+                                  "%i of %i pages could not be fetched" % (num_missing_pages, len(player_pages)))
+    else:
+        checkpoint.save_player_stats(game.game_date, unit_key, stats)
+
+
+def assemble_game_stats(game, hitter_ids: dict, pitcher_ids: dict, pages: dict,
+                        checkpoint: SlateCheckpoint = None) -> GameStats:
+    """
+    Build the miners of a game from the checkpointed units and the pages fetched for the slate, saving each unit
+    mined from the pages in the checkpoint
+    """
+    if checkpoint is None:
+        checkpoint = SlateCheckpoint()
+    year = game.game_date.year
+    game_stats = GameStats(game)
+
+    for pitcher, pitcher_attribute in [(game.away_pitcher, "away_pitcher_miner"),
+                                       (game.home_pitcher, "home_pitcher_miner")]:
+        pitcher_id = pitcher_ids.get(get_player_key(pitcher, year))
+        if pitcher_id is None:
+            continue
+        unit_key = get_pitcher_unit_key(pitcher_id)
+        stats = checkpoint.get_player_stats(game.game_date, unit_key)
+        if stats is None:
+            pitcher_miner = assemble_pitcher_miner(pitcher_id, year, pages)
+            checkpoint_player_unit(checkpoint, game, PITCHER_UNIT_TYPE, pitcher, unit_key,
+                                   get_miner_stats(pitcher_miner, PITCHER_STAT_SPLITS), pitcher_id,
+                                   get_pitcher_pages(pitcher_id, year))
+        else:
+            pitcher_miner = PitcherMiner(pitcher_id)
+            set_miner_stats(pitcher_miner, stats)
+        setattr(game_stats, pitcher_attribute, pitcher_miner)
+
+    for is_home, batting_order_position, hitter, hitter_id, opposing_pitcher, opposing_pitcher_id in \
+            iter_game_players(game, hitter_ids, pitcher_ids):
+        if hitter_id is None:
+            continue
+        unit_key = get_hitter_unit_key(hitter_id, opposing_pitcher.hand, opposing_pitcher_id)
+        stats = checkpoint.get_player_stats(game.game_date, unit_key)
+        if stats is None:
+            hitter_miner = assemble_hitter_miner(hitter_id, year, opposing_pitcher.hand, opposing_pitcher_id, pages)
+            checkpoint_player_unit(checkpoint, game, HITTER_UNIT_TYPE, hitter, unit_key,
+                                   get_miner_stats(hitter_miner, HITTER_STAT_SPLITS), hitter_id,
+                                   get_hitter_pages(hitter_id, year, opposing_pitcher.hand, opposing_pitcher_id))
+        else:
+            hitter_miner = HitterMiner(hitter_id)
+            set_miner_stats(hitter_miner, stats)
+        game_stats.batting_order_positions[hitter_id] = batting_order_position
+        if is_home:
+            game_stats.home_hitter_miners.append(hitter_miner)
+        else:
+            game_stats.away_hitter_miners.append(hitter_miner)
+
+    home_team = get_baseball_reference_team(game.home_pitcher.team)
+    park_factors = checkpoint.get_park_factors(game.game_date, home_team)
+    if park_factors is None:
+        team_soup = pages.get(get_team_url(home_team, year))
+        if team_soup is None:
+            checkpoint.record_failure(game.game_date, GAME_UNIT_TYPE, get_game_key(game), None,
+                                      "the %s park page could not be fetched" % home_team)
+        else:
+            park_factors = get_team_info(home_team, year, team_soup)
+            if park_factors == (None, None):
+                # Not saved, so the park is fetched again by the next run
+                checkpoint.record_failure(game.game_date, GAME_UNIT_TYPE, get_game_key(game), None,
+                                          "the %s park page has no park factors" % home_team)
+                park_factors = None
+            else:
+                checkpoint.save_park_factors(game.game_date, home_team, park_factors)
+    if park_factors is not None:
+        game_stats.park_factors = park_factors
+
+    return game_stats
+
+
+def mine_slate(games, max_workers: int = SLATE_FETCH_WORKERS, checkpoint: SlateCheckpoint = None) -> [GameStats]:
+    """
+    Mine the pregame stats of every game of a slate. The pages needed by all games are planned up front and each
+    unique page is requested once, so the number of requests grows with the number of unique players rather than
+    with games times players. The leaderboards and park pages are fetched first since the player pages depend on
+    the IDs looked up in the leaderboards. Units already in the checkpoint (player IDs, player stats and park
+    factors) are not fetched again, so a rerun of a slate only requests what changed or failed. Player stats that
+    are no longer read are expired from the PLAYER_STAT_CACHE first.
+    :param games: list of Game objects
+    :param max_workers: maximum number of requests in flight
+    :param checkpoint: SlateCheckpoint of the previous runs (default is a fresh in-memory checkpoint)
+    :return: list of GameStats, one per game
+    """
+    if checkpoint is None:
+        checkpoint = SlateCheckpoint()
+    for slate_date in set(game.game_date for game in games):
+        checkpoint.clear_failures(slate_date)
+    PLAYER_STAT_CACHE.expire()
+
+    hitter_ids, pitcher_ids = load_slate_ids(games, checkpoint)
+    shared_plan = SlatePlan()
+    for game in games:
+        year = game.game_date.year
+        if any(get_player_key(hitter, year) not in hitter_ids for hitter in game.away_lineup + game.home_lineup):
+            shared_plan.add_page(get_leaderboard_url(year, "batting"))
+        if any(get_player_key(pitcher, year) not in pitcher_ids for pitcher in [game.away_pitcher, game.home_pitcher]):
+            shared_plan.add_page(get_leaderboard_url(year, "pitching"))
+        home_team = get_baseball_reference_team(game.home_pitcher.team)
+        if checkpoint.get_park_factors(game.game_date, home_team) is None:
+            shared_plan.add_page(get_team_url(home_team, year))
+    pages = shared_plan.fetch(max_workers)
+
+    hitter_ids, pitcher_ids = resolve_slate_ids(games, pages, hitter_ids, pitcher_ids)
+    checkpoint_slate_ids(games, hitter_ids, pitcher_ids, pages, checkpoint)
+    player_plan = plan_slate_players(games, hitter_ids, pitcher_ids, checkpoint)
+    print("Fetching %i shared pages and %i player pages for %i games" % (len(shared_plan), len(player_plan),
+                                                                         len(games)))
+    pages.update(player_plan.fetch(max_workers))
+
+    return [assemble_game_stats(game, hitter_ids, pitcher_ids, pages, checkpoint) for game in games]
+
+
+def get_game_matchup_key(game) -> (date, str, str):
+    """
+    :return: date and teams of the game, which stay the same when its lineups, starters or time are revised
+    """
+    return game.game_date, game.away_pitcher.team, game.home_pitcher.team
+
+
+class SlateDiff(object):
+    """
+    Differences between two revisions of a slate. Games are matched by date and teams (doubleheaders in order),
+    and players are compared slot by slot with PlayerStruct equality.
+    """
+
+    def __init__(self):
+        # Pairs of the previous and the new revision of each game whose inputs did not change
+        self.unchanged_games = list()
+        # Triples of the previous revision, the new revision and the list of reasons of each game that changed
+        self.changed_games = list()
+        self.added_games = list()
+        self.removed_games = list()
+
+    def get_games_to_mine(self) -> list:
+        return [game for _, game, _ in self.changed_games] + self.added_games
+
+    def set_changed(self, previous_game, game, reasons: [str]):
+        """
+        Mark a game as changed even if its inputs are the same, e.g. to retry the units that failed
+        """
+        self.unchanged_games.remove((previous_game, game))
+        self.changed_games.append((previous_game, game, reasons))
+
+    def __str__(self):
+        lines = ["%i unchanged, %i changed, %i added and %i removed games" %
+                 (len(self.unchanged_games), len(self.changed_games), len(self.added_games),
+                  len(self.removed_games))]
+        for _, game, reasons in self.changed_games:
+            lines.append("  %s: %s" % (get_game_key(game), ", ".join(reasons)))
+
+        return "\n".join(lines)
+
+
+def get_game_changes(previous_game, game) -> [str]:
+    """
+    :return: descriptions of the inputs of the game that changed since the previous revision, empty if none did
+    """
+    changes = list()
+    for side, previous_pitcher, pitcher in [("away", previous_game.away_pitcher, game.away_pitcher),
+                                            ("home", previous_game.home_pitcher, game.home_pitcher)]:
+        if not previous_pitcher == pitcher:
+            changes.append("%s starter %s replaced by %s" % (side, previous_pitcher.name, pitcher.name))
+    for side, previous_lineup, lineup in [("away", previous_game.away_lineup, game.away_lineup),
+                                          ("home", previous_game.home_lineup, game.home_lineup)]:
+        for batting_order_position in range(max(len(previous_lineup), len(lineup))):
+            previous_hitter = previous_lineup[batting_order_position] \
+                if batting_order_position < len(previous_lineup) else None
+            hitter = lineup[batting_order_position] if batting_order_position < len(lineup) else None
+            if previous_hitter is None or hitter is None or not previous_hitter == hitter:
+                changes.append("%s hitter %i is %s" % (side, batting_order_position + 1,
+                                                       "missing" if hitter is None else hitter.name))
+    if previous_game.game_time != game.game_time:
+        changes.append("moved from %s to %s" % (previous_game.game_time, game.game_time))
+
+    return changes
+
+
+def diff_slates(previous_games, games) -> SlateDiff:
+    """
+    Compare a new revision of a slate (e.g. a new get_game_lineups result) with the last one that was mined
+    :param previous_games: list of Game objects that were mined
+    :param games: list of Game objects of the new revision
+    :return: SlateDiff of the two revisions
+    """
+    previous_games_by_key = dict()
+    for previous_game in previous_games:
+        previous_games_by_key.setdefault(get_game_matchup_key(previous_game), list()).append(previous_game)
+
+    slate_diff = SlateDiff()
+    for game in games:
+        matching_games = previous_games_by_key.get(get_game_matchup_key(game))
+        if not matching_games:
+            slate_diff.added_games.append(game)
+            continue
+        previous_game = matching_games.pop(0)
+        changes = get_game_changes(previous_game, game)
+        if len(changes) == 0:
+            slate_diff.unchanged_games.append((previous_game, game))
+        else:
+            slate_diff.changed_games.append((previous_game, game, changes))
+    for matching_games in previous_games_by_key.values():
+        slate_diff.removed_games += matching_games
+
+    return slate_diff
+
+
+def has_failed_units(game, failed_names: set) -> bool:
+    """
+    :param failed_names: names of the players and keys of the games in a failure report
+    :return: True if a player or the park of the game is in the failure report
+    """
+    players = game.away_lineup + game.home_lineup + [game.away_pitcher, game.home_pitcher]
+    return get_game_key(game) in failed_names or any(player.name in failed_names for player in players)
+
+
+class IncrementalSlateMiner(object):
+    """
+    Miner of a slate that is revised through the day. Each revision is diffed with the last mined one: games
+    whose inputs did not change are reused as they are, and the games that changed are mined again through the
+    checkpoint, so only the players whose inputs changed (a new hitter, or the hitters facing a new starter) are
+    fetched. Games with units that failed in the last revision are mined again too.
+    """
+
+    def __init__(self, checkpoint: SlateCheckpoint = None, max_workers: int = SLATE_FETCH_WORKERS):
+        """
+        :param checkpoint: SlateCheckpoint shared by the revisions (default is an in-memory checkpoint)
+        :param max_workers: maximum number of requests in flight
+        """
+        self._checkpoint = SlateCheckpoint() if checkpoint is None else checkpoint
+        self._max_workers = max_workers
+        self.games = list()
+        self.game_stats = list()
+        self._failed_game_ids = set()
+
+    def mine(self, games) -> SlateStats:
+        """
+        Mine a revision of the slate
+        :param games: list of Game objects of the revision
+        :return: SlateStats of the revision, in the order of the games
+        """
+        slate_diff = diff_slates(self.games, games)
+        for previous_game, game in list(slate_diff.unchanged_games):
+            if id(previous_game) in self._failed_game_ids:
+                slate_diff.set_changed(previous_game, game, ["retrying failed units"])
+        print(slate_diff)
+
+        previous_game_stats = {id(game): game_stats for game, game_stats in zip(self.games, self.game_stats)}
+        game_stats_by_game = dict()
+        for previous_game, game in slate_diff.unchanged_games:
+            game_stats = previous_game_stats[id(previous_game)]
+            game_stats.game = game
+            game_stats_by_game[id(game)] = game_stats
+        games_to_mine = slate_diff.get_games_to_mine()
+        if len(games_to_mine) > 0:
+            for game, game_stats in zip(games_to_mine, mine_slate(games_to_mine, self._max_workers,
+                                                                  self._checkpoint)):
+                game_stats_by_game[id(game)] = game_stats
+
+        self.games = list(games)
+        self.game_stats = [game_stats_by_game[id(game)] for game in games]
+        failed_names = set()
+        for slate_date in set(game.game_date for game in games_to_mine):
+            failed_names.update(failure["Name"] for failure in self._checkpoint.get_failures(slate_date))
+        self._failed_game_ids = {id(game) for game in games_to_mine if has_failed_units(game, failed_names)}
+
+        return SlateStats.from_game_stats(self.game_stats)
+
+
+def remine_pregame_stats(slate_miner: IncrementalSlateMiner) -> SlateStats:
+    """ Mine the latest lineups of today's slate, reusing what the slate miner mined from the previous lineups
+    :param slate_miner: IncrementalSlateMiner of today's slate
+    :return: SlateStats of the slate
+    """
+    games = get_game_lineups()
+    if len(games) == 0:
+        raise NoGamesFound
+    return slate_miner.mine(games)
@@ -1,6 +1,10 @@
 
 from datetime import *
+from concurrent.futures import ThreadPoolExecutor
+import threading
 
+import bs4
+import numpy as np
 import pandas as pd
 import selenium.webdriver.remote.webelement
 from selenium import webdriver
@@ -11,32 +15,160 @@ from selenium.webdriver.support.select import Select
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import NoSuchElementException
 import re
-from baseball_reference import PlayerIdentifier, PlayerNameNotFound
-from time import sleep
+from baseball_reference import PlayerIdentifier, PlayerNameNotFound, innings_to_outs
+from beautiful_soup_helper import html_to_uncommented_soup
+from selenium_helper import DEFAULT_TIMEOUT, load_page, wait_for_clickable, wait_for_element
 
 
 HITTER_RELEVANT_STAT_KEYS = ["G", "PA", "AB", "R", "H", "2B", "3B", "HR", "RBI", "SB", "CS", "BB", "SO", "TB",
                              "GIDP", "HBP", "SH", "SF", "IBB"]
 
-def login_stathead(credentials: (str, str)) -> selenium.webdriver.Firefox:
+# The versus finder renders the regular season and postseason plate appearances as two tables with these suffixes.
+# The game and season finders have a single "stats" table and only serve the postseason when it is requested with
+# comp_type=post.
+REGULAR_SEASON_TABLE_SUFFIX = "_rs"
+POSTSEASON_TABLE_SUFFIX = "_po"
+
+# Column dtypes of the game finder results. Columns that are not listed are inferred from their contents.
+GAME_LOG_COMMON_SCHEMA = {"Rk": "int16",
+                          "Player": "category",
+                          "br_id": "category",
+                          "Date": "datetime64[ns]",
+                          "Age": "string",
+                          "Team": "category",
+                          "IsHome": "bool",
+                          "Opp": "category",
+                          "Result": "string",
+                          "Pos": "category",
+                          "is_postseason": "bool"}
+HITTING_GAME_LOG_SCHEMA = dict(GAME_LOG_COMMON_SCHEMA,
+                               **{key: "int16" for key in ["PA", "AB", "R", "H", "1B", "2B", "3B", "HR", "RBI",
+                                                           "SB", "CS", "BB", "SO", "TB", "GIDP", "HBP", "SH", "SF",
+                                                           "IBB", "BOP"]},
+                               **{key: "float32" for key in ["BA", "OBP", "SLG", "OPS"]})
+PITCHING_GAME_LOG_SCHEMA = dict(GAME_LOG_COMMON_SCHEMA,
+                                **{key: "int16" for key in ["H", "R", "ER", "UER", "HR", "BB", "IBB", "SO", "HBP",
+                                                            "BK", "WP", "BF", "BR"]},
+                                **{"IP": "float32", "Outs": "int16", "App,Dec": "string"})
+
+def login_stathead(credentials: (str, str), timeout: float = DEFAULT_TIMEOUT) -> selenium.webdriver.Firefox:
     login_url = "https://stathead.com/users/login.cgi"
 
     # Login to Stathead to unlock all the data
     browser = webdriver.Firefox()
     browser.get(login_url)
-    username_field = WebDriverWait(browser, 20).until(
-        EC.presence_of_element_located((By.ID, "username")))
+    username_field = wait_for_element(browser, (By.ID, "username"), timeout, label="login_username")
     username_field.send_keys(credentials[0])
-    password_field = WebDriverWait(browser, 20).until(
-        EC.presence_of_element_located((By.ID, "password")))
+    password_field = wait_for_element(browser, (By.ID, "password"), timeout, label="login_password")
     password_field.send_keys(credentials[1])
-    login_button = WebDriverWait(browser, 20).until(
-        EC.element_to_be_clickable((By.ID, "sh-login-button")))
+    login_button = wait_for_clickable(browser, (By.ID, "sh-login-button"), timeout, label="login_button")
     login_button.click()
 
     return browser
 
 
+class StatheadBrowserPool(object):
+    """
+    Pool of browsers logged in to Stathead that may be shared between threads. Browsers are logged in lazily,
+    so no more sessions are opened than are actually used concurrently.
+    """
+
+    def __init__(self, credentials: (str, str), size: int = 3):
+        """
+        :param credentials: Stathead username and password
+        :param size: maximum number of browsers in the pool
+        """
+        self._credentials = credentials
+        self._size = size
+        self._idle_browsers = list()
+        self._all_browsers = list()
+        # Browsers that are logged in or being logged in, counted against the size of the pool
+        self._num_slots = 0
+        # Signalled whenever a browser is released or a slot is freed
+        self._condition = threading.Condition()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def acquire(self) -> selenium.webdriver.Firefox:
+        """
+        Take a logged in browser from the pool, logging in a new one if the pool is not full yet, otherwise waiting
+        for another thread to release one
+        :return: browser logged in to Stathead
+        """
+        with self._condition:
+            while len(self._idle_browsers) == 0 and self._num_slots >= self._size:
+                self._condition.wait()
+            if len(self._idle_browsers) > 0:
+                return self._idle_browsers.pop()
+            # Reserve the slot before logging in so other threads do not exceed the pool size
+            self._num_slots += 1
+
+        try:
+            browser = login_stathead(self._credentials)
+        except Exception:
+            with self._condition:
+                self._num_slots -= 1
+                # A waiting thread may log in with the freed slot
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._all_browsers.append(browser)
+
+        return browser
+
+    def release(self, browser: selenium.webdriver.Firefox):
+        with self._condition:
+            self._idle_browsers.append(browser)
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            for browser in self._all_browsers:
+                browser.quit()
+            self._all_browsers = list()
+            self._idle_browsers = list()
+            self._num_slots = 0
+            self._condition.notify_all()
+
+
+def get_page_soup(browser: selenium.webdriver.Firefox) -> bs4.BeautifulSoup:
+    """
+    Parse the page currently open in the browser, including the tables that are still commented out
+    :param browser: browser with the page of interest open
+    :return: BeautifulSoup object of the whole page
+    """
+    return html_to_uncommented_soup(browser.page_source)
+
+
+def get_table_variants(soup: bs4.BeautifulSoup, table_id: str) -> [(bs4.element.Tag, bool)]:
+    """
+    Find the regular season and postseason variants of a versus finder results table. Only the variant selected by
+    the tab switcher is rendered, but both are in the page source, so no clicking is required.
+    :param soup: BeautifulSoup object of the results page
+    :param table_id: HTML "id" of the table without its regular season/postseason suffix
+    :return: list of each table that was found and whether it holds postseason data
+    """
+    table_variants = list()
+    for suffix, is_postseason in [(REGULAR_SEASON_TABLE_SUFFIX, False), (POSTSEASON_TABLE_SUFFIX, True)]:
+        table = soup.find("table", {"id": table_id + suffix})
+        if table is not None:
+            table_variants.append((table, is_postseason))
+
+    return table_variants
+
+
+def get_cell_text(row: bs4.element.Tag, data_stat: str) -> str:
+    cell = row.find("td", {"data-stat": data_stat})
+    if cell is None:
+        return ""
+
+    return cell.get_text().strip()
+
+
 def get_vs_pitcher(hitter_id: str, min_year: int, max_year: int, credentials: (str, str)):
 
     browser = login_stathead(credentials)
@@ -47,8 +179,8 @@ def get_vs_pitcher(hitter_id: str, min_year: int, max_year: int, credentials: (s
     # TODO need to now extract the data
     # TODO return generalized object with the table data so we can pick out a specific pitcher in a helper method
 
-    # TODO we can actually get this by plate appearance using Stathead.
-    # TODO so we can save those events to the database and we can get the accurate pregame data from that
+    # Plate appearance level data is available from get_vs_pitcher_gamelogs and can be stored with
+    # plate_appearance_store.PlateAppearanceStore to compute accurate pregame data locally
 
     main_table = browser.find_element(By.ID, "result_table")
     table_rows = main_table.find_elements(By.TAG_NAME, "tr")
@@ -57,100 +189,64 @@ def get_vs_pitcher(hitter_id: str, min_year: int, max_year: int, credentials: (s
 
 
 def get_vs_pitcher_gamelogs(hitter_stathead_id: str, hitter_last_name: str, pitcher_stathead_id: str,
-                            credentials: (str, str), browser: selenium.webdriver.Firefox = None) -> [dict]:
+                            credentials: (str, str), browser: selenium.webdriver.Firefox = None,
+                            timeout: float = DEFAULT_TIMEOUT) -> [dict]:
     if browser is None:
         browser = login_stathead(credentials)
 
     url = "https://stathead.com/baseball/versus-finder.cgi?request=1&post=1&player_id1=%s&player_id2=%s" % (hitter_stathead_id, pitcher_stathead_id)
-    browser.get(url)
-
-    table_list = list()
-    num_attempts = 0
-    while num_attempts < 3:
-        try:
-            table_list.append(browser.find_element(By.ID, "div_stats_bvp_pa_rs"))
-            break
-        except selenium.common.exceptions.NoSuchElementException:
-            break
-        except selenium.common.exceptions.WebDriverException as e:
-            sleep(5.0)
-            browser.get(url)
-            num_attempts = num_attempts + 1
-            if num_attempts >= 3:
-                raise e
-            pass
-    try:
-        table_list.append(browser.find_element(By.ID, "div_stats_bvp_pa_po"))
-    except selenium.common.exceptions.NoSuchElementException:
-        pass
+    load_page(browser, url, timeout, label="versus_finder")
+    soup = get_page_soup(browser)
 
     output_rows = list()
     team = None
     pitcher_team = None
     current_date = None
-    for idx, table in enumerate(table_list):
-        # In order to enable the playoffs stats, we must click the button
-        if idx == 1:
-            main_table = browser.find_element(By.ID, "all_stathead_results_bvp_pa")
-            switcher_element = main_table.find_element(By.XPATH, ".//div[@data-controls='#switcher_stathead_results_bvp_pa']")
-            playoffs_button = WebDriverWait(switcher_element, 5).until(
-                EC.element_to_be_clickable((By.XPATH, ".//a[@data-show='.assoc_stats_bvp_pa_po']")))
-            playoffs_button.click()
-        table_rows = table.find_element(By.TAG_NAME, "tbody").find_elements(By.TAG_NAME, "tr")
-        for row in table_rows:
-            if len(row.get_attribute("class")) == 0:
+    for table, is_postseason in get_table_variants(soup, "stats_bvp_pa"):
+        table_body = table.find("tbody")
+        if table_body is None:
+            continue
+        for row in table_body.findAll("tr"):
+            if len(row.get("class", list())) == 0:
 
                 # Interpret what happened during the plate apperance
-                play_element = row.find_element(By.XPATH, ".//td[@data-stat='play_desc']")
-                row_dict = interpret_plate_appearance_result_string(play_element.text, hitter_last_name)
-                row_dict["PlayDescription"] = play_element.text
+                play_text = get_cell_text(row, "play_desc")
+                row_dict = interpret_plate_appearance_result_string(play_text, hitter_last_name)
+                row_dict["PlayDescription"] = play_text
 
                 # Find the team ID
-                team_element = row.find_element(By.XPATH, ".//td[@data-stat='event_b_team']")
-                if team_element is not None and len(team_element.text) > 0:
-                    team = team_element.text
+                team_text = get_cell_text(row, "event_b_team")
+                if len(team_text) > 0:
+                    team = team_text
                 if team is None:
                     raise PlayerNameNotFound # TODO need a better exception to throw
                 row_dict["HitterTeam"] = team
 
                 # Find the opposing team ID
-                pitcher_team_element = row.find_element(By.XPATH, ".//td[@data-stat='event_p_team']")
-                if pitcher_team_element is not None and len(pitcher_team_element.text) > 0:
-                    pitcher_team = pitcher_team_element.text
+                pitcher_team_text = get_cell_text(row, "event_p_team")
+                if len(pitcher_team_text) > 0:
+                    pitcher_team = pitcher_team_text
                 if pitcher_team is None:
                     raise PlayerNameNotFound
                 row_dict["PitcherTeam"] = pitcher_team
 
                 # Find the score field
-                score_element = row.find_element(By.XPATH, ".//td[@data-stat='team_rel_score']")
-                row_dict["ScoreString"] = score_element.text
+                row_dict["ScoreString"] = get_cell_text(row, "team_rel_score")
 
                 # Find the inning field
-                inning_element = row.find_element(By.XPATH, ".//td[@data-stat='inning']")
-                row_dict["Inning"] = inning_element.text
+                row_dict["Inning"] = get_cell_text(row, "inning")
 
                 # Interpret the runners on base field
-                rob_element = row.find_element(By.XPATH, ".//td[@data-stat='runners_on_bases']")
-                is_runner_on_first = False
-                if re.search("1", rob_element.text) is not None:
-                    is_runner_on_first = True
-                row_dict["RunnerOnFirst"] = is_runner_on_first
-                is_runner_on_second = False
-                if re.search("2", rob_element.text) is not None:
-                    is_runner_on_second = True
-                row_dict["RunnerOnSecond"] = is_runner_on_second
-                is_runner_on_third = False
-                if re.search("3", rob_element.text) is not None:
-                    is_runner_on_third = True
-                row_dict["RunnerOnThird"] = is_runner_on_third
+                runners_text = get_cell_text(row, "runners_on_bases")
+                row_dict["RunnerOnFirst"] = re.search("1", runners_text) is not None
+                row_dict["RunnerOnSecond"] = re.search("2", runners_text) is not None
+                row_dict["RunnerOnThird"] = re.search("3", runners_text) is not None
 
                 # Find the number of outs
-                out_element = row.find_element(By.XPATH, ".//td[@data-stat='outs']")
-                row_dict["Outs"] = int(out_element.text)
+                row_dict["Outs"] = int(get_cell_text(row, "outs"))
 
                 # Interpret the count field (i.e. total pitches, balls, strikes
-                count_element = row.find_element(By.XPATH, ".//td[@data-stat='pitches_pbp']")
-                count_match = re.match("([0-9]*) \(([0-9]*)-([0-9]*)\)", count_element.text)
+                count_match = re.match("([0-9]*) \\(([0-9]*)-([0-9]*)\\)", get_cell_text(row, "pitches_pbp"))
                 # Some games early on do not have these fields populated
                 if count_match is not None:
                     row_dict["Pitches"] = int(count_match.group(1))
@@ -158,23 +254,59 @@ def get_vs_pitcher_gamelogs(hitter_stathead_id: str, hitter_last_name: str, pitc
                     row_dict["Strikes"] = int(count_match.group(3))
 
                 # Interpret the date field
-                date_element = row.find_element(By.XPATH, ".//td[@data-stat='date']")
-                if date_element is not None and len(date_element.text) > 0:
-                    date_text = date_element.text
+                date_text = get_cell_text(row, "date")
+                if len(date_text) > 0:
                     date_text = date_text.split(" ")[0] # Remove double-header designations
                     current_date = datetime.combine(date.fromisoformat(date_text), datetime.min.time())
-                if current_date is None and len(date_element.text) > 0:
+                if current_date is None and len(date_text) > 0:
                     raise PlayerNameNotFound
                 row_dict["Date"] = current_date
 
-                row_dict["Sequence"] = int(row.find_element(By.TAG_NAME, "th").text)
+                row_dict["Sequence"] = int(row.find("th").get_text().strip())
                 row_dict["HitterId"] = hitter_stathead_id
                 row_dict["PitcherId"] = pitcher_stathead_id
+                row_dict["is_postseason"] = is_postseason
                 output_rows.append(row_dict)
 
     return output_rows
 
 
+def get_lineup_vs_pitcher_gamelogs(pitcher_stathead_id: str, hitters: [(str, str)], credentials: (str, str),
+                                   browser_pool: StatheadBrowserPool = None, max_workers: int = 3) -> pd.DataFrame:
+    """
+    Get the plate appearance game logs of every hitter in a lineup against a single pitcher. The matchups are
+    fetched concurrently over a pool of Stathead sessions.
+    :param pitcher_stathead_id: Stathead ID of the pitcher
+    :param hitters: Stathead ID and last name of each hitter in the lineup
+    :param credentials: Stathead username and password
+    :param browser_pool: pool of Stathead sessions to use (default is a new pool closed once the lineup is fetched)
+    :param max_workers: number of matchups fetched at once
+    :return: combined plate appearances of all hitters in the same form as get_vs_pitcher_gamelogs
+    """
+    # The same hitter may be listed twice (e.g. a lineup card revision), so only fetch each matchup once
+    unique_hitters = list(dict.fromkeys(hitters))
+
+    owns_pool = browser_pool is None
+    if owns_pool:
+        browser_pool = StatheadBrowserPool(credentials, min(max_workers, len(unique_hitters)))
+
+    def fetch_hitter(hitter: (str, str)) -> [dict]:
+        browser = browser_pool.acquire()
+        try:
+            return get_vs_pitcher_gamelogs(hitter[0], hitter[1], pitcher_stathead_id, credentials, browser)
+        finally:
+            browser_pool.release(browser)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            hitter_rows = list(executor.map(fetch_hitter, unique_hitters))
+    finally:
+        if owns_pool:
+            browser_pool.close()
+
+    return pd.DataFrame([row for rows in hitter_rows for row in rows])
+
+
 def interpret_plate_appearance_result_string(input_str: str, hitter_last_name: str) -> dict:
     output_dict = dict()
 
@@ -394,8 +526,36 @@ def get_season_pitcher_identifiers_and_bf(year_start: int,  credentials: (str, s
     return ids
 
 
-def get_career_hitting_stats(baseball_reference_id: str, player_name: str, is_postseason: bool, credentials: (str, str) = None,
-                             browser: selenium.webdriver.Firefox = None) -> dict:
+def read_career_stats_table(table: bs4.element.Tag, baseball_reference_id: str) -> dict:
+    """
+    Read the row of a player from a season finder results table
+    :param table: results table of a regular season or postseason search
+    :param baseball_reference_id: BaseballReference ID of the player of interest
+    :return: dictionary of the relevant stats of the player, zeros if the player is not in the table
+    """
+    table_header = table.find("thead")
+    table_body = table.find("tbody")
+    player = None if table_body is None else table_body.find("td", {"data-append-csv": baseball_reference_id})
+    if table_header is None or player is None:
+        return {stat: 0 for stat in HITTER_RELEVANT_STAT_KEYS}
+
+    stat_key_list = [stat_key.get_text().strip() for stat_key in table_header.find_all("th")
+                     if stat_key.get_text().strip() != "Rk"]
+    stat_list = [stat.get_text().strip() for stat in player.parent.find_all("td")]
+
+    output_dict = dict()
+    for stat_key, stat in zip(stat_key_list, stat_list):
+        if stat_key in HITTER_RELEVANT_STAT_KEYS:
+            try:
+                output_dict[stat_key] = int(stat)
+            except ValueError:
+                output_dict[stat_key] = 0
+
+    return output_dict
+
+
+def get_career_hitting_stats(baseball_reference_id: str, player_name: str, is_postseason: bool,
+                             credentials: (str, str) = None, browser: selenium.webdriver.Firefox = None) -> dict:
 
     split_name = player_name.split(" ")
     first_name = split_name[0]
@@ -412,158 +572,155 @@ def get_career_hitting_stats(baseball_reference_id: str, player_name: str, is_po
     if browser is None:
         browser = login_stathead(credentials)
     browser.get(url)
-
-    try:
-        results = browser.find_element(By.ID, "all_stathead_results")
-        stats_object = results.find_element(By.ID, "div_stats")
-        stats_table = stats_object.find_element(By.TAG_NAME, "tbody")
-        player = stats_table.find_element(By.CSS_SELECTOR,
-                                          "td[data-append-csv='%s']" % baseball_reference_id.replace("'", "\\'"))
-        player_row = player.find_element(By.XPATH, "./..")
-        stat_tags = stats_object.find_element(By.TAG_NAME, "thead")
-        stat_key_list = list()
-        for stat_key in stat_tags.find_elements(By.TAG_NAME, "th"):
-            if stat_key.text != "Rk":
-                stat_key_list.append(stat_key.text)
-        stat_list = list()
-        for stat in player_row.find_elements(By.TAG_NAME, "td"):
-            stat_list.append(stat.text)
-
-        output_dict = dict()
-        for i in range(0, len(stat_key_list)):
-            stat_key = stat_key_list[i]
-            if stat_key in HITTER_RELEVANT_STAT_KEYS:
-                try:
-                    output_dict[stat_key_list[i]] = int(stat_list[i])
-                except ValueError:
-                    output_dict[stat_key_list[i]] = 0
-
-        return output_dict
-    except selenium.common.exceptions.NoSuchElementException:
+    table = get_page_soup(browser).find("table", {"id": "stats"})
+    if table is None:
         return {stat: 0 for stat in HITTER_RELEVANT_STAT_KEYS}
 
+    return read_career_stats_table(table, baseball_reference_id)
 
-def get_season_hitting_game_logs(stathead_id: str, year: int, credentials: (str, str) = None, browser: selenium.webdriver.Firefox = None) -> pd.DataFrame:
-    # TODO they split the season and postseason
-    url = "https://stathead.com/baseball/player-batting-game-finder.cgi?request=1&player_id=%s&timeframe=seasons&year_min=%i&year_max=%i" % (stathead_id, year, year)
 
-    if browser is None:
-        browser = login_stathead(credentials)
-    browser.get(url)
-
-    table = browser.find_element(By.ID, "stats")
-    table_header = table.find_element(By.TAG_NAME, "thead")
-    table_header_names = [element.text for element in table_header.find_elements(By.TAG_NAME, "th")]
-    table_body = table.find_element(By.TAG_NAME, "tbody")
-    table_rows = table_body.find_elements(By.TAG_NAME, "tr")
+def get_season_hitting_game_logs(stathead_id: str, year: int, credentials: (str, str) = None,
+                                 browser: selenium.webdriver.Firefox = None,
+                                 timeout: float = DEFAULT_TIMEOUT) -> pd.DataFrame:
+    url = "https://stathead.com/baseball/player-batting-game-finder.cgi?request=1&player_id=%s&timeframe=seasons&year_min=%i&year_max=%i" % (stathead_id, year, year)
+    return get_game_finder_logs(url, HITTING_GAME_LOG_SCHEMA, credentials, browser, timeout)
 
-    dict_list = list()
 
-    for row in table_rows:
-        # The 'Rk' at-bat counter is a 'th' tag, but there shouldn't be any others
-        header_fields = row.find_elements(By.TAG_NAME, "th")
-        if len(header_fields) > 1:
-            continue
-        entries = header_fields + row.find_elements(By.TAG_NAME, "td")
-        if len(entries) != len(table_header_names):
-            continue
-        stat_dict = dict()
-        for i in range(0, len(entries)):
-            table_header_name = table_header_names[i]
-            if len(table_header_name) == 0:
-                table_header_name = "IsHome"
-            try:
-                num = int(entries[i].text)
-                stat_dict[table_header_name] = num
-            except ValueError:
-                try:
-                    num = float(entries[i].text)
-                    stat_dict[table_header_name] = num
-                except ValueError:
-                    if table_header_name == "IsHome":
-                        if entries[i].text == "@":
-                            val = False
-                        else:
-                            val = True
-                    else:
-                        if len(entries[i].text) == 0:
-                            val = 0
-                        else:
-                            val = entries[i].text
-                    stat_dict[table_header_name] = val
-            if table_header_name == "Player":
-                player_link = entries[i].find_element(By.TAG_NAME, "a").get_attribute("href")
-                match = re.search(r'([^/]+)(?=\.shtml)', player_link)
-                stat_dict["br_id"] = match.group()
-
-        dict_list.append(stat_dict)
-
-    return pd.DataFrame(dict_list)
-
-
-def get_season_pitching_game_logs(stathead_id: str, year: int, credentials: (str, str) = None, browser: selenium.webdriver.Firefox = None) -> pd.DataFrame:
-    # TODO they split the season and postseason
+def get_season_pitching_game_logs(stathead_id: str, year: int, credentials: (str, str) = None,
+                                  browser: selenium.webdriver.Firefox = None,
+                                  timeout: float = DEFAULT_TIMEOUT) -> pd.DataFrame:
     url = "https://stathead.com/baseball/player-pitching-game-finder.cgi?request=1&player_id=%s&timeframe=seasons&year_min=%i&year_max=%i" % (stathead_id, year, year)
-
+    return get_game_finder_logs(url, PITCHING_GAME_LOG_SCHEMA, credentials, browser, timeout)
+
+
+def get_game_finder_logs(url: str, schema: dict, credentials: (str, str) = None,
+                         browser: selenium.webdriver.Firefox = None, timeout: float = DEFAULT_TIMEOUT) -> pd.DataFrame:
+    """
+    Get the regular season game logs from a Stathead game finder results page
+    :param url: URL of the game finder results
+    :param schema: dictionary of column name to the dtype of that column
+    :param credentials: Stathead username and password (only used if browser is None)
+    :param browser: browser already logged in to Stathead (default is a new login)
+    :param timeout: maximum number of seconds to wait for the page to load
+    :return: one row per game, with an "is_postseason" column that is False for every row
+    """
     if browser is None:
         browser = login_stathead(credentials)
-    browser.get(url)
-
-    table = browser.find_element(By.ID, "stats")
-    table_header = table.find_element(By.TAG_NAME, "thead")
-    table_header_names = [element.text for element in table_header.find_elements(By.TAG_NAME, "th")]
-    table_body = table.find_element(By.TAG_NAME, "tbody")
-    table_rows = table_body.find_elements(By.TAG_NAME, "tr")
-
-    dict_list = list()
-
-    for row in table_rows:
-        # The 'Rk' at-bat counter is a 'th' tag, but there shouldn't be any others
-        header_fields = row.find_elements(By.TAG_NAME, "th")
-        if len(header_fields) > 1:
-            continue
-        entries = header_fields + row.find_elements(By.TAG_NAME, "td")
-        if len(entries) != len(table_header_names):
-            continue
-        stat_dict = dict()
-        for i in range(0, len(entries)):
-            table_header_name = table_header_names[i]
-            if len(table_header_name) == 0:
-                table_header_name = "IsHome"
-            try:
-                num = int(entries[i].text)
-                stat_dict[table_header_name] = num
-            except ValueError:
-                try:
-                    num = float(entries[i].text)
-                    stat_dict[table_header_name] = num
-                except ValueError:
-                    if table_header_name == "IsHome":
-                        if entries[i].text == "@":
-                            val = False
-                        else:
-                            val = True
-                    else:
-                        if len(entries[i].text) == 0:
-                            val = 0
-                        else:
-                            val = entries[i].text
-                    stat_dict[table_header_name] = val
-            if table_header_name == "Player":
-                player_link = entries[i].find_element(By.TAG_NAME, "a").get_attribute("href")
-                match = re.search(r'([^/]+)(?=\.shtml)', player_link)
-                stat_dict["br_id"] = match.group()
-
-        dict_list.append(stat_dict)
-
-    return pd.DataFrame(dict_list)
-
-
-
-
-
-
-
-
-
-
+    load_page(browser, url, timeout, label="game_finder")
+    soup = get_page_soup(browser)
+
+    # TODO the postseason games are a separate comp_type=post search
+    builder = GameLogFrameBuilder(schema)
+    table = soup.find("table", {"id": "stats"})
+    if table is not None:
+        builder.add_table(table, False)
+
+    return builder.build()
+
+
+class GameLogFrameBuilder(object):
+    """
+    Accumulates the cells of Stathead game log tables column by column and converts each column to the dtype
+    declared in the schema, rather than guessing the type of every cell
+    """
+
+    def __init__(self, schema: dict):
+        """
+        :param schema: dictionary of column name to the dtype of that column
+        """
+        self._schema = schema
+        self._columns = dict()
+        self._num_rows = 0
+
+    def _append(self, column_name: str, value):
+        column = self._columns.get(column_name)
+        if column is None:
+            # Columns that only appear in a later table are empty for the previous rows
+            column = [""] * self._num_rows
+            self._columns[column_name] = column
+        column.append(value)
+
+    def add_table(self, table: bs4.element.Tag, is_postseason: bool) -> int:
+        """
+        Append the rows of a game log table
+        :param table: game log table from the page source
+        :param is_postseason: whether the table holds postseason games
+        :return: number of rows appended
+        """
+        table_header = table.find("thead")
+        table_body = table.find("tbody")
+        if table_header is None or table_body is None:
+            return 0
+        table_header_names = [element.get_text().strip() for element in table_header.findAll("th")]
+        table_header_names = [name if len(name) > 0 else "IsHome" for name in table_header_names]
+
+        num_rows_before = self._num_rows
+        for row in table_body.findAll("tr"):
+            # The 'Rk' at-bat counter is a 'th' tag, but there shouldn't be any others
+            header_fields = row.findAll("th")
+            if len(header_fields) > 1:
+                continue
+            entries = header_fields + row.findAll("td")
+            if len(entries) != len(table_header_names):
+                continue
+            for table_header_name, entry in zip(table_header_names, entries):
+                self._append(table_header_name, entry.get_text().strip())
+                if table_header_name == "Player":
+                    player_link = entry.find("a").get("href")
+                    self._append("br_id", re.search(r'([^/]+)(?=\.shtml)', player_link).group())
+            self._append("is_postseason", is_postseason)
+            self._num_rows += 1
+            for column in self._columns.values():
+                if len(column) < self._num_rows:
+                    column.append("")
+
+        return self._num_rows - num_rows_before
+
+    def build(self) -> pd.DataFrame:
+        columns = {column_name: convert_game_log_column(column_name, values, self._schema.get(column_name))
+                   for column_name, values in self._columns.items()}
+        if "IP" in self._columns:
+            # Innings pitched count outs after the decimal point ("5.2" is 5 2/3 innings), so they are read as outs
+            outs = [str(innings_to_outs(value)) if len(value) > 0 else "" for value in self._columns["IP"]]
+            columns["Outs"] = convert_game_log_column("Outs", outs, self._schema.get("Outs"))
+            columns["IP"] = (columns["Outs"] / 3.).astype(self._schema.get("IP", "float32"))
+
+        return pd.DataFrame(columns)
+
+
+def convert_game_log_column(column_name: str, values: list, dtype: str = None):
+    """
+    Convert the raw cell text of a game log column to a typed array
+    :param column_name: name of the column
+    :param values: cell text of every row in the column
+    :param dtype: dtype declared for the column (default is to infer it from the values)
+    :return: typed array of the column values
+    """
+    if column_name == "IsHome":
+        # The home/away column is blank for home games and "@" for away games
+        return np.array([value != "@" for value in values], dtype=bool)
+    if column_name == "is_postseason":
+        return np.array([value is True for value in values], dtype=bool)
+
+    series = pd.Series(values, dtype=object)
+    if dtype is None:
+        numbers = pd.to_numeric(series.replace("", "0"), errors="coerce")
+        if numbers.isna().any():
+            return series.to_numpy()
+        if (numbers == numbers.round()).all():
+            return numbers.astype("int32").to_numpy()
+        return numbers.astype("float32").to_numpy()
+
+    if dtype.startswith("int"):
+        # Blank cells of the counting stats mean the stat did not occur
+        return pd.to_numeric(series.replace("", "0"), errors="coerce").fillna(0).astype(dtype).to_numpy()
+    if dtype.startswith("float"):
+        # Blank cells of the rate stats mean there was nothing to divide by (e.g. a BA without at bats)
+        return pd.to_numeric(series.replace("", np.nan), errors="coerce").astype(dtype).to_numpy()
+    if dtype.startswith("datetime"):
+        # Remove double-header designations
+        return pd.to_datetime(series.str.split(" ").str[0], format="%Y-%m-%d", errors="coerce").to_numpy()
+    if dtype == "category":
+        return pd.Categorical(series)
+
+    return series.astype(dtype).array
@@ -0,0 +1,264 @@
+"""
+telemetry.py
+Module used for emitting structured events of a mining run (requests, cache lookups, table parsing and player mining)
+to pluggable sinks, so a slow run can be traced to the network, parsing or rate limiting
+"""
+
+from contextlib import contextmanager
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import sys
+import threading
+import time
+
+# Types of the events emitted by the miners
+REQUEST_START_EVENT = "request_start"
+REQUEST_END_EVENT = "request_end"
+RATE_LIMITED_EVENT = "rate_limited"
+CACHE_LOOKUP_EVENT = "cache_lookup"
+PARSE_EVENT = "parse"
+PLAYER_MINED_EVENT = "player_mined"
+
+# Prefix of the metric names of a MetricsRegistry
+METRIC_PREFIX = "mlb_scraper_"
+
+# Seconds between two progress lines of a ConsoleProgressSink
+CONSOLE_PROGRESS_INTERVAL = 10.
+
+# Sinks every event of this process is handed to. Events are dropped when there are none.
+_sinks = tuple()
+
+
+def set_telemetry_sinks(sinks):
+    """ Send the events of this process to the sinks, e.g. [JsonLinesSink(path), ConsoleProgressSink()]
+    :param sinks: list of objects with a handle(event) method, called from the thread emitting the event
+    :return: the previous list of sinks
+    """
+    global _sinks
+    previous_sinks = list(_sinks)
+    _sinks = tuple(sinks)
+    return previous_sinks
+
+
+def has_telemetry_sinks():
+    """
+    :return: whether the events of this process go anywhere
+    """
+    return len(_sinks) > 0
+
+
+def emit(event_type, **fields):
+    """ Hand an event to every sink
+    :param event_type: one of the *_EVENT types
+    :param fields: fields of the event, e.g. the URL and status code of a request
+    """
+    sinks = _sinks
+    if len(sinks) == 0:
+        return
+
+    event = dict(fields, event=event_type, timestamp=time.time(), thread=threading.current_thread().name)
+    for sink in sinks:
+        sink.handle(event)
+
+
+@contextmanager
+def timed(event_type, **fields):
+    """ Emit an event with the seconds taken by the block, and the exception type if the block raised one
+    :param event_type: one of the *_EVENT types
+    :param fields: other fields of the event
+    """
+    start_time = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        fields["error"] = type(e).__name__
+        raise
+    finally:
+        emit(event_type, seconds=time.perf_counter() - start_time, **fields)
+
+
+class JsonLinesSink(object):
+    """
+    Append every event as one line of JSON to a file
+    """
+
+    def __init__(self, path):
+        """
+        :param path: path of the file, appended to if it exists
+        """
+        self._file = open(path, "a")
+        self._lock = threading.Lock()
+
+    def handle(self, event):
+        line = json.dumps(event, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class MetricsRegistry(object):
+    """
+    In-process counters and summaries (count and sum of observed values) of the events, labelled like Prometheus
+    metrics and exported in its text format
+    """
+
+    def __init__(self):
+        self._counters = dict()
+        self._summaries = dict()
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1., **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            count, total = self._summaries.get(key, (0, 0.))
+            self._summaries[key] = (count + 1, total + value)
+
+    def get_counter(self, name, **labels):
+        """
+        :return: sum of the counters of the name whose labels include the given labels
+        """
+        with self._lock:
+            return sum(value for (counter_name, counter_labels), value in self._counters.items()
+                       if counter_name == name and set(labels.items()) <= set(counter_labels))
+
+    def get_summary(self, name, **labels):
+        """
+        :return: number and sum of the values observed for the name by the summaries whose labels include the
+        given labels
+        """
+        with self._lock:
+            matching_summaries = [summary for (summary_name, summary_labels), summary in self._summaries.items()
+                                  if summary_name == name and set(labels.items()) <= set(summary_labels)]
+        return sum(count for count, _ in matching_summaries), sum(total for _, total in matching_summaries)
+
+    def handle(self, event):
+        event_type = event["event"]
+        if event_type == REQUEST_END_EVENT:
+            self.increment("requests_total", status=str(event.get("status_code") or event.get("error")))
+            self.increment("response_bytes_total", event.get("bytes", 0))
+            self.observe("request_seconds", event["seconds"])
+        elif event_type == RATE_LIMITED_EVENT:
+            self.increment("rate_limited_total")
+        elif event_type == CACHE_LOOKUP_EVENT:
+            self.increment("cache_lookups_total", cache=event["cache"], result="hit" if event["hit"] else "miss")
+        elif event_type == PARSE_EVENT:
+            self.observe("parse_seconds", event["seconds"], table=event["table"])
+        elif event_type == PLAYER_MINED_EVENT:
+            self.observe("player_mining_seconds", event["seconds"], player_type=event["player_type"])
+
+    def to_prometheus(self):
+        """
+        :return: every metric in the Prometheus text exposition format
+        """
+        def format_series(name, labels, value):
+            label_text = ",".join('%s="%s"' % (label, str(label_value).replace('"', '\\"'))
+                                  for label, label_value in labels)
+            return "%s%s%s %s" % (METRIC_PREFIX, name, "{%s}" % label_text if label_text else "", repr(value))
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+            summaries = sorted(self._summaries.items())
+
+        lines = list()
+        previous_name = None
+        for (name, labels), value in counters:
+            if name != previous_name:
+                lines.append("# TYPE %s%s counter" % (METRIC_PREFIX, name))
+                previous_name = name
+            lines.append(format_series(name, labels, value))
+        for (name, labels), (count, total) in summaries:
+            if name != previous_name:
+                lines.append("# TYPE %s%s summary" % (METRIC_PREFIX, name))
+                previous_name = name
+            lines.append(format_series(name + "_count", labels, count))
+            lines.append(format_series(name + "_sum", labels, total))
+
+        return "\n".join(lines) + "\n"
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+
+    def __init__(self, *args, registry=None, **kwargs):
+        self._registry = registry
+        super(MetricsRequestHandler, self).__init__(*args, **kwargs)
+
+    def do_GET(self):
+        body = self._registry.to_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(registry, port=0):
+    """
+    Serve the metrics of a registry over HTTP in a background thread, for a local Prometheus to scrape
+    :param registry: MetricsRegistry that is one of the sinks
+    :param port: port to listen on (default is any free port)
+    :return: the running server (stop it with shutdown()) and its metrics URL
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), partial(MetricsRequestHandler, registry=registry))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, "http://%s:%i/metrics" % server.server_address
+
+
+class ConsoleProgressSink(object):
+    """
+    Print a one-line summary of the run so far at most once per interval, and every rate-limited request as it
+    happens
+    """
+
+    def __init__(self, interval=CONSOLE_PROGRESS_INTERVAL, stream=None):
+        """
+        :param interval: minimum number of seconds between two progress lines
+        :param stream: file the lines are printed to (default is standard output)
+        """
+        self._interval = interval
+        self._stream = stream
+        self._registry = MetricsRegistry()
+        self._last_print_time = time.monotonic()
+        self._lock = threading.Lock()
+
+    def get_summary(self):
+        registry = self._registry
+        num_requests, request_seconds = registry.get_summary("request_seconds")
+        num_tables, parse_seconds = registry.get_summary("parse_seconds")
+        num_players, player_seconds = registry.get_summary("player_mining_seconds")
+        return "%i requests (%.1f MB in %.1fs), %i rate limited, %i/%i page cache hits, " \
+               "%i/%i stat cache hits, %i parses in %.1fs, %i players in %.1fs" % \
+               (num_requests, registry.get_counter("response_bytes_total") / 1e6, request_seconds,
+                registry.get_counter("rate_limited_total"),
+                registry.get_counter("cache_lookups_total", cache="page", result="hit"),
+                registry.get_counter("cache_lookups_total", cache="page"),
+                registry.get_counter("cache_lookups_total", cache="player_stats", result="hit"),
+                registry.get_counter("cache_lookups_total", cache="player_stats"),
+                num_tables, parse_seconds, num_players, player_seconds)
+
+    def print_summary(self):
+        print(self.get_summary(), file=self._stream or sys.stdout)
+
+    def handle(self, event):
+        self._registry.handle(event)
+        if event["event"] == RATE_LIMITED_EVENT:
+            print("Rate limit reached for %s" % event["url"], file=self._stream or sys.stdout)
+
+        with self._lock:
+            if time.monotonic() - self._last_print_time < self._interval:
+                return
+            self._last_print_time = time.monotonic()
+        self.print_summary()
@@ -0,0 +1,410 @@
+import os
+import tempfile
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock
+
+import gameday
+from beautiful_soup_helper import Http429Exception
+
+
+def make_game_ids(game_date):
+    if game_date == date(2016, 4, 10):
+        return ["gid_2016_04_10_bosmlb_tormlb_1", "gid_2016_04_10_nyamlb_detmlb_1"]
+    if game_date == date(2016, 4, 8):
+        return ["gid_2016_04_08_bosmlb_tormlb_1"]
+    return list()
+
+
+def make_player_file_names(game_info, player_type):
+    if "bosmlb" in game_info.game_id:
+        return ["120074.xml", "446481.xml"]
+    return ["408234.xml"]
+
+
+@mock.patch("gameday.fetch_player_file_names", side_effect=make_player_file_names)
+@mock.patch("gameday.fetch_game_ids", side_effect=make_game_ids)
+class PlayerGameIndexTests(TestCase):
+
+    def setUp(self):
+        cache_patcher = mock.patch("gameday.DAY_LISTING_CACHE", gameday.DayListingCache())
+        cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+
+    def test_previous_games_most_recent_first(self, fetch_game_ids, fetch_player_file_names):
+        index = gameday.PlayerGameIndex()
+        games = index.get_previous_games("120074", gameday.HITTER_PLAYER_TYPE, date(2016, 4, 12), "bosmlb")
+        self.assertEqual([game.game_id for game in games],
+                         ["gid_2016_04_10_bosmlb_tormlb_1", "gid_2016_04_08_bosmlb_tormlb_1"])
+        # Only the games of the given team have their player directories listed
+        self.assertEqual(fetch_player_file_names.call_count, 4)
+
+        # A second player on the same team is answered without listing any directory again
+        index.get_previous_games("446481", gameday.PITCHER_PLAYER_TYPE, date(2016, 4, 12), "bosmlb")
+        self.assertEqual(fetch_game_ids.call_count, gameday.PREVIOUS_GAME_SEARCH_DAYS - 1)
+        self.assertEqual(fetch_player_file_names.call_count, 4)
+
+    def test_previous_games_excludes_game_date(self, fetch_game_ids, fetch_player_file_names):
+        index = gameday.PlayerGameIndex()
+        games = index.get_previous_games("120074", gameday.HITTER_PLAYER_TYPE, date(2016, 4, 10))
+        self.assertEqual([game.game_id for game in games], ["gid_2016_04_08_bosmlb_tormlb_1"])
+
+    def test_game_indexed_concurrently_is_added_once(self, fetch_game_ids, fetch_player_file_names):
+        index = gameday.PlayerGameIndex()
+
+        # The game is indexed by another caller between listing its directories and adding its players
+        def index_during_listing(game_info, player_type):
+            if fetch_player_file_names.call_count == 1:
+                index.index_date(date(2016, 4, 8))
+            return make_player_file_names(game_info, player_type)
+        fetch_player_file_names.side_effect = index_during_listing
+
+        index.index_date(date(2016, 4, 8))
+        games = index.get_previous_games("120074", gameday.HITTER_PLAYER_TYPE, date(2016, 4, 9))
+        self.assertEqual([game.game_id for game in games], ["gid_2016_04_08_bosmlb_tormlb_1"])
+
+
+class DayListingCacheTests(TestCase):
+
+    def test_past_dates_are_persisted(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            fetch_listing = mock.Mock(return_value=["gid_2016_04_10_bosmlb_tormlb_1"])
+            cache = gameday.DayListingCache(cache_dir)
+            self.assertEqual(cache.get_listing(date(2016, 4, 10), "games", fetch_listing),
+                             ["gid_2016_04_10_bosmlb_tormlb_1"])
+            cache.get_listing(date(2016, 4, 10), "games", fetch_listing)
+            self.assertEqual(fetch_listing.call_count, 1)
+
+            # A new cache reads the listing back from disk
+            cache = gameday.DayListingCache(cache_dir)
+            self.assertEqual(cache.get_listing(date(2016, 4, 10), "games", fetch_listing),
+                             ["gid_2016_04_10_bosmlb_tormlb_1"])
+            self.assertEqual(fetch_listing.call_count, 1)
+
+    def test_current_day_expires(self):
+        fetch_listing = mock.Mock(return_value=list())
+        cache = gameday.DayListingCache(ttl=0)
+        cache.get_listing(date.today(), "games", fetch_listing)
+        cache.get_listing(date.today(), "games", fetch_listing)
+        self.assertEqual(fetch_listing.call_count, 2)
+
+    def test_current_day_listing_is_refreshed_after_the_day(self):
+        class NextDay(date):
+            @classmethod
+            def today(cls):
+                return date(2016, 4, 11)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            fetch_listing = mock.Mock(side_effect=[make_game_ids(date(2016, 4, 10))[:1],
+                                                   make_game_ids(date(2016, 4, 10))])
+            cache = gameday.DayListingCache(cache_dir)
+            with mock.patch("gameday.date", NextDay):
+                # The listing requested during the day is partial, so it is not saved
+                with mock.patch.object(NextDay, "today", classmethod(lambda cls: date(2016, 4, 10))):
+                    self.assertEqual(len(cache.get_listing(date(2016, 4, 10), "games", fetch_listing)), 1)
+                self.assertFalse(os.path.exists(os.path.join(cache_dir, "2016-04-10.json")))
+
+                self.assertEqual(len(cache.get_listing(date(2016, 4, 10), "games", fetch_listing)), 2)
+                self.assertEqual(len(cache.get_listing(date(2016, 4, 10), "games", fetch_listing)), 2)
+                self.assertEqual(fetch_listing.call_count, 2)
+                self.assertTrue(os.path.exists(os.path.join(cache_dir, "2016-04-10.json")))
+
+
+BATTER_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<Player team="bos" id="120074" pos="DH" type="batter" first_name="David" last_name="Ortiz" jersey_number="34"
+        height="6-3" weight="230" bats="L" throws="R" dob="11/18/1975">
+    <season avg=".275" ab="40" hr="3" rbi="9" bb="6" so="7" h="11"/>
+    <career avg=".286" ab="8640" hr="506" rbi="1677" bb="1271" so="1691" h="2472"/>
+    <month avg=".275" ab="40" hr="3" rbi="9" bb="6" so="7" h="11"/>
+    <Team avg=".250" ab="12" hr="1" rbi="2" bb="1" so="2" h="3"/>
+    <Empty avg=".300" ab="20" hr="2" rbi="2" bb="3" so="4" h="6"/>
+    <Men_On avg=".250" ab="20" hr="1" rbi="7" bb="3" so="3" h="5"/>
+    <RISP avg=".231" ab="13" hr="1" rbi="6" bb="2" so="2" h="3"/>
+    <Loaded avg=".500" ab="2" hr="0" rbi="3" bb="0" so="0" h="1"/>
+    <vs_LHP avg=".200" ab="10" hr="0" rbi="1" bb="1" so="3" h="2"/>
+    <vs_RHP avg=".300" ab="30" hr="3" rbi="8" bb="5" so="4" h="9"/>
+    <atbats>
+        <ab inning="1" des="Single"/>
+    </atbats>
+</Player>
+"""
+
+BENCH_BATTER_XML = b"""<Player team="bos" id="446481">
+    <season avg=".000"/><career avg=".000"/><month avg=".000"/><Team avg=".000"/><Empty avg=".000"/>
+    <Men_On avg=".000"/><RISP avg=".000"/><Loaded avg=".000"/><vs_LHP avg=".000"/><vs_RHP avg=".000"/>
+    <atbats/>
+</Player>
+"""
+
+PLAYS_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<game status_ind="F">
+    <!-- play by play -->
+    <score ar="4" hr="2"/>
+    <weather condition="Partly Cloudy" temp="54" wind="12 mph, Out to CF"/>
+    <lineup>
+        <team type="away"><man pid="120074" bat_order="1"/><man pid="446481" bat_order="2"/></team>
+        <team type="home"><man pid="408234" bat_order="1"/></team>
+    </lineup>
+    <atbat num="1"><pitch des="Ball"/></atbat>
+</game>
+"""
+
+GAME_XML = b"""<game type="R" local_game_time="13:07" game_pk="446877">
+    <team type="home" code="tor" abbrev="TOR" name="Toronto"/>
+    <team type="away" code="bos" abbrev="BOS" name="Boston"/>
+    <stadium id="14" name="Rogers Centre"/>
+</game>
+"""
+
+PLAYERS_XML = b"""<game venue="Rogers Centre" date="April 10, 2016">
+    <team type="away" id="BOS"><player id="120074" first="David"/></team>
+    <umpires>
+        <umpire position="home" name="Joe West" id="427541"/>
+        <umpire position="first" name="Jerry Meals" id="427346"/>
+    </umpires>
+</game>
+"""
+
+PITCH_TYPE_XML = b"""<Pitches>
+    <std><sit id="ff" pitches="120" outs="31" avg=".231"/></std>
+</Pitches>
+"""
+
+PITCHER_TENDENCIES_XML = b"""<Pitcher id="446481">
+    <std>
+        <types>
+            <type id="FF" pct="55.2" avg_speed="93.1"/>
+            <type id="SL" pct="30.1" avg_speed="84.7"/>
+        </types>
+    </std>
+</Pitcher>
+"""
+
+
+def pregame_values(pregame_stats):
+    return {name: getattr(pregame_stats, name) for name in gameday.PregameStats.__slots__}
+
+
+class XmlReaderTests(TestCase):
+
+    def test_hitter_stats(self):
+        hitter_stats = gameday.get_game_hitter_stats_xml(BATTER_XML)
+        self.assertEqual(hitter_stats.team, "bos")
+        self.assertEqual(hitter_stats.season_stats_dict, gameday.StatSplit.from_attrs(
+            {"avg": ".275", "ab": "40", "hr": "3", "rbi": "9", "bb": "6", "so": "7", "h": "11"}))
+        # Split tags are matched whatever their case
+        self.assertEqual(hitter_stats.team_stats_dict["avg"], .25)
+        self.assertEqual(hitter_stats.men_on_stats_dict["rbi"], 7.)
+        self.assertEqual(hitter_stats.risp_stats_dict["ab"], 13.)
+        self.assertEqual(hitter_stats.vs_lhp_stats_dict["so"], 3.)
+        self.assertEqual(hitter_stats.vs_rhp_stats_dict["hr"], 3.)
+        self.assertTrue(all(value is not None for value in pregame_values(hitter_stats).values()))
+        self.assertIsNone(gameday.get_game_hitter_stats_xml(BENCH_BATTER_XML))
+
+    def test_pitcher_stats(self):
+        self.assertEqual(pregame_values(gameday.get_game_pitcher_stats_xml(BATTER_XML)),
+                         pregame_values(gameday.get_game_hitter_stats_xml(BATTER_XML)))
+        # A pitcher without at bats still has stats
+        self.assertEqual(gameday.get_game_pitcher_stats_xml(BENCH_BATTER_XML).bases_loaded_stats_dict,
+                         gameday.StatSplit.from_attrs({"avg": ".000"}))
+        self.assertIsNone(gameday.get_game_pitcher_stats_xml(None))
+
+    def test_plays(self):
+        home_order, away_order, weather_attrs = gameday.parse_plays_xml(PLAYS_XML)
+        self.assertEqual(home_order, ["408234"])
+        self.assertEqual(away_order, ["120074", "446481"])
+
+        info = gameday.GameInfo(date(2016, 4, 10), "gid_2016_04_10_bosmlb_tormlb_1")
+        game_attributes = gameday.parse_game_attributes_xml(info, GAME_XML, PLAYERS_XML, weather_attrs)
+        self.assertEqual(vars(game_attributes.umpire), {"id": "427541", "name": "Joe West"})
+        self.assertEqual(dict(vars(game_attributes), umpire=None),
+                         {"id_info": info, "umpire": None, "game_time": "13:07", "home_team": "TOR",
+                          "away_team": "BOS", "temperature": 54, "wind_speed": 12,
+                          "wind_description": ", Out to CF", "weather_condition": "Partly Cloudy"})
+
+    def test_pitch_type_stats(self):
+        with mock.patch("gameday.GAMEDAY_SOURCE.get_content", return_value=PITCH_TYPE_XML):
+            stats = gameday.get_pitch_type_stats("premium/batters/120074/pff.xml")
+        self.assertEqual(stats, gameday.StatSplit.from_attrs({"id": "ff", "pitches": "120", "outs": "31",
+                                                              "avg": ".231"}))
+
+        with mock.patch("gameday.GAMEDAY_SOURCE.get_content", return_value=None):
+            self.assertIsNone(gameday.get_pitch_type_stats("premium/batters/120074/pff.xml"))
+
+    def test_pitcher_tendencies(self):
+        self.assertEqual(gameday.parse_pitcher_tendencies_xml(PITCHER_TENDENCIES_XML),
+                         {"FF": {"id": "FF", "pct": "55.2", "avg_speed": "93.1"},
+                          "SL": {"id": "SL", "pct": "30.1", "avg_speed": "84.7"}})
+
+
+class StatSplitTests(TestCase):
+
+    def test_values_are_typed(self):
+        stat_split = gameday.StatSplit.from_attrs({"id": "ff", "avg": ".231", "outs": "31"})
+        self.assertEqual(stat_split["avg"], 0.231)
+        self.assertEqual(stat_split["outs"], 31.)
+        self.assertEqual(stat_split["id"], "ff")
+        self.assertEqual(list(stat_split), ["id", "avg", "outs"])
+        self.assertEqual(stat_split.get("hr"), None)
+        with self.assertRaises(AttributeError):
+            stat_split.extra = 1
+
+    def test_splits_share_index(self):
+        first = gameday.StatSplit.from_attrs({"avg": ".275", "hr": "3"})
+        second = gameday.StatSplit.from_attrs({"avg": ".300", "hr": "7"})
+        self.assertIs(first._index, second._index)
+
+    def test_stack_stat_splits(self):
+        stat_splits = [gameday.StatSplit.from_attrs({"avg": ".275", "hr": "3"}), None,
+                       gameday.StatSplit.from_attrs({"hr": "7", "avg": ".---"})]
+        stacked = gameday.stack_stat_splits(stat_splits, ["hr", "avg"])
+        self.assertEqual(stacked.shape, (3, 2))
+        self.assertEqual(list(stacked[0]), [3., .275])
+        self.assertEqual(stacked[2, 0], 7.)
+        self.assertTrue(all(gameday.np.isnan([stacked[1, 0], stacked[1, 1], stacked[2, 1]])))
+
+
+class MineGamesTests(TestCase):
+
+    @mock.patch("gameday.get_game_ids")
+    @mock.patch("gameday.mine_game")
+    def test_game_without_plays_is_skipped(self, mine_game, get_game_ids):
+        get_game_ids.return_value = [gameday.GameInfo(date(2016, 4, 10), game_id)
+                                     for game_id in make_game_ids(date(2016, 4, 10))]
+        game_attributes = gameday.GameAttributes()
+
+        def mine_fixture_game(info, pitch_file_executor=None):
+            if "bosmlb" in info.game_id:
+                # plays.xml is missing, so its content is empty
+                gameday.parse_plays_xml(b"")
+            return game_attributes, [gameday.HitterGameStats()], list()
+        mine_game.side_effect = mine_fixture_game
+
+        game_list, hitter_stat_list, pitcher_stat_list = gameday.mine_games(date(2016, 4, 10))
+        self.assertEqual(game_list, [game_attributes])
+        self.assertEqual(len(hitter_stat_list), 1)
+        self.assertEqual(mine_game.call_count, 2)
+
+    @mock.patch("gameday.get_game_ids")
+    @mock.patch("gameday.mine_game")
+    def test_rate_limited_game_is_raised(self, mine_game, get_game_ids):
+        get_game_ids.return_value = [gameday.GameInfo(date(2016, 4, 10), game_id)
+                                     for game_id in make_game_ids(date(2016, 4, 10))]
+
+        def mine_fixture_game(info, pitch_file_executor=None):
+            if "bosmlb" in info.game_id:
+                raise Http429Exception(info.game_id)
+            return gameday.GameAttributes(), list(), list()
+        mine_game.side_effect = mine_fixture_game
+
+        with self.assertRaises(gameday.GamesNotMinedException) as context:
+            gameday.mine_games(date(2016, 4, 10))
+        self.assertEqual(list(context.exception.failed_games), ["gid_2016_04_10_bosmlb_tormlb_1"])
+        self.assertIn("Http429Exception", context.exception.failed_games["gid_2016_04_10_bosmlb_tormlb_1"])
+        # The other games of the date are still mined
+        self.assertEqual(mine_game.call_count, 2)
+
+
+class HitterMiningTests(TestCase):
+
+    def test_batting_order_positions(self):
+        positions = gameday.get_batting_order_positions(["408234", "502110"], ["120074", "446481"])
+        self.assertEqual(positions["502110"], ("home", 1))
+        self.assertEqual(positions["120074"], ("away", 0))
+        self.assertNotIn("999999", positions)
+
+    def test_make_hitter_game_stats(self):
+        positions = gameday.get_batting_order_positions(["408234"], ["120074"])
+        pregame_stats = gameday.PregameStats()
+        hitter_stats = gameday.make_hitter_game_stats("120074", pregame_stats, None, positions)
+        self.assertEqual((hitter_stats.id, hitter_stats.batting_order_position), ("120074", 0))
+        self.assertIs(hitter_stats.pregame_stats, pregame_stats)
+        self.assertIsNone(gameday.make_hitter_game_stats("120074", None, None, positions))
+        self.assertIsNone(gameday.make_hitter_game_stats("446481", pregame_stats, None, positions))
+
+    @mock.patch("gameday.get_season_pitch_stats", return_value=None)
+    @mock.patch("gameday.get_hitter_ids", return_value=["120074.xml", "446481.xml", "408234.xml"])
+    def test_bench_files_are_not_requested(self, get_hitter_ids, get_season_pitch_stats):
+        info = gameday.GameInfo(date(2016, 4, 10), "gid_2016_04_10_bosmlb_tormlb_1")
+        contents = {gameday.get_game_path(info) + "/batters/120074.xml": BATTER_XML,
+                    gameday.get_game_path(info) + "/batters/408234.xml": BENCH_BATTER_XML}
+        with mock.patch("gameday.GAMEDAY_SOURCE.get_content", side_effect=contents.__getitem__) as get_content:
+            hitter_stats = gameday.mine_game_hitter_stats(info, ["408234"], ["120074"])
+
+        self.assertEqual([stats.id for stats in hitter_stats], ["120074"])
+        self.assertEqual(get_content.call_count, 2)
+        get_season_pitch_stats.assert_called_once_with(gameday.get_game_path(info) + "/premium/batters/120074/",
+                                                       None)
+
+
+class SeasonPitchStatsTests(TestCase):
+
+    def setUp(self):
+        self.player_path = "year_2016/month_04/day_10/gid_2016_04_10_bosmlb_tormlb_1/premium/batters/120074/"
+        # The slider file has no season split and the other pitch types are missing
+        self.contents = {self.player_path + "pff.xml": PITCH_TYPE_XML,
+                         self.player_path + "psl.xml": b"<Pitches><std></std></Pitches>"}
+
+    def test_missing_pitch_types_are_unavailable(self):
+        with mock.patch("gameday.GAMEDAY_SOURCE.get_content", side_effect=self.contents.get), \
+                ThreadPoolExecutor(max_workers=2) as executor:
+            shared_stats = gameday.get_season_pitch_stats(self.player_path, executor)
+            sequential_stats = gameday.get_season_pitch_stats(self.player_path)
+
+        for pitch_stats in [shared_stats, sequential_stats]:
+            self.assertEqual(list(pitch_stats.pitch_dict), ["ff"])
+            self.assertEqual(pitch_stats.is_available, {pitch_type: pitch_type == "ff"
+                                                        for pitch_type, _ in gameday.PITCH_TYPE_FILES})
+
+        with mock.patch("gameday.GAMEDAY_SOURCE.get_content", return_value=None):
+            self.assertIsNone(gameday.get_season_pitch_stats(self.player_path))
+
+    def test_failed_fetch_is_raised(self):
+        def get_content(path):
+            if path.endswith("psl.xml"):
+                raise Http429Exception(path)
+            return self.contents.get(path)
+
+        with mock.patch("gameday.GAMEDAY_SOURCE.get_content", side_effect=get_content), \
+                ThreadPoolExecutor(max_workers=2) as executor:
+            with self.assertRaises(Http429Exception):
+                gameday.get_season_pitch_stats(self.player_path, executor)
+
+
+class DatePitcherTendenciesTests(TestCase):
+
+    def setUp(self):
+        mirror_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(mirror_dir.cleanup)
+        day_dir = os.path.join(mirror_dir.name, "year_2016", "month_04", "day_10")
+        for game_id, pitcher_ids in [("gid_2016_04_10_bosmlb_tormlb_1", ["446481", "502110"]),
+                                     ("gid_2016_04_10_nyamlb_detmlb_1", ["408234"])]:
+            os.makedirs(os.path.join(day_dir, game_id, "pitchers"))
+            for pitcher_id in pitcher_ids:
+                open(os.path.join(day_dir, game_id, "pitchers", pitcher_id + ".xml"), "wb").close()
+                # 502110 did not pitch, so it has no tendencies file
+                if pitcher_id != "502110":
+                    tendencies_dir = os.path.join(day_dir, game_id, "premium", "pitchers", pitcher_id)
+                    os.makedirs(tendencies_dir)
+                    with open(os.path.join(tendencies_dir, "pitchtendencies_game.xml"), "wb") as tendencies_file:
+                        tendencies_file.write(PITCHER_TENDENCIES_XML)
+
+        for patcher in [mock.patch("gameday.GAMEDAY_SOURCE", gameday.LocalGamedaySource(mirror_dir.name)),
+                        mock.patch("gameday.DAY_LISTING_CACHE", gameday.DayListingCache())]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_one_request_per_pitcher(self):
+        with mock.patch("gameday.get_game_file_content", wraps=gameday.get_game_file_content) as get_content:
+            tendencies = gameday.get_date_pitcher_tendencies(date(2016, 4, 10))
+        self.assertEqual(get_content.call_count, 3)
+
+        self.assertEqual(len(tendencies), 4)
+        self.assertEqual(tendencies.loc[("446481", "gid_2016_04_10_bosmlb_tormlb_1", "SL"), "avg_speed"], 84.7)
+        self.assertEqual(list(tendencies.loc[("408234", "gid_2016_04_10_nyamlb_detmlb_1")].index), ["FF", "SL"])
+        self.assertNotIn("502110", tendencies.index.get_level_values("pitcher_id"))
+
+    def test_date_without_games(self):
+        tendencies = gameday.get_date_pitcher_tendencies(date(2016, 4, 11))
+        self.assertEqual(len(tendencies), 0)
+        self.assertEqual(list(tendencies.index.names), gameday.PITCHER_TENDENCY_KEY_COLUMNS)
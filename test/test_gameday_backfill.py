@@ -0,0 +1,146 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from unittest import TestCase, mock
+
+import pandas as pd
+
+import gameday
+import gameday_backfill
+from beautiful_soup_helper import Http429Exception
+
+
+def make_mined_games(game_date):
+    game_attributes = gameday.GameAttributes()
+    game_attributes.id_info = gameday.GameInfo(game_date, "gid_2016_04_10_bosmlb_tormlb_1")
+    game_attributes.home_team = "TOR"
+    game_attributes.away_team = "BOS"
+    game_attributes.umpire = gameday.Umpire()
+    game_attributes.umpire.name = "Joe West"
+    game_attributes.temperature = 54
+
+    hitter_stats = gameday.HitterGameStats()
+    hitter_stats.id = "120074"
+    hitter_stats.batting_order_position = 2
+    hitter_stats.pregame_stats.team = "bos"
+    hitter_stats.pregame_stats.season_stats_dict = gameday.StatSplit.from_attrs({"avg": ".275", "hr": "3"})
+    hitter_stats.pitch_stats.pitch_dict["ff"] = gameday.StatSplit.from_attrs({"outs": "31"})
+
+    placeholder_stats = gameday.HitterGameStats()
+    placeholder_stats.id = "592885"
+    placeholder_stats.batting_order_position = 9
+    placeholder_stats.pregame_stats.team = "tor"
+    placeholder_stats.pregame_stats.season_stats_dict = gameday.StatSplit.from_attrs({"avg": ".---", "hr": "0"})
+    placeholder_stats.pitch_stats = None
+
+    pitcher_stats = gameday.PitcherGameStats()
+    pitcher_stats.id = "446481"
+    pitcher_stats.pitch_stats = None
+
+    return [game_attributes], [hitter_stats, placeholder_stats], [pitcher_stats]
+
+
+class BackfillDatesTests(TestCase):
+
+    def test_shards_are_disjoint_and_complete(self):
+        all_dates = gameday_backfill.get_backfill_dates(date(2016, 4, 1), date(2016, 4, 30))
+        self.assertEqual(len(all_dates), 30)
+
+        shard_dates = [gameday_backfill.get_backfill_dates(date(2016, 4, 1), date(2016, 4, 30), shard_index, 3)
+                       for shard_index in range(3)]
+        self.assertEqual(sorted(sum(shard_dates, list())), all_dates)
+        self.assertEqual([len(dates) for dates in shard_dates], [10, 10, 10])
+
+        with self.assertRaises(ValueError):
+            gameday_backfill.get_backfill_dates(date(2016, 4, 1), date(2016, 4, 30), 3, 3)
+
+
+class BackfillManifestTests(TestCase):
+
+    def test_completed_dates_survive_restart(self):
+        with tempfile.TemporaryDirectory() as manifest_dir:
+            manifest_path = os.path.join(manifest_dir, "manifest.json")
+            manifest = gameday_backfill.BackfillManifest(manifest_path)
+            manifest.mark_complete(date(2016, 4, 10), {"games": 15, "requests": 900, "seconds": 31.2})
+
+            manifest = gameday_backfill.BackfillManifest(manifest_path)
+            self.assertTrue(manifest.is_complete(date(2016, 4, 10)))
+            self.assertFalse(manifest.is_complete(date(2016, 4, 11)))
+            self.assertEqual(manifest.get_date_result(date(2016, 4, 10))["games"], 15)
+
+    def test_run_skips_completed_dates(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            manifest_path = os.path.join(output_dir, "manifest.json")
+            manifest = gameday_backfill.BackfillManifest(manifest_path)
+            for game_date in gameday_backfill.get_backfill_dates(date(2016, 4, 10), date(2016, 4, 12)):
+                manifest.mark_complete(game_date, {"games": 1, "requests": 1, "seconds": 1.})
+
+            with mock.patch("gameday_backfill.ProcessPoolExecutor") as executor:
+                throughput = gameday_backfill.run_backfill(date(2016, 4, 10), date(2016, 4, 12), output_dir,
+                                                           manifest_path)
+            executor.assert_not_called()
+            self.assertEqual(throughput.num_dates, 0)
+
+    @mock.patch("gameday_backfill.ProcessPoolExecutor", ThreadPoolExecutor)
+    @mock.patch("gameday.get_game_ids")
+    @mock.patch("gameday.mine_game")
+    def test_date_with_failed_game_is_retried(self, mine_game, get_game_ids):
+        game_date = date(2016, 4, 10)
+        get_game_ids.return_value = [gameday.GameInfo(game_date, game_id) for game_id in
+                                     ["gid_2016_04_10_bosmlb_tormlb_1", "gid_2016_04_10_nyamlb_detmlb_1"]]
+        game_list, hitter_stat_list, pitcher_stat_list = make_mined_games(game_date)
+
+        def mine_rate_limited_game(info, pitch_file_executor=None):
+            if "bosmlb" in info.game_id:
+                raise Http429Exception(info.game_id)
+            return game_list[0], hitter_stat_list, pitcher_stat_list
+        mine_game.side_effect = mine_rate_limited_game
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            manifest_path = os.path.join(output_dir, "manifest.json")
+            throughput = gameday_backfill.run_backfill(game_date, game_date, output_dir, manifest_path)
+            self.assertEqual(throughput.failed_dates, [game_date])
+            self.assertFalse(os.path.exists(gameday_backfill.get_partition_dir(output_dir, game_date)))
+
+            manifest = gameday_backfill.BackfillManifest(manifest_path)
+            self.assertFalse(manifest.is_complete(game_date))
+            self.assertEqual(list(manifest.get_date_failure(game_date)), ["gid_2016_04_10_bosmlb_tormlb_1"])
+
+            # The next run mines the date again
+            mine_game.side_effect = lambda info, pitch_file_executor=None: (game_list[0], list(), list())
+            throughput = gameday_backfill.run_backfill(game_date, game_date, output_dir, manifest_path)
+            self.assertEqual((throughput.num_dates, throughput.num_games), (1, 2))
+
+            manifest = gameday_backfill.BackfillManifest(manifest_path)
+            self.assertTrue(manifest.is_complete(game_date))
+            self.assertIsNone(manifest.get_date_failure(game_date))
+
+
+class BackfillDateTests(TestCase):
+
+    @mock.patch("gameday.mine_games", side_effect=make_mined_games)
+    def test_date_partition_is_written(self, mine_games):
+        with tempfile.TemporaryDirectory() as output_dir:
+            date_result = gameday_backfill.backfill_date(date(2016, 4, 10), output_dir)
+            self.assertEqual(date_result["games"], 1)
+            self.assertEqual(date_result["requests"], 0)
+
+            partition_dir = os.path.join(output_dir, "game_date=2016-04-10")
+            games = pd.read_parquet(os.path.join(partition_dir, gameday_backfill.GAMES_FILE_NAME))
+            self.assertEqual(games.loc[0, "umpire_name"], "Joe West")
+            self.assertEqual(games.loc[0, "temperature"], 54)
+
+            hitters = pd.read_parquet(os.path.join(partition_dir, gameday_backfill.HITTERS_FILE_NAME))
+            self.assertEqual(hitters.loc[0, "season_avg"], .275)
+            self.assertEqual(hitters.loc[0, "pitch_ff_outs"], 31.)
+            self.assertEqual(hitters.loc[0, "batting_order_position"], 2)
+            # A placeholder is NaN in the stat's float column and kept as text beside it
+            self.assertEqual(hitters["season_avg"].dtype, "float64")
+            self.assertTrue(pd.isnull(hitters.loc[1, "season_avg"]))
+            self.assertTrue(pd.isnull(hitters.loc[0, "season_avg_text"]))
+            self.assertEqual(hitters.loc[1, "season_avg_text"], ".---")
+            self.assertEqual(hitters.loc[1, "season_hr"], 0.)
+
+            pitchers = pd.read_parquet(os.path.join(partition_dir, gameday_backfill.PITCHERS_FILE_NAME))
+            self.assertEqual(list(pitchers["player_id"]), ["446481"])
@@ -0,0 +1,73 @@
+import os
+import tempfile
+from datetime import date
+from unittest import TestCase, mock
+
+import gameday
+import gameday_mirror
+
+GAME_ID = "gid_2016_04_10_bosmlb_tormlb_1"
+GAME_PATH = "year_2016/month_04/day_10/" + GAME_ID
+
+SOURCE_FILES = {GAME_PATH + "/game.xml": b"<game local_game_time='13:07'/>",
+                GAME_PATH + "/players.xml": b"<game/>",
+                GAME_PATH + "/plays.xml": b"<game/>",
+                GAME_PATH + "/batters/120074.xml": b"<Player team='bos'/>",
+                GAME_PATH + "/pitchers/446481.xml": b"<Player team='bos'/>",
+                GAME_PATH + "/premium/batters/120074/pff.xml": b"<Pitches><std><sit outs='31'/></std></Pitches>",
+                GAME_PATH + "/premium/pitchers/446481/psl.xml": b"<Pitches><std><sit outs='12'/></std></Pitches>",
+                GAME_PATH + "/premium/pitchers/446481/pitchtendencies_game.xml": b"<Pitcher/>"}
+
+
+def write_tree(root_dir, files):
+    for path, content in files.items():
+        file_path = os.path.join(root_dir, *path.split("/"))
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "wb") as tree_file:
+            tree_file.write(content)
+
+
+class GamedayMirrorTests(TestCase):
+
+    def setUp(self):
+        source_dir = tempfile.TemporaryDirectory()
+        mirror_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(source_dir.cleanup)
+        self.addCleanup(mirror_dir.cleanup)
+        self.source_dir = source_dir.name
+        self.mirror_dir = mirror_dir.name
+        write_tree(self.source_dir, SOURCE_FILES)
+
+    def test_mirror_copies_game_files(self):
+        source = gameday.LocalGamedaySource(self.source_dir)
+        num_files = gameday_mirror.mirror_dates(date(2016, 4, 9), date(2016, 4, 10), self.mirror_dir, source)
+        self.assertEqual(num_files, len(SOURCE_FILES))
+
+        mirror = gameday.LocalGamedaySource(self.mirror_dir)
+        for path, content in SOURCE_FILES.items():
+            self.assertEqual(mirror.get_content(path), content)
+        self.assertEqual(mirror.list_directory("year_2016/month_04/day_09"), list())
+
+        # Files already in the mirror are not copied again
+        self.assertEqual(gameday_mirror.mirror_date(date(2016, 4, 10), self.mirror_dir, source), 0)
+
+    def test_sources_read_the_same_tree(self):
+        gameday_mirror.mirror_date(date(2016, 4, 10), self.mirror_dir, gameday.LocalGamedaySource(self.source_dir))
+        server, server_url = gameday_mirror.start_mirror_server(self.mirror_dir)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        for source in [gameday.LocalGamedaySource(self.mirror_dir), gameday.HttpGamedaySource(server_url)]:
+            with mock.patch("gameday.GAMEDAY_SOURCE", source), \
+                    mock.patch("gameday.DAY_LISTING_CACHE", gameday.DayListingCache()):
+                game_info = gameday.get_game_ids(date(2016, 4, 10))[0]
+                self.assertEqual(game_info.game_id, GAME_ID)
+                self.assertEqual(gameday.get_hitter_ids(game_info), ["120074.xml"])
+                self.assertEqual(gameday.get_pitcher_ids(game_info), ["446481.xml"])
+                self.assertEqual(gameday.get_game_file_content(game_info, "game.xml"),
+                                 SOURCE_FILES[GAME_PATH + "/game.xml"])
+                self.assertIsNone(gameday.get_game_file_content(game_info, "missing.xml"))
+
+                pitch_stats = gameday.get_season_pitcher_pitch_stats("446481", game_info)
+                self.assertEqual(pitch_stats.pitch_dict["sl"]["outs"], 12.)
+                self.assertFalse(pitch_stats.is_available["ff"])
@@ -0,0 +1,148 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+import pandas as pd
+
+import historical_features
+from beautiful_soup_helper import Http429Exception
+
+
+def make_hitter_row(date_text, opponent, hits, at_bats=4, is_away=False):
+    return {"Date": date_text, "Tm": "BOS", "": "@" if is_away else 0, "Opp": opponent, "PA": at_bats, "AB": at_bats,
+            "H": hits, "HR": 0}
+
+
+def make_pitcher_row(date_text, team, innings, innings_pitched="6.0"):
+    return {"Date": date_text, "Tm": team, "": 0, "Opp": "BOS", "Inngs": innings, "IP": innings_pitched, "SO": 5}
+
+
+HITTER_ROWS = [make_hitter_row("Apr 4", "CLE", 1),
+               make_hitter_row("Apr 10", "TOR", 2),
+               make_hitter_row("Apr 12(1)", "TOR", 3),
+               make_hitter_row("Apr 12(2)", "TOR", 0),
+               make_hitter_row("Apr 20", "CLE", 1, is_away=True)]
+
+PITCHER_ROWS = {"lefty01": [make_pitcher_row("Apr 10", "TOR", "GS-7"),
+                            make_pitcher_row("Apr 12(2)", "TOR", "GS-6", "5.2")],
+                "righty01": [make_pitcher_row("Apr 4", "CLE", "GS-6"),
+                             make_pitcher_row("Apr 12(1)", "TOR", "GS-9"),
+                             make_pitcher_row("Apr 20", "CLE", "GS-7")],
+                "reliever01": [make_pitcher_row("Apr 12(1)", "TOR", "8-9", "1.1")]}
+
+
+def get_game_log_rows(player_type, player_id, year, store=None):
+    if player_type == "b":
+        return HITTER_ROWS
+    return PITCHER_ROWS[player_id]
+
+
+class HistoricalFeaturesTests(TestCase):
+
+    def setUp(self):
+        output_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(output_dir.cleanup)
+        self.output_dir = output_dir.name
+
+    def test_parse_game_log_date(self):
+        self.assertEqual(historical_features.parse_game_log_date("Apr 10", 2016), (pd.Timestamp("2016-04-10"), 1))
+        self.assertEqual(historical_features.parse_game_log_date("Jul 4(2)", 2016), (pd.Timestamp("2016-07-04"), 2))
+        self.assertEqual(historical_features.parse_game_log_date("2016-04-10", 2016),
+                         (pd.Timestamp("2016-04-10"), 1))
+        self.assertEqual(historical_features.innings_to_outs("5.2"), 17)
+
+    def test_game_log_store_fetches_once(self):
+        store = historical_features.GameLogStore(os.path.join(self.output_dir, "_game_logs"))
+        with mock.patch("historical_features.get_uncommented_soup_from_url") as get_soup, \
+                mock.patch("historical_features.get_all_table_row_dicts",
+                           return_value=(list(), [{"Date": 0}] + HITTER_ROWS)):
+            for _ in range(2):
+                rows = historical_features.fetch_game_log_rows("b", "hitter01", 2016, store)
+                self.assertEqual(rows, HITTER_ROWS)
+        self.assertEqual(get_soup.call_count, 1)
+
+    def test_game_log_store_skips_current_season_and_missing_tables(self):
+        store = historical_features.GameLogStore(os.path.join(self.output_dir, "_game_logs"))
+        current_year = historical_features.date.today().year
+        with mock.patch("historical_features.get_uncommented_soup_from_url") as get_soup, \
+                mock.patch("historical_features.get_all_table_row_dicts", return_value=(list(), HITTER_ROWS)):
+            for _ in range(2):
+                historical_features.fetch_game_log_rows("b", "hitter01", current_year, store)
+        self.assertEqual(get_soup.call_count, 2)
+        self.assertIsNone(store.get("b", "hitter01", current_year))
+
+        with mock.patch("historical_features.get_uncommented_soup_from_url") as get_soup, \
+                mock.patch("historical_features.get_all_table_row_dicts",
+                           side_effect=historical_features.TableNotFound("batting_gamelogs")):
+            self.assertEqual(historical_features.fetch_game_log_rows("b", "hitter01", 2016, store), list())
+        self.assertIsNone(store.get("b", "hitter01", 2016))
+
+        # A missing page is an empty game log as well
+        with mock.patch("historical_features.get_uncommented_soup_from_url", return_value=None):
+            self.assertEqual(historical_features.fetch_game_log_rows("b", "hitter01", 2016, store), list())
+        self.assertIsNone(store.get("b", "hitter01", 2016))
+
+    def test_as_of_features_exclude_the_game_date(self):
+        hitter_logs = historical_features.game_log_to_frame("b", "hitter01", 2016, HITTER_ROWS)
+        pitcher_logs = pd.concat([historical_features.game_log_to_frame("p", pitcher_id, 2016, rows)
+                                  for pitcher_id, rows in PITCHER_ROWS.items()], ignore_index=True)
+        starters = historical_features.get_starters(pitcher_logs, {"lefty01": "L", "righty01": "R"})
+        hitter_logs = hitter_logs.merge(starters, on=["game_date", "opponent", "game_number"], how="left")
+        features = historical_features.add_as_of_features(hitter_logs, historical_features.HITTER_GAME_LOG_STATS,
+                                                          by_hand=True)
+
+        self.assertEqual(list(features["opposing_starter_id"]),
+                         ["righty01", "lefty01", "righty01", "lefty01", "righty01"])
+        self.assertEqual(list(features["game_H"]), [1, 2, 3, 0, 1])
+        # Both games of the doubleheader only see the games of the previous days
+        self.assertEqual(list(features["season_H"]), [0, 1, 3, 3, 6])
+        self.assertEqual(list(features["season_AB"]), [0, 4, 8, 8, 16])
+        self.assertEqual(list(features["last_7_H"]), [0, 1, 2, 2, 0])
+        self.assertEqual(list(features["last_14_H"]), [0, 1, 3, 3, 5])
+        self.assertEqual(list(features["vs_hand_H"]), [0, 0, 1, 2, 4])
+        self.assertEqual(list(features["is_home"]), [True, True, True, True, False])
+
+        pitcher_features = historical_features.add_as_of_features(pitcher_logs,
+                                                                  historical_features.PITCHER_GAME_LOG_STATS)
+        lefty_features = pitcher_features[pitcher_features["player_id"] == "lefty01"]
+        self.assertEqual(list(lefty_features["game_Outs"]), [18, 17])
+        self.assertEqual(list(lefty_features["season_Outs"]), [0, 18])
+
+    def test_build_season_features_writes_date_partitions(self):
+        with mock.patch("historical_features.get_season_players",
+                        return_value=(["hitter01"], list(PITCHER_ROWS), {"lefty01": "L", "righty01": "R"})), \
+                mock.patch("historical_features.fetch_game_log_rows", side_effect=get_game_log_rows):
+            result = historical_features.build_season_features(2016, self.output_dir)
+
+        self.assertEqual(result["hitters"], len(HITTER_ROWS))
+        self.assertEqual(result["pitchers"], 6)
+        self.assertEqual(result["partitions"], 4)
+        self.assertEqual(result["requests"], 0)
+        self.assertEqual(result["failed"], list())
+
+        hitters = pd.read_parquet(os.path.join(self.output_dir, "game_date=2016-04-12",
+                                               historical_features.HITTERS_FILE_NAME))
+        self.assertEqual(list(hitters["game_number"]), [1, 2])
+        self.assertEqual(list(hitters["opposing_starter_hand"]), ["R", "L"])
+        self.assertEqual(list(hitters["season_H"]), [3, 3])
+        pitchers = pd.read_parquet(os.path.join(self.output_dir, "game_date=2016-04-12",
+                                                historical_features.PITCHERS_FILE_NAME))
+        self.assertEqual(sorted(pitchers["player_id"]), ["lefty01", "reliever01", "righty01"])
+
+    def test_failed_game_logs_are_reported(self):
+        def get_rate_limited_game_log_rows(player_type, player_id, year, store=None):
+            if player_id == "righty01":
+                raise Http429Exception("https://www.baseball-reference.com/players/gl.fcgi?id=righty01")
+            return get_game_log_rows(player_type, player_id, year, store)
+
+        with mock.patch("historical_features.get_season_players",
+                        return_value=(["hitter01"], list(PITCHER_ROWS), {"lefty01": "L", "righty01": "R"})), \
+                mock.patch("historical_features.fetch_game_log_rows", side_effect=get_rate_limited_game_log_rows):
+            result = historical_features.build_season_features(2016, self.output_dir)
+        self.assertEqual(result["failed"], ["righty01"])
+        self.assertEqual(result["pitchers"], 3)
+
+        # Errors other than a failed request are not hidden
+        with mock.patch("historical_features.fetch_game_log_rows", side_effect=KeyError("Date")):
+            with self.assertRaises(KeyError):
+                historical_features.fetch_season_game_logs("b", ["hitter01"], 2016)
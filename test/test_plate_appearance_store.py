@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import tempfile
+from datetime import date, datetime
+from unittest import TestCase, mock
+
+from plate_appearance_store import PlateAppearanceStore
+
+
+def make_event(event_date, sequence, **stats):
+    event = {"HitterId": "abreu-001bob", "PitcherId": "pavano001car", "Date": event_date, "Sequence": sequence,
+             "HitterTeam": "PHI", "PitcherTeam": "FLA", "ScoreString": "down 1", "Inning": "t3",
+             "RunnerOnFirst": True, "RunnerOnSecond": False, "RunnerOnThird": False, "Outs": 1,
+             "Pitches": 4, "Balls": 2, "Strikes": 1, "PlayDescription": "Single to CF", "is_postseason": False,
+             "PA": 1.0, "AB": 1, "H": 0.0, "2B": 0.0, "3B": 0.0, "HR": 0.0, "RBI": 0, "BB": 0.0, "SO": 0.0,
+             "SH": 0.0, "SF": 0.0, "IBB": 0.0, "HBP": 0.0, "GDP": 0.0}
+    event.update(stats)
+    return event
+
+
+class PlateAppearanceStoreTests(TestCase):
+
+    def setUp(self):
+        self.store = PlateAppearanceStore()
+        self.events = [make_event(datetime(2004, 5, 1), 1, H=1),
+                       make_event(datetime(2004, 5, 1), 2, SO=1.0),
+                       make_event(datetime(2005, 7, 4), 3, H=1, HR=1, RBI=2),
+                       make_event(datetime(2005, 10, 12), 1, SO=1.0, is_postseason=True)]
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_insert_events_ignores_duplicates(self):
+        self.assertEqual(self.store.insert_events(self.events), 4)
+        self.assertEqual(self.store.insert_events(self.events), 0)
+        self.assertEqual(len(self.store.get_events("abreu-001bob", "pavano001car")), 4)
+
+    def test_events_round_trip(self):
+        self.store.insert_events(self.events)
+        events = self.store.get_events("abreu-001bob", "pavano001car")
+        self.assertEqual(events[0]["Date"], datetime(2004, 5, 1))
+        self.assertEqual(events[0]["Sequence"], 1)
+        self.assertEqual(events[0]["RunnerOnFirst"], True)
+        self.assertEqual(events[0]["PlayDescription"], "Single to CF")
+        self.assertEqual(events[2]["HR"], 1)
+        self.assertEqual([event["is_postseason"] for event in events], [False, False, False, True])
+
+    def test_vs_pitcher_stats_as_of_date(self):
+        self.store.insert_events(self.events)
+        stats = self.store.get_vs_pitcher_stats("abreu-001bob", "pavano001car", date(2005, 7, 4))
+        self.assertEqual(stats["PA"], 2)
+        self.assertEqual(stats["H"], 1)
+        self.assertEqual(stats["SO"], 1)
+        self.assertEqual(stats["HR"], 0)
+        stats = self.store.get_vs_pitcher_stats("abreu-001bob", "pavano001car", date(2005, 10, 1))
+        self.assertEqual(stats["PA"], 3)
+        self.assertEqual(stats["RBI"], 2)
+
+    def test_unknown_matchup_is_empty(self):
+        stats = self.store.get_vs_pitcher_stats("ortiz-001dav", "pavano001car")
+        self.assertEqual(stats["PA"], 0)
+        self.assertIsNone(self.store.get_last_event_date("ortiz-001dav", "pavano001car"))
+        self.assertTrue(self.store.needs_sync("ortiz-001dav", "pavano001car", list()))
+
+    @mock.patch("plate_appearance_store.date")
+    @mock.patch("plate_appearance_store.get_vs_pitcher_gamelogs")
+    def test_sync_only_requests_matchups_with_new_games(self, get_vs_pitcher_gamelogs, mock_date):
+        mock_date.today.return_value = date(2005, 7, 5)
+        mock_date.fromisoformat = date.fromisoformat
+        get_vs_pitcher_gamelogs.return_value = self.events[:3]
+        game_dates = [date(2004, 5, 1), date(2005, 7, 4)]
+        self.assertEqual(self.store.sync_matchup("abreu-001bob", "Abreu", "pavano001car", ("user", "pwd"),
+                                                 game_dates), 3)
+
+        # No game between the two since the last sync
+        self.assertEqual(self.store.sync_matchup("abreu-001bob", "Abreu", "pavano001car", ("user", "pwd"),
+                                                 game_dates), 0)
+        self.assertEqual(get_vs_pitcher_gamelogs.call_count, 1)
+
+        mock_date.today.return_value = date(2005, 10, 13)
+        get_vs_pitcher_gamelogs.return_value = self.events
+        self.assertEqual(self.store.sync_matchup("abreu-001bob", "Abreu", "pavano001car", ("user", "pwd"),
+                                                 game_dates + [date(2005, 10, 12)]), 1)
+        self.assertEqual(get_vs_pitcher_gamelogs.call_count, 2)
+        self.assertEqual(len(self.store.get_events("abreu-001bob", "pavano001car")), 4)
+        self.assertEqual(self.store.get_last_synced("abreu-001bob", "pavano001car"), date(2005, 10, 13))
+
+    def test_existing_database_gains_new_columns(self):
+        self.store.close()
+        database_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(database_directory.cleanup)
+        database_path = os.path.join(database_directory.name, "plate_appearances.db")
+        connection = sqlite3.connect(database_path)
+        connection.execute("CREATE TABLE plate_appearances (HitterId TEXT NOT NULL, PitcherId TEXT NOT NULL, "
+                           "Date TEXT NOT NULL, Sequence INTEGER NOT NULL, "
+                           "PRIMARY KEY (HitterId, PitcherId, Date, Sequence))")
+        connection.close()
+
+        self.store = PlateAppearanceStore(database_path)
+        self.store.insert_events(self.events[3:])
+        self.assertTrue(self.store.get_events("abreu-001bob", "pavano001car")[0]["is_postseason"])
@@ -0,0 +1,42 @@
+from unittest import TestCase, mock
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+
+import selenium_helper
+
+
+class RenderingDriver(object):
+    """ Stand-in for a web driver whose table gains rows until it is fully rendered """
+
+    def __init__(self, row_counts):
+        self._row_counts = list(row_counts)
+
+    def find_elements(self, by, value):
+        if len(self._row_counts) > 1:
+            return ["tr"] * self._row_counts.pop(0)
+        return ["tr"] * self._row_counts[0]
+
+
+class SeleniumHelperTests(TestCase):
+
+    def test_wait_for_stable_element_count(self):
+        driver = RenderingDriver([0, 5, 12, 20])
+        rows = selenium_helper.wait_for_stable_element_count(driver, (By.TAG_NAME, "tr"), timeout=5.0,
+                                                             label="test_rows")
+        self.assertEqual(len(rows), 20)
+        self.assertEqual(len(selenium_helper.WAIT_TIMINGS.get_durations("test_rows")), 1)
+
+    def test_wait_for_stable_element_count_times_out_without_rows(self):
+        driver = RenderingDriver([0])
+        with self.assertRaises(TimeoutException):
+            selenium_helper.wait_for_stable_element_count(driver, (By.TAG_NAME, "tr"), timeout=0.5)
+
+    def test_load_page_restores_the_page_load_timeout(self):
+        browser = mock.Mock()
+        browser.timeouts.page_load = 300.0
+        browser.get.side_effect = WebDriverException("net::ERR_CONNECTION_RESET")
+        with self.assertRaises(WebDriverException):
+            selenium_helper.load_page(browser, "https://www.rotowire.com", timeout=5.0, max_attempts=2)
+        self.assertEqual(browser.get.call_count, 2)
+        self.assertEqual(browser.set_page_load_timeout.call_args_list, [mock.call(5.0), mock.call(300.0)])
@@ -0,0 +1,47 @@
+import os
+import tempfile
+from datetime import date
+from unittest import TestCase
+
+from slate_checkpoint import SlateCheckpoint, HITTER_UNIT_TYPE, GAME_UNIT_TYPE
+
+SLATE_DATE = date(2016, 4, 10)
+
+
+class SlateCheckpointTests(TestCase):
+
+    def test_units_survive_restart(self):
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            checkpoint_path = os.path.join(checkpoint_dir, "checkpoint.db")
+            checkpoint = SlateCheckpoint(checkpoint_path)
+            checkpoint.save_player_id("b", ("Mookie Betts", "BOS", 2016), "bettsmo01")
+            checkpoint.save_player_stats(SLATE_DATE, "b|bettsmo01|R|stromma01", {"season": {"HR": "3"},
+                                                                                "vs_pitcher": None})
+            checkpoint.save_park_factors(SLATE_DATE, "TOR", (104, 103))
+            checkpoint.save_game_result(SLATE_DATE, "BOS@TOR 1:07 PM", {"runs": [3, 4]})
+            checkpoint.close()
+
+            checkpoint = SlateCheckpoint(checkpoint_path)
+            self.assertEqual(checkpoint.get_player_id("b", ("Mookie Betts", "BOS", 2016)), "bettsmo01")
+            self.assertIsNone(checkpoint.get_player_id("p", ("Mookie Betts", "BOS", 2016)))
+            self.assertEqual(checkpoint.get_player_stats(SLATE_DATE, "b|bettsmo01|R|stromma01"),
+                             {"season": {"HR": "3"}, "vs_pitcher": None})
+            self.assertIsNone(checkpoint.get_player_stats(date(2016, 4, 11), "b|bettsmo01|R|stromma01"))
+            self.assertEqual(checkpoint.get_park_factors(SLATE_DATE, "TOR"), (104, 103))
+            self.assertEqual(checkpoint.get_game_result(SLATE_DATE, "BOS@TOR 1:07 PM"), {"runs": [3, 4]})
+            checkpoint.close()
+
+    def test_failure_report_lists_last_run(self):
+        checkpoint = SlateCheckpoint()
+        checkpoint.record_failure(SLATE_DATE, HITTER_UNIT_TYPE, "Mookie Betts", "BOS", "stale run")
+        checkpoint.clear_failures(SLATE_DATE)
+        self.assertEqual(checkpoint.get_failure_report(SLATE_DATE), "No failures for the 2016-04-10 slate")
+
+        checkpoint.record_failure(SLATE_DATE, HITTER_UNIT_TYPE, "Mookie Betts", "BOS",
+                                  "not found in the 2016 batting leaderboard")
+        checkpoint.record_failure(SLATE_DATE, GAME_UNIT_TYPE, "BOS@TOR 1:07 PM", None, "RetriesExhausted: ")
+        self.assertEqual(len(checkpoint.get_failures(SLATE_DATE)), 2)
+        self.assertEqual(checkpoint.get_failure_report(SLATE_DATE).splitlines(),
+                         ["2 failures for the 2016-04-10 slate:",
+                          "  hitter Mookie Betts (BOS): not found in the 2016 batting leaderboard",
+                          "  game BOS@TOR 1:07 PM: RetriesExhausted: "])
@@ -0,0 +1,473 @@
+from datetime import date, timedelta
+from unittest import TestCase, mock
+
+from bs4 import BeautifulSoup
+import pandas as pd
+
+import os
+import tempfile
+
+import beautiful_soup_helper
+import stat_miner
+from rotowire import Game, PlayerStruct
+from slate_checkpoint import SlateCheckpoint
+
+
+def make_lineup(team):
+    return [PlayerStruct(team, "%s%i" % (team, i), "OF", "R", "%s Hitter%i" % (team, i), 3000) for i in range(9)]
+
+
+def make_game(away_pitcher_name, home_pitcher_name):
+    return Game(make_lineup("BOS"), PlayerStruct("BOS", away_pitcher_name, "P", "L", away_pitcher_name, 9000),
+                make_lineup("TOR"), PlayerStruct("TOR", home_pitcher_name, "P", "R", home_pitcher_name, 9000),
+                date(2016, 4, 10), "1:07 PM")
+
+
+def make_id(full_name, team, year=None, soup=None):
+    return full_name.lower().replace(" ", "") + "01"
+
+
+PARK_PAGE_HTML = "<html><div><p><strong>Multi-year:</strong> Batting - 104, Pitching - 103</p>" \
+                 "<p><a href=\"/about/parkadjust.shtml\">?</a></p></div></html>"
+
+
+def get_slate_page(url):
+    return BeautifulSoup(PARK_PAGE_HTML if "/teams/" in url else "<html></html>", "lxml")
+
+
+@mock.patch("baseball_reference.get_pitcher_id", side_effect=make_id)
+@mock.patch("baseball_reference.get_hitter_id", side_effect=make_id)
+class SlatePlanTests(TestCase):
+
+    def setUp(self):
+        player_stat_cache = mock.patch("stat_miner.PLAYER_STAT_CACHE", stat_miner.PlayerStatCache())
+        player_stat_cache.start()
+        self.addCleanup(player_stat_cache.stop)
+
+    def test_pages_are_fetched_once_per_slate(self, get_hitter_id, get_pitcher_id):
+        # A doubleheader shares both lineups, the leaderboards and the park between its games
+        games = [make_game("Rick Porcello", "Marcus Stroman"), make_game("David Price", "R.A. Dickey")]
+        with mock.patch("stat_miner.fetch_slate_page",
+                        side_effect=lambda url: BeautifulSoup("<html></html>", "lxml")) as fetch_slate_page:
+            game_stats = stat_miner.mine_slate(games, max_workers=4)
+
+        fetched_urls = [fetch_call.args[0] for fetch_call in fetch_slate_page.call_args_list]
+        self.assertEqual(len(fetched_urls), len(set(fetched_urls)))
+        # 2 leaderboards and 1 park, 4 pages per unique hitter and 2 per unique pitcher
+        self.assertEqual(len(fetched_urls), 3 + 18 * 4 + 4 * 2)
+        # Each ID is looked up once even though the hitters appear in both games
+        self.assertEqual(get_hitter_id.call_count, 18)
+
+        self.assertEqual(len(game_stats), 2)
+        self.assertEqual(len(game_stats[1].away_hitter_miners), 9)
+        self.assertEqual(game_stats[1].home_pitcher_miner.baseball_reference_id, "r.a.dickey01")
+        self.assertEqual(game_stats[0].park_factors, (None, None))
+
+    def test_unresolved_players_are_not_fetched(self, get_hitter_id, get_pitcher_id):
+        get_hitter_id.side_effect = stat_miner.PlayerNameNotFound("BOS Hitter0")
+        with mock.patch("stat_miner.fetch_slate_page",
+                        side_effect=lambda url: BeautifulSoup("<html></html>", "lxml")) as fetch_slate_page:
+            game_stats = stat_miner.mine_slate([make_game("Rick Porcello", "Marcus Stroman")])
+
+        self.assertEqual(fetch_slate_page.call_count, 3 + 2 * 2)
+        self.assertEqual(game_stats[0].away_hitter_miners, list())
+        self.assertIsNotNone(game_stats[0].away_pitcher_miner)
+
+    def test_slate_stats_are_tables(self, get_hitter_id, get_pitcher_id):
+        get_hitter_id.side_effect = lambda full_name, team, year=None, soup=None: \
+            None if full_name == "BOS Hitter0" else make_id(full_name, team)
+        with mock.patch("stat_miner.fetch_slate_page",
+                        side_effect=lambda url: BeautifulSoup("<html></html>", "lxml")):
+            game_stats = stat_miner.mine_slate([make_game("Rick Porcello", "Marcus Stroman")])
+        game_stats[0].away_pitcher_miner.season_stats = {"Split": "2016 Totals", "IP": "12.1", "SO": "14"}
+        game_stats[0].park_factors = (104, 103)
+
+        slate_stats = stat_miner.SlateStats.from_game_stats(game_stats)
+        self.assertEqual(len(slate_stats), 1)
+        self.assertEqual(slate_stats.games.loc[0, "hitter_park_factor"], 104)
+        self.assertEqual(len(slate_stats.hitters), 17)
+        # The unresolved leadoff hitter does not shift the slots of the rest of the lineup
+        away_hitters = slate_stats.hitters[~slate_stats.hitters["is_home"]]
+        self.assertEqual(list(away_hitters["batting_order_position"]), list(range(2, 10)))
+
+        away_pitcher = slate_stats.pitchers[~slate_stats.pitchers["is_home"]].iloc[0]
+        self.assertEqual(away_pitcher["baseball_reference_id"], "rickporcello01")
+        self.assertEqual(away_pitcher["season_SO"], 14.)
+        self.assertEqual(away_pitcher["season_Split"], "2016 Totals")
+
+    def test_players_are_mined_once_per_day(self, get_hitter_id, get_pitcher_id):
+        games = [make_game("Rick Porcello", "Marcus Stroman")]
+        with mock.patch("stat_miner.fetch_slate_page",
+                        side_effect=lambda url: BeautifulSoup("<html></html>", "lxml")):
+            stat_miner.mine_slate(games)
+        # A separate run (e.g. for another contest) has no checkpoint but shares the player stats
+        with mock.patch("stat_miner.fetch_slate_page",
+                        side_effect=lambda url: BeautifulSoup("<html></html>", "lxml")) as fetch_slate_page:
+            game_stats = stat_miner.mine_slate(games)
+
+        self.assertEqual(fetch_slate_page.call_count, 3)
+        self.assertEqual(len(game_stats[0].home_hitter_miners), 9)
+
+    def test_rerun_only_fetches_incomplete_units(self, get_hitter_id, get_pitcher_id):
+        games = [make_game("Rick Porcello", "Marcus Stroman")]
+        failed_url = stat_miner.get_split_url("torhitter301", 2016)
+        checkpoint = SlateCheckpoint()
+        with mock.patch("stat_miner.fetch_slate_page",
+                        side_effect=lambda url: None if url == failed_url else get_slate_page(url)):
+            stat_miner.mine_slate(games, checkpoint=checkpoint)
+        self.assertEqual([failure["Name"] for failure in checkpoint.get_failures(date(2016, 4, 10))],
+                         ["TOR Hitter3"])
+
+        with mock.patch("stat_miner.fetch_slate_page",
+                        side_effect=lambda url: BeautifulSoup("<html></html>", "lxml")) as fetch_slate_page:
+            game_stats = stat_miner.mine_slate(games, checkpoint=checkpoint)
+
+        # The IDs, the park and the other stats of the hitter are cached, so only the failed page is requested
+        self.assertEqual([fetch_call.args[0] for fetch_call in fetch_slate_page.call_args_list], [failed_url])
+        self.assertEqual(get_hitter_id.call_count, 18)
+        self.assertEqual(len(game_stats[0].home_hitter_miners), 9)
+        self.assertEqual(game_stats[0].batting_order_positions["torhitter301"], 4)
+        self.assertEqual(checkpoint.get_failures(date(2016, 4, 10)), list())
+        self.assertEqual(game_stats[0].park_factors, (104, 103))
+
+    def test_park_without_factors_is_fetched_again(self, get_hitter_id, get_pitcher_id):
+        games = [make_game("Rick Porcello", "Marcus Stroman")]
+        park_url = stat_miner.get_team_url("TOR", 2016)
+        checkpoint = SlateCheckpoint()
+        with mock.patch("stat_miner.fetch_slate_page",
+                        side_effect=lambda url: BeautifulSoup("<html></html>", "lxml")):
+            game_stats = stat_miner.mine_slate(games, checkpoint=checkpoint)
+        self.assertEqual(game_stats[0].park_factors, (None, None))
+        self.assertIsNone(checkpoint.get_park_factors(date(2016, 4, 10), "TOR"))
+        self.assertEqual([failure["Name"] for failure in checkpoint.get_failures(date(2016, 4, 10))],
+                         ["BOS@TOR 1:07 PM"])
+
+        with mock.patch("stat_miner.fetch_slate_page", side_effect=get_slate_page) as fetch_slate_page:
+            game_stats = stat_miner.mine_slate(games, checkpoint=checkpoint)
+        self.assertEqual([fetch_call.args[0] for fetch_call in fetch_slate_page.call_args_list], [park_url])
+        self.assertEqual(game_stats[0].park_factors, (104, 103))
+        self.assertEqual(checkpoint.get_failures(date(2016, 4, 10)), list())
+
+
+class SlateStatsTests(TestCase):
+
+    def test_worker_results_are_joined_in_game_order(self):
+        games = [make_game("Rick Porcello", "Marcus Stroman"), make_game("David Price", "R.A. Dickey")]
+        game_results = list()
+        for game in games:
+            game_stats = stat_miner.GameStats(game)
+            game_stats.home_pitcher_miner = stat_miner.PitcherMiner(make_id(game.home_pitcher.name, "TOR"))
+            game_results.append(stat_miner.SlateStats.from_game_stats([game_stats]))
+
+        with mock.patch("stat_miner.get_pregame_stats", side_effect=game_results):
+            slate_stats = stat_miner.get_pregame_stats_wrapper(games, threading_enabled=False)
+
+        self.assertEqual(list(slate_stats.games["game_index"]), [0, 1])
+        self.assertEqual(list(slate_stats.get_game_pitchers(1)["baseball_reference_id"]), ["r.a.dickey01"])
+        self.assertEqual(len(slate_stats.get_game_hitters(0)), 0)
+        self.assertEqual(len(stat_miner.SlateStats.concat(list())), 0)
+
+
+def mine_game_with_park_page(game):
+    beautiful_soup_helper.request_url("http://www.baseball-reference.com/teams/TOR/2016.shtml")
+    game_stats = stat_miner.GameStats(game)
+    game_stats.home_pitcher_miner = stat_miner.PitcherMiner(make_id(game.home_pitcher.name, "TOR"))
+    return stat_miner.SlateStats.from_game_stats([game_stats])
+
+
+@mock.patch("stat_miner.get_pregame_stats", side_effect=mine_game_with_park_page)
+class ExecutionModeTests(TestCase):
+
+    def test_in_process_modes_share_pages(self, get_pregame_stats):
+        games = [make_game("Rick Porcello", "Marcus Stroman"), make_game("David Price", "R.A. Dickey"),
+                 make_game("Steven Wright", "J.A. Happ")]
+        for execution_mode in [stat_miner.THREADS_EXECUTION_MODE, stat_miner.ASYNCIO_EXECUTION_MODE]:
+            with mock.patch("beautiful_soup_helper.get_session") as get_session:
+                get_session.return_value.get.return_value.status_code = 200
+                slate_stats = stat_miner.get_pregame_stats_wrapper(games, execution_mode=execution_mode,
+                                                                   max_workers=3)
+
+            self.assertEqual(get_session.return_value.get.call_count, 1)
+            self.assertEqual(list(slate_stats.pitchers["baseball_reference_id"]),
+                             ["marcusstroman01", "r.a.dickey01", "j.a.happ01"])
+        # The cache only lives for the slate
+        self.assertIsNone(beautiful_soup_helper.set_page_cache(None))
+
+    @mock.patch("beautiful_soup_helper.get_session")
+    def test_failed_games_are_mined_again(self, get_session, get_pregame_stats):
+        # Requests for the Boston page fail, so the soup helpers give up with RetriesExhausted
+        def get_page(url):
+            if "BOS" in url:
+                raise IOError
+            return mock.Mock(status_code=200, content=b"")
+        get_session.return_value.get.side_effect = get_page
+        games = [make_game("Rick Porcello", "Marcus Stroman"), make_game("David Price", "R.A. Dickey")]
+        games[1].game_time = "7:07 PM"
+        checkpoint = SlateCheckpoint()
+        get_pregame_stats.side_effect = lambda game: mine_game_with_park_page(game) if game is games[1] else \
+            stat_miner.get_soup_from_url("http://www.baseball-reference.com/teams/BOS/2016.shtml")
+        slate_stats = stat_miner.get_pregame_stats_wrapper(games, threading_enabled=False, checkpoint=checkpoint)
+        self.assertEqual(len(slate_stats), 2)
+        self.assertEqual(list(slate_stats.pitchers["game_index"]), [1])
+        self.assertEqual(checkpoint.get_failures(date(2016, 4, 10))[0]["Name"], "BOS@TOR 1:07 PM")
+        self.assertTrue(checkpoint.get_failures(date(2016, 4, 10))[0]["Reason"].startswith("RetriesExhausted"))
+
+        get_pregame_stats.side_effect = mine_game_with_park_page
+        get_pregame_stats.reset_mock()
+        slate_stats = stat_miner.get_pregame_stats_wrapper(games, checkpoint=checkpoint)
+        get_pregame_stats.assert_called_once_with(games[0])
+        self.assertEqual(list(slate_stats.pitchers["baseball_reference_id"]), ["marcusstroman01", "r.a.dickey01"])
+
+    @mock.patch("beautiful_soup_helper.get_session")
+    def test_changed_lineup_is_mined_again(self, get_session, get_pregame_stats):
+        get_session.return_value.get.return_value = mock.Mock(status_code=200, content=b"")
+        games = [make_game("Rick Porcello", "Marcus Stroman"), make_game("David Price", "R.A. Dickey")]
+        games[1].game_time = "7:07 PM"
+        checkpoint = SlateCheckpoint()
+        stat_miner.get_pregame_stats_wrapper(games, threading_enabled=False, checkpoint=checkpoint)
+        self.assertEqual(get_pregame_stats.call_count, 2)
+
+        # A late scratch in the Toronto lineup of the first game, and a new starter in the second
+        games = [make_game("Rick Porcello", "Marcus Stroman"), make_game("David Price", "J.A. Happ")]
+        games[1].game_time = "7:07 PM"
+        games[0].home_lineup[3] = PlayerStruct("TOR", "TOR9", "OF", "L", "TOR Hitter9", 3000)
+        get_pregame_stats.reset_mock()
+        slate_stats = stat_miner.get_pregame_stats_wrapper(games, threading_enabled=False, checkpoint=checkpoint)
+        self.assertEqual(get_pregame_stats.call_args_list, [mock.call(games[0]), mock.call(games[1])])
+        self.assertEqual(list(slate_stats.pitchers["baseball_reference_id"]), ["marcusstroman01", "j.a.happ01"])
+
+        get_pregame_stats.reset_mock()
+        stat_miner.get_pregame_stats_wrapper(games, threading_enabled=False, checkpoint=checkpoint)
+        get_pregame_stats.assert_not_called()
+
+    def test_unknown_mode_is_rejected(self, get_pregame_stats):
+        with self.assertRaises(ValueError):
+            stat_miner.get_pregame_stats_wrapper([], execution_mode="fibers")
+        with self.assertRaises(ValueError):
+            stat_miner.mine_pregame_stats(execution_mode="fibers")
+
+    @mock.patch("beautiful_soup_helper.get_session")
+    def test_slate_is_mined_in_the_given_mode(self, get_session, get_pregame_stats):
+        get_session.return_value.get.return_value = mock.Mock(status_code=200, content=b"")
+        games = [make_game("Rick Porcello", "Marcus Stroman"), make_game("David Price", "R.A. Dickey")]
+        with mock.patch("stat_miner.get_game_lineups", return_value=games), \
+                mock.patch("stat_miner.mine_slate") as mine_slate:
+            slate_stats = stat_miner.mine_pregame_stats(execution_mode=stat_miner.ASYNCIO_EXECUTION_MODE)
+        mine_slate.assert_not_called()
+        self.assertEqual(list(slate_stats.pitchers["baseball_reference_id"]), ["marcusstroman01", "r.a.dickey01"])
+
+
+@mock.patch("baseball_reference.get_pitcher_id", side_effect=make_id)
+@mock.patch("baseball_reference.get_hitter_id", side_effect=make_id)
+class IncrementalSlateMinerTests(TestCase):
+
+    def setUp(self):
+        player_stat_cache = mock.patch("stat_miner.PLAYER_STAT_CACHE", stat_miner.PlayerStatCache())
+        player_stat_cache.start()
+        self.addCleanup(player_stat_cache.stop)
+
+    def test_diff_reports_changed_inputs(self, get_hitter_id, get_pitcher_id):
+        previous_games = [make_game("Rick Porcello", "Marcus Stroman"), make_game("David Price", "R.A. Dickey")]
+        games = [make_game("Rick Porcello", "Marcus Stroman"), make_game("David Price", "J.A. Happ")]
+        games[0].game_time = "7:07 PM"
+        games[1].away_lineup[8] = PlayerStruct("BOS", "BOS9", "C", "R", "Christian Vazquez", 2500)
+
+        slate_diff = stat_miner.diff_slates(previous_games, games)
+        self.assertEqual(slate_diff.unchanged_games, list())
+        self.assertEqual([changes for _, _, changes in slate_diff.changed_games],
+                         [["moved from 1:07 PM to 7:07 PM"],
+                          ["home starter R.A. Dickey replaced by J.A. Happ", "away hitter 9 is Christian Vazquez"]])
+
+        # Games between the same teams are matched in order
+        slate_diff = stat_miner.diff_slates(previous_games, games[1:])
+        self.assertEqual(slate_diff.changed_games[0][0], previous_games[0])
+        self.assertEqual(slate_diff.changed_games[0][2][0], "away starter Rick Porcello replaced by David Price")
+        self.assertEqual(slate_diff.removed_games, previous_games[1:])
+
+        new_york_game = Game(make_lineup("NYY"), PlayerStruct("NYY", "CC", "P", "L", "CC Sabathia", 8000),
+                             make_lineup("BAL"), PlayerStruct("BAL", "CT", "P", "R", "Chris Tillman", 8000),
+                             date(2016, 4, 10), "1:05 PM")
+        slate_diff = stat_miner.diff_slates(previous_games, previous_games + [new_york_game])
+        self.assertEqual(len(slate_diff.unchanged_games), 2)
+        self.assertEqual(slate_diff.added_games, [new_york_game])
+
+    def test_only_changed_players_are_fetched(self, get_hitter_id, get_pitcher_id):
+        slate_miner = stat_miner.IncrementalSlateMiner()
+        first_games = [make_game("Rick Porcello", "Marcus Stroman")]
+        with mock.patch("stat_miner.fetch_slate_page", side_effect=get_slate_page):
+            slate_miner.mine(first_games)
+        second_game = make_game("David Price", "R.A. Dickey")
+        second_game.game_time = "7:07 PM"
+        with mock.patch("stat_miner.fetch_slate_page", side_effect=get_slate_page):
+            slate_miner.mine(first_games + [second_game])
+        first_game_stats = slate_miner.game_stats[0]
+
+        # Late scratch in the second game: a new hitter bats ninth for Boston
+        games = [make_game("Rick Porcello", "Marcus Stroman"), make_game("David Price", "R.A. Dickey")]
+        games[1].game_time = "7:07 PM"
+        games[1].away_lineup[8] = PlayerStruct("BOS", "BOS9", "C", "R", "Christian Vazquez", 2500)
+        with mock.patch("stat_miner.fetch_slate_page", side_effect=get_slate_page) as fetch_slate_page:
+            slate_stats = slate_miner.mine(games)
+
+        fetched_urls = sorted(fetch_call.args[0] for fetch_call in fetch_slate_page.call_args_list)
+        self.assertEqual(fetched_urls,
+                         sorted([stat_miner.get_leaderboard_url(2016, "batting")] +
+                                list(stat_miner.get_hitter_pages("christianvazquez01", 2016, "R", "r.a.dickey01"))))
+        self.assertIs(slate_miner.game_stats[0], first_game_stats)
+        self.assertIs(slate_miner.game_stats[0].game, games[0])
+        self.assertEqual(len(slate_stats.get_game_hitters(1)), 18)
+        self.assertEqual(slate_miner.game_stats[1].batting_order_positions["christianvazquez01"], 9)
+
+
+class PlayerStatCacheTests(TestCase):
+
+    def test_stats_are_persisted_and_expired(self):
+        today = date(2016, 4, 10)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_path = os.path.join(cache_dir, "player_stats.db")
+            player_stat_cache = stat_miner.PlayerStatCache(cache_path, max_size=2)
+            for stat_kind in [stat_miner.get_stat_kind("b", "career"), stat_miner.get_stat_kind("b", "vs_hand", "L"),
+                              stat_miner.get_stat_kind("b", "recent")]:
+                player_stat_cache.put("bettsmo01", stat_kind, {"HR": "1"}, today - timedelta(days=1))
+            player_stat_cache.put("bettsmo01", "b:recent", {"HR": "2"}, today)
+            player_stat_cache.put("bettsmo01", "b:season:2016", None, today)
+            self.assertEqual(len(player_stat_cache), 2)
+            player_stat_cache.close()
+
+            player_stat_cache = stat_miner.PlayerStatCache(cache_path)
+            self.assertEqual(player_stat_cache.get("bettsmo01", "b:recent", today), (True, {"HR": "2"}))
+            self.assertEqual(player_stat_cache.get("bettsmo01", "b:season:2016", today), (True, None))
+            self.assertEqual(player_stat_cache.get("bettsmo01", "b:recent", today + timedelta(days=1)),
+                             (False, None))
+
+            # The stable stats are cached for the week, which starts on Monday the 4th
+            yesterday = today - timedelta(days=1)
+            self.assertEqual(player_stat_cache.get("bettsmo01", "b:career", today), (True, {"HR": "1"}))
+            self.assertFalse(player_stat_cache.contains("bettsmo01", "b:career", today + timedelta(days=1)))
+
+            # Stats that roll daily are dropped once their date has passed, the stable ones once their week has
+            player_stat_cache.expire(today)
+            player_stat_cache = stat_miner.PlayerStatCache(cache_path)
+            self.assertTrue(player_stat_cache.contains("bettsmo01", "b:career", today))
+            self.assertTrue(player_stat_cache.contains("bettsmo01", "b:vs_hand:L", today))
+            self.assertFalse(player_stat_cache.contains("bettsmo01", "b:recent", yesterday))
+            self.assertTrue(player_stat_cache.contains("bettsmo01", "b:recent", today))
+
+            player_stat_cache.expire(today + timedelta(days=1))
+            self.assertEqual(len(player_stat_cache), 0)
+            player_stat_cache.close()
+            player_stat_cache = stat_miner.PlayerStatCache(cache_path)
+            self.assertFalse(player_stat_cache.contains("bettsmo01", "b:career", today))
+            self.assertFalse(player_stat_cache.contains("bettsmo01", "b:recent", today))
+            player_stat_cache.close()
+
+    @mock.patch("stat_miner.emit")
+    def test_planning_is_not_counted_as_lookups(self, emit):
+        player_stat_cache = stat_miner.PlayerStatCache()
+        player_stat_cache.put("priced01", "p:career", {"SO": "1"})
+        pitcher_pages = stat_miner.get_pitcher_pages("priced01", 2016)
+        with mock.patch("stat_miner.PLAYER_STAT_CACHE", player_stat_cache):
+            # The career page is still needed for the recent stats
+            self.assertEqual(stat_miner.get_uncached_page_urls("priced01", pitcher_pages), list(pitcher_pages))
+        self.assertEqual((player_stat_cache.hits, player_stat_cache.misses), (0, 0))
+        emit.assert_not_called()
+
+        self.assertEqual(player_stat_cache.get("priced01", "p:career"), (True, {"SO": "1"}))
+        self.assertEqual((player_stat_cache.hits, player_stat_cache.misses), (1, 0))
+        self.assertEqual(emit.call_count, 1)
+
+    @mock.patch("stat_miner.PLAYER_STAT_CACHE", stat_miner.PlayerStatCache())
+    @mock.patch("stat_miner.get_career_hitting_stats", return_value={"HR": 30})
+    def test_miners_read_through_cache(self, get_career_hitting_stats):
+        self.assertEqual(stat_miner.HitterMiner("bettsmo01").mine_career_stats(), {"HR": 30})
+        self.assertEqual(stat_miner.HitterMiner("bettsmo01").mine_career_stats(), {"HR": 30})
+        get_career_hitting_stats.assert_called_once_with("bettsmo01", None)
+
+
+UMPIRE_ROW = "<tr><td>%s</td><td>120</td><td>30</td><td>%s%%</td><td>8.1%%</td><td>8.9</td><td>.251</td>" \
+             "<td>.318</td><td>.410</td><td>%sx</td><td>0.98x</td><td>1.01x</td><td>1.00x</td><td>0.99x</td>" \
+             "<td>1.02x</td></tr>"
+UMPIRE_HTML = "<html><table id='ump-table'><thead></thead><tbody>%s%s</tbody></table></html>" % \
+              (UMPIRE_ROW % ("Ángel Hernández", "21.5", "1.04"), UMPIRE_ROW % ("Joe West", "19.0", "0.95"))
+
+
+@mock.patch("stat_miner.get_soup_from_url", side_effect=lambda url: BeautifulSoup(UMPIRE_HTML, "lxml"))
+class UmpireMinerTests(TestCase):
+
+    def test_factors_are_requested_once_a_day(self, get_soup_from_url):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            umpire_miner = stat_miner.UmpireMiner(stat_miner.UmpireFactorCache(cache_dir))
+            umpire_factors = umpire_miner.get_umpire_factors(date(2016, 4, 10))
+            self.assertEqual(umpire_factors.loc["angel hernandez", "K %"], .215)
+            self.assertEqual(umpire_factors.loc["joe west", "K Boost"], .95)
+            self.assertEqual(str(umpire_factors["SLG"].dtype), "float64")
+            self.assertIs(umpire_miner.get_umpire_factors(date(2016, 4, 10)), umpire_factors)
+
+            # Another process reads the day's file instead of the page
+            umpire_miner = stat_miner.UmpireMiner(stat_miner.UmpireFactorCache(cache_dir))
+            umpire_factors = umpire_miner.get_umpire_factors(date(2016, 4, 10))
+            self.assertEqual(umpire_factors.attrs["as_of_date"], date(2016, 4, 10))
+            self.assertEqual(list(umpire_factors.index), ["angel hernandez", "joe west"])
+
+            umpire_miner.get_umpire_factors(date(2016, 4, 11))
+            self.assertEqual(os.listdir(cache_dir), ["umpire_factors_2016-04-11.parquet"])
+        self.assertEqual(get_soup_from_url.call_count, 2)
+
+        umpire_data = stat_miner.UmpireMiner(stat_miner.UmpireFactorCache()).mine_umpire_data()
+        self.assertEqual(umpire_data["Joe West"]["BB %"], .081)
+
+    def test_slate_is_joined_by_normalized_name(self, get_soup_from_url):
+        games = [make_game("Rick Porcello", "Marcus Stroman"), make_game("David Price", "R.A. Dickey"),
+                 make_game("Steven Wright", "J.A. Happ")]
+        games[0].umpire_name = "Angel Hernandez"
+        games[1].umpire_name = "Unknown"
+        games[2].umpire_name = "JOE WEST"
+
+        slate_umpires = stat_miner.UmpireMiner(stat_miner.UmpireFactorCache()).get_slate_umpire_factors(games)
+        self.assertEqual(list(slate_umpires["game_index"]), [0, 1, 2])
+        self.assertEqual(slate_umpires.loc[0, "umpire_name"], "Ángel Hernández")
+        self.assertTrue(pd.isna(slate_umpires.loc[1, "K Boost"]))
+        self.assertEqual(slate_umpires.loc[2, "K Boost"], .95)
+
+
+def make_leaderboard_html(lineup):
+    rows = "<tr class='thead'><td>Name</td></tr>"
+    for hitter in lineup[1:]:
+        hitter_id = make_id(hitter.name, hitter.team)
+        rows += "<tr><td><a href='/players/%s/%s.shtml'>%s</a></td><td>27</td><td>%s</td></tr>" % \
+                (hitter_id[0], hitter_id, hitter.name.replace(" ", "\xa0"), hitter.team)
+    # Commented like the live page
+    return "<html><!-- <table id='players_standard_batting'><tbody>%s</tbody></table> --></html>" % rows
+
+
+class LineupMinerTests(TestCase):
+
+    def setUp(self):
+        player_stat_cache = mock.patch("stat_miner.PLAYER_STAT_CACHE", stat_miner.PlayerStatCache())
+        player_stat_cache.start()
+        self.addCleanup(player_stat_cache.stop)
+
+    def test_lineup_is_mined_as_one_batch(self):
+        game = make_game("Rick Porcello", "Marcus Stroman")
+        leaderboard_url = stat_miner.get_leaderboard_url(2016, "batting")
+        leaderboard_html = make_leaderboard_html(game.home_lineup)
+
+        def fetch_page(url):
+            html = leaderboard_html if url == leaderboard_url else "<html></html>"
+            return beautiful_soup_helper.html_to_uncommented_soup(html)
+
+        lineup_miner = stat_miner.LineupMiner(game.home_lineup, game.away_pitcher, game.game_date, game.game_time,
+                                              is_home=True, opposing_pitcher_id="rickporcello01")
+        with mock.patch("stat_miner.fetch_slate_page", side_effect=fetch_page) as fetch_slate_page, \
+                mock.patch("stat_miner.get_hitter_id") as get_hitter_id:
+            lineup_stats = lineup_miner.mine_pregame_stats(max_workers=4)
+
+        get_hitter_id.assert_not_called()
+        fetched_urls = [fetch_call.args[0] for fetch_call in fetch_slate_page.call_args_list]
+        # The leaderboard, then 4 pages for each of the 8 hitters in it
+        self.assertEqual(fetched_urls[0], leaderboard_url)
+        self.assertEqual(len(set(fetched_urls[1:])), 8 * 4)
+        self.assertEqual(list(lineup_stats["batting_order_position"]), list(range(2, 10)))
+        self.assertEqual(lineup_stats.loc[0, "baseball_reference_id"], "torhitter101")
+        self.assertEqual(lineup_stats.loc[0, "rotowire_id"], "TOR1")
+        self.assertEqual(lineup_miner.batting_order_positions["torhitter801"], 9)
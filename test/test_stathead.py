@@ -1,9 +1,13 @@
 import os
+from unittest import mock
 
 from stat_miner import *
 import unittest
 import sys
+import threading
 import stathead
+import numpy as np
+import pandas as pd
 
 
 class StatheadTests(unittest.TestCase):
@@ -46,6 +50,49 @@ class StatheadTests(unittest.TestCase):
         self.assertEqual(int(sum(item["BB"] for item in vs_pitcher)), 21)
         self.assertEqual(int(sum(item["SO"] for item in vs_pitcher)), 25)
 
+    def test_lineup_vs_pitcher_deduplicates_hitters(self):
+        hitters = [("abreu-001bob", "Abreu"), ("abreu-001bob", "Abreu")]
+        vs_gamelogs = stathead.get_lineup_vs_pitcher_gamelogs("pavano001car", hitters, self.get_creds())
+        self.assertEqual(int(vs_gamelogs["PA"].sum()), 71)
+        self.assertEqual(int(vs_gamelogs["H"].sum()), 20)
+        self.assertTrue((vs_gamelogs["HitterId"] == "abreu-001bob").all())
+
+    @mock.patch("stathead.login_stathead")
+    def test_browser_pool_wakes_waiters_after_failed_login(self, login_stathead):
+        login_started = threading.Event()
+        waiter_blocked = threading.Event()
+        browser = mock.Mock()
+
+        def log_in(credentials):
+            if login_stathead.call_count == 1:
+                login_started.set()
+                waiter_blocked.wait(5)
+                raise RuntimeError("login failed")
+            return browser
+        login_stathead.side_effect = log_in
+
+        browser_pool = stathead.StatheadBrowserPool(("user", "pwd"), size=1)
+        acquired = list()
+        failing_thread = threading.Thread(target=lambda: self.assertRaises(RuntimeError, browser_pool.acquire))
+        failing_thread.start()
+        login_started.wait(5)
+        waiting_thread = threading.Thread(target=lambda: acquired.append(browser_pool.acquire()))
+        waiting_thread.start()
+        # Give the waiting thread time to find the pool full before the login fails
+        waiting_thread.join(.2)
+        waiter_blocked.set()
+        failing_thread.join(5)
+        waiting_thread.join(5)
+        self.assertFalse(waiting_thread.is_alive())
+        self.assertEqual(acquired, [browser])
+
+        # Closed browsers are not handed out again
+        browser_pool.release(browser)
+        browser_pool.close()
+        browser.quit.assert_called_once_with()
+        login_stathead.side_effect = lambda credentials: mock.Mock()
+        self.assertIsNot(browser_pool.acquire(), browser)
+
     def test_get_num_rbis_errors(self):
         num_rbis = stathead.get_num_rbis("Reached on E5 (Ground Ball); Rollins Scores/unER; Abreu Scores/No RBI/unER; Howard to 3B; Dellucci to 2B",
                                 "Dellucci")
@@ -56,6 +103,75 @@ class StatheadTests(unittest.TestCase):
                                 "Delgado")
         self.assertEqual(num_rbis, 0)
 
+    def test_game_log_tables_from_page_source(self):
+        """
+        Verify the game finder reads its stats table and the versus finder finds its postseason table even though
+        it is hidden in a comment
+        """
+        header = "<thead><tr><th>Rk</th><th>Player</th><th>Date</th><th></th><th>Opp</th><th>PA</th><th>BA</th></tr></thead>"
+        first_row = "<tr><th>1</th><td><a href='/players/o/ortizda01.shtml'>David Ortiz</a></td>" \
+                    "<td>2004-10-02</td><td></td><td>BAL</td><td>5</td><td></td></tr>"
+        second_row = "<tr><th>2</th><td><a href='/players/o/ortizda01.shtml'>David Ortiz</a></td>" \
+                     "<td>2004-10-03</td><td>@</td><td>BAL</td><td>2</td><td>.000</td></tr>"
+        html = "<html><body><div id='div_stats'><table id='stats'>%s<tbody>%s%s</tbody></table></div>" \
+               "</body></html>" % (header, first_row, second_row)
+        with mock.patch("stathead.load_page"):
+            gamelogs = stathead.get_season_hitting_game_logs("ortiz-001dav", 2004,
+                                                             browser=mock.Mock(page_source=html))
+        self.assertEqual(gamelogs.shape[0], 2)
+        self.assertEqual(gamelogs["br_id"].iloc[0], "ortizda01")
+        self.assertEqual(list(gamelogs["IsHome"]), [True, False])
+        self.assertEqual(list(gamelogs["is_postseason"]), [False, False])
+        self.assertEqual(list(gamelogs["PA"]), [5, 2])
+        # A blank BA has no at bats, which is not a .000 BA
+        self.assertTrue(np.isnan(gamelogs["BA"].iloc[0]))
+        self.assertEqual(gamelogs["BA"].iloc[1], 0)
+        self.assertEqual(gamelogs["Date"].iloc[1], pd.Timestamp("2004-10-03"))
+        self.assertEqual(gamelogs["PA"].dtype, "int16")
+        self.assertEqual(gamelogs["BA"].dtype, "float32")
+        self.assertEqual(gamelogs["Opp"].dtype, "category")
+
+        header = "<thead><tr><th>Rk</th><th>Player</th><th>Date</th><th>IP</th><th>SO</th></tr></thead>"
+        row = "<tr><th>1</th><td><a href='/players/m/martipe02.shtml'>Pedro Martinez</a></td>" \
+              "<td>1999-09-10</td><td>%s</td><td>17</td></tr>"
+        table = stathead.html_to_uncommented_soup("<table id='stats'>%s<tbody>%s%s</tbody></table>" %
+                                                  (header, row % "9.0", row % "5.2"))
+        builder = stathead.GameLogFrameBuilder(stathead.PITCHING_GAME_LOG_SCHEMA)
+        builder.add_table(table, False)
+        gamelogs = builder.build()
+        self.assertEqual(list(gamelogs["Outs"]), [27, 17])
+        self.assertAlmostEqual(gamelogs["IP"].iloc[1], 17 / 3., places=5)
+
+        html = "<html><body><div id='div_stats_bvp_pa_rs'><table id='stats_bvp_pa_rs'></table></div>" \
+               "<div id='div_stats_bvp_pa_po'><!-- <table id='stats_bvp_pa_po'></table> --></div></body></html>"
+        table_variants = stathead.get_table_variants(stathead.html_to_uncommented_soup(html), "stats_bvp_pa")
+        self.assertEqual([is_postseason for _, is_postseason in table_variants], [False, True])
+
+    def test_career_tables_from_page_source(self):
+        """
+        Verify the career stats are read from the season finder's stats table, and the postseason ones from the
+        postseason search
+        """
+        header = "<thead><tr><th>Rk</th><th>Player</th><th>HR</th><th>PA</th><th>SB</th></tr></thead>"
+        regular_row = "<tr><th>1</th><td data-append-csv='ramirma02'>Manny Ramirez</td><td>555</td>" \
+                      "<td>9774</td><td>38</td></tr>"
+        postseason_row = "<tr><th>1</th><td data-append-csv='ramirma02'>Manny Ramirez</td><td>29</td>" \
+                         "<td>493</td><td></td></tr>"
+        html = "<html><body><div id='div_stats'><table id='stats'>%s<tbody>%s</tbody></table></div></body></html>"
+        browser = mock.Mock(page_source=html % (header, regular_row))
+        regular_season_stats = stathead.get_career_hitting_stats("ramirma02", "Manny Ramirez", False,
+                                                                 browser=browser)
+        self.assertEqual(regular_season_stats["HR"], 555)
+        self.assertEqual(regular_season_stats["PA"], 9774)
+        self.assertEqual(stathead.get_career_hitting_stats("ortizda01", "David Ortiz", False, browser=browser)["HR"],
+                         0)
+
+        browser = mock.Mock(page_source=html % (header, postseason_row))
+        postseason_stats = stathead.get_career_hitting_stats("ramirma02", "Manny Ramirez", True, browser=browser)
+        self.assertEqual(postseason_stats["HR"], 29)
+        self.assertEqual(postseason_stats["SB"], 0)
+        self.assertTrue(browser.get.call_args[0][0].endswith("&comp_type=post"))
+
     def test_get_season_hitter_identifiers(self):
         """
         Get the season hitter identifiers and verify the count is correct and verify the content of the
@@ -94,7 +210,7 @@ class StatheadTests(unittest.TestCase):
         for key in keys:
             self.assertTrue(key in dataframe_keys)
         self.assertEqual(newest_entry['Player'], 'David Ortiz')
-        self.assertEqual(newest_entry['Date'], '2004-10-03')
+        self.assertEqual(newest_entry['Date'], pd.Timestamp('2004-10-03'))
         self.assertEqual(newest_entry['Age'], '28-320')
         self.assertEqual(newest_entry['Team'], 'BOS')
         self.assertEqual(newest_entry['Opp'], 'BAL')
@@ -136,7 +252,7 @@ class StatheadTests(unittest.TestCase):
         for key in keys:
             self.assertTrue(key in dataframe_keys)
         self.assertEqual(newest_entry['Player'], 'Pedro Martínez')
-        self.assertEqual(newest_entry['Date'], '1999-10-02')
+        self.assertEqual(newest_entry['Date'], pd.Timestamp('1999-10-02'))
         self.assertEqual(newest_entry['Age'], '27-342')
         self.assertEqual(newest_entry['Team'], 'BOS')
         self.assertEqual(newest_entry['Opp'], 'BAL')
@@ -0,0 +1,128 @@
+import io
+import json
+import os
+import tempfile
+import urllib.request
+from unittest import TestCase, mock
+
+import beautiful_soup_helper
+import stat_miner
+import telemetry
+
+
+class RecordingSink(object):
+
+    def __init__(self):
+        self.events = list()
+
+    def handle(self, event):
+        self.events.append(event)
+
+    def get_events(self, event_type):
+        return [event for event in self.events if event["event"] == event_type]
+
+
+def get_page(url):
+    if "limited" in url:
+        return mock.Mock(status_code=429, content=b"")
+    return mock.Mock(status_code=200, content=b"<html><table id='stats'></table></html>",
+                     text="<html><table id='stats'></table></html>")
+
+
+@mock.patch("beautiful_soup_helper.get_session")
+class TelemetryTests(TestCase):
+
+    def setUp(self):
+        self.sink = RecordingSink()
+        self.registry = telemetry.MetricsRegistry()
+        previous_sinks = telemetry.set_telemetry_sinks([self.sink, self.registry])
+        self.addCleanup(telemetry.set_telemetry_sinks, previous_sinks)
+        self.addCleanup(beautiful_soup_helper.set_page_cache, beautiful_soup_helper.set_page_cache(None))
+
+    def test_request_and_cache_events(self, get_session):
+        get_session.return_value.get.side_effect = get_page
+        beautiful_soup_helper.set_page_cache(beautiful_soup_helper.PageCache())
+        for _ in range(2):
+            beautiful_soup_helper.get_uncommented_soup_from_url("http://example.com/page")
+        with self.assertRaises(beautiful_soup_helper.Http429Exception):
+            beautiful_soup_helper.url_to_soup("http://example.com/limited")
+
+        self.assertEqual([event["url"] for event in self.sink.get_events(telemetry.REQUEST_START_EVENT)],
+                         ["http://example.com/page", "http://example.com/limited"])
+        request_end_events = self.sink.get_events(telemetry.REQUEST_END_EVENT)
+        self.assertEqual([event["status_code"] for event in request_end_events], [200, 429])
+        self.assertEqual(request_end_events[0]["bytes"], 39)
+        self.assertEqual([event["hit"] for event in self.sink.get_events(telemetry.CACHE_LOOKUP_EVENT)],
+                         [False, True, False])
+        self.assertEqual(len(self.sink.get_events(telemetry.PARSE_EVENT)), 2)
+        self.assertEqual(self.sink.get_events(telemetry.RATE_LIMITED_EVENT)[0]["url"], "http://example.com/limited")
+
+        self.assertEqual(self.registry.get_counter("requests_total"), 2)
+        self.assertEqual(self.registry.get_counter("requests_total", status="429"), 1)
+        self.assertEqual(self.registry.get_counter("response_bytes_total"), 39)
+        self.assertEqual(self.registry.get_counter("cache_lookups_total", cache="page", result="hit"), 1)
+        self.assertEqual(self.registry.get_counter("rate_limited_total"), 1)
+
+    def test_failed_requests_and_parses_record_the_error(self, get_session):
+        get_session.return_value.get.side_effect = IOError
+        with self.assertRaises(IOError):
+            beautiful_soup_helper.request_url("http://example.com/page")
+        with self.assertRaises(stat_miner.TableNotFound):
+            stat_miner.get_all_table_row_dicts(stat_miner.BeautifulSoup("<html></html>", "lxml"), "batting")
+
+        self.assertEqual(self.sink.get_events(telemetry.REQUEST_END_EVENT)[0]["error"], "OSError")
+        parse_event = self.sink.get_events(telemetry.PARSE_EVENT)[0]
+        self.assertEqual((parse_event["table"], parse_event["error"]), ("batting", "TableNotFound"))
+        self.assertEqual(self.registry.get_counter("requests_total", status="OSError"), 1)
+
+    def test_rate_limit_is_printed_without_sinks(self, get_session):
+        get_session.return_value.get.side_effect = get_page
+        telemetry.set_telemetry_sinks(list())
+        with mock.patch("sys.stdout", new_callable=io.StringIO) as output, \
+                self.assertRaises(beautiful_soup_helper.Http429Exception):
+            beautiful_soup_helper.url_to_soup("http://example.com/limited")
+        self.assertEqual(output.getvalue(), "Rate limit reached for http://example.com/limited\n")
+
+    def test_player_events(self, get_session):
+        with mock.patch("stat_miner.PLAYER_STAT_CACHE", stat_miner.PlayerStatCache()):
+            stat_miner.assemble_pitcher_miner("priced01", 2016, dict())
+        self.assertEqual([event["stat_kind"] for event in self.sink.get_events(telemetry.CACHE_LOOKUP_EVENT)],
+                         ["p:career", "p:recent", "p:season:2016"])
+        player_event = self.sink.get_events(telemetry.PLAYER_MINED_EVENT)[0]
+        self.assertEqual((player_event["player_type"], player_event["player_id"]), ("p", "priced01"))
+        self.assertEqual(self.registry.get_summary("player_mining_seconds", player_type="p")[0], 1)
+        self.assertEqual(self.registry.get_counter("cache_lookups_total", cache="player_stats", result="miss"), 3)
+
+    def test_sinks(self, get_session):
+        output_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(output_dir.cleanup)
+        events_path = os.path.join(output_dir.name, "events.jsonl")
+        json_lines_sink = telemetry.JsonLinesSink(events_path)
+        console_output = io.StringIO()
+        console_sink = telemetry.ConsoleProgressSink(interval=0., stream=console_output)
+        telemetry.set_telemetry_sinks([json_lines_sink, console_sink, self.registry])
+
+        telemetry.emit(telemetry.REQUEST_END_EVENT, url="http://example.com/page", status_code=200, bytes=2000000,
+                       seconds=1.5)
+        telemetry.emit(telemetry.RATE_LIMITED_EVENT, url="http://example.com/limited")
+        json_lines_sink.close()
+
+        with open(events_path) as events_file:
+            events = [json.loads(line) for line in events_file]
+        self.assertEqual([event["event"] for event in events], [telemetry.REQUEST_END_EVENT,
+                                                                telemetry.RATE_LIMITED_EVENT])
+        self.assertEqual(events[0]["status_code"], 200)
+        console_lines = console_output.getvalue().splitlines()
+        self.assertTrue(console_lines[0].startswith("1 requests (2.0 MB in 1.5s), 0 rate limited"))
+        self.assertEqual(console_lines[1], "Rate limit reached for http://example.com/limited")
+        self.assertTrue(console_lines[2].startswith("1 requests (2.0 MB in 1.5s), 1 rate limited"))
+
+        server, metrics_url = telemetry.start_metrics_server(self.registry)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        with urllib.request.urlopen(metrics_url) as response:
+            metrics_text = response.read().decode("utf-8")
+        self.assertEqual(metrics_text, self.registry.to_prometheus())
+        self.assertIn("# TYPE mlb_scraper_requests_total counter\nmlb_scraper_requests_total{status=\"200\"} 1.0\n",
+                      metrics_text)
+        self.assertIn("mlb_scraper_request_seconds_count 1\nmlb_scraper_request_seconds_sum 1.5\n", metrics_text)